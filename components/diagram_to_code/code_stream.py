@@ -0,0 +1,110 @@
+"""
+Incremental extraction of the code block from streamed LLM output, so code
+can be shown while it is generated. The prompts end with an opening fence
+(```java / ```sql), so the model usually starts with the code itself; a
+model that repeats the opening fence is handled as well. Everything after
+the closing fence is dropped.
+"""
+import re
+from typing import Optional, Tuple
+
+FENCE = '```'
+# First code lines that give away the language before the code is complete
+LANGUAGE_HINTS = (
+    ('sql', re.compile(r'^\s*(?:CREATE|ALTER|DROP|INSERT)\s+(?:TABLE|INDEX|UNIQUE|INTO)\b', re.IGNORECASE | re.MULTILINE)),
+    ('java', re.compile(r'^\s*(?:package|import|(?:public\s+|abstract\s+|final\s+)*(?:class|interface|enum))\s', re.MULTILINE)),
+)
+
+
+def detect_language(code: str) -> Optional[str]:
+    """Return "java" or "sql" from the first lines of generated code, or None if undecided."""
+    matches = [(match.start(), language) for language, pattern in LANGUAGE_HINTS
+               for match in [pattern.search(code)] if match]
+    return min(matches)[1] if matches else None
+
+
+class FenceStripper:
+    """
+    Feed raw output chunks, get back the code text that can be shown so far.
+
+    Text that could still turn out to be a fence (leading or trailing
+    backticks) is held back until the next chunk decides it.
+    """
+
+    def __init__(self, expected_language: Optional[str] = None):
+        self.language = expected_language
+        self.code = ''
+        self._buffer = ''
+        self._state = 'start'  # start -> code -> closed
+
+    def feed(self, text: str) -> str:
+        """
+        Args:
+            text: Next chunk of model output
+
+        Returns:
+            Code text to append to what was returned before (may be empty)
+        """
+        if self._state == 'closed':
+            return ''
+        self._buffer += text
+        if self._state == 'start' and not self._open():
+            return ''
+        return self._emit(final=False)
+
+    def finish(self) -> str:
+        """Flush held-back text at the end of the output; returns the last code text."""
+        if self._state == 'start':
+            self._buffer = self._buffer.lstrip()
+            self._state = 'code'
+        return self._emit(final=True) if self._state == 'code' else ''
+
+    def _open(self) -> bool:
+        """Skip a repeated opening fence; False while the start of the output is undecided."""
+        head = self._buffer.lstrip()
+        if len(head) < len(FENCE) and FENCE.startswith(head):
+            return False
+        if head.startswith(FENCE):
+            newline = head.find('\n')
+            if newline < 0:
+                return False
+            info = head[len(FENCE):newline].strip().lower()
+            if info in ('java', 'sql'):
+                self.language = info
+            head = head[newline + 1:]
+        self._buffer = head
+        self._state = 'code'
+        return True
+
+    def _emit(self, final: bool) -> str:
+        end = self._buffer.find(FENCE)
+        if end >= 0:
+            ready, self._buffer, self._state = self._buffer[:end], '', 'closed'
+        elif final:
+            # A cut-off closing fence is not code
+            ready, self._buffer = self._buffer.rstrip().rstrip('`'), ''
+        else:
+            # Trailing backticks may be the start of the closing fence
+            held = len(self._buffer) - len(self._buffer.rstrip('`'))
+            ready, self._buffer = self._buffer[:len(self._buffer) - held], self._buffer[len(self._buffer) - held:]
+        if self._state == 'closed' or final:
+            ready = ready.rstrip()
+        self.code += ready
+        if self.language is None:
+            self.language = detect_language(self.code)
+        return ready
+
+
+def extract_code(output: str, expected_language: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """
+    Code block of a complete (non-streamed) model reply, read the same way as
+    a stream: from the start of the reply, or after a repeated opening fence,
+    up to the first closing fence.
+
+    Returns:
+        (code, language); language is None if it could not be determined
+    """
+    stripper = FenceStripper(expected_language)
+    stripper.feed(output)
+    stripper.finish()
+    return stripper.code.strip(), stripper.language
@@ -0,0 +1,154 @@
+"""
+Code units of a parsed diagram: one per class of a class diagram, and one
+per entity and per relationship of a Chen ER diagram. Each unit comes with
+the slice of the diagram its generated code depends on (the node itself,
+its relationships, the nodes on their other end and, for a class, the
+methods of its supertypes), and its signature is a
+hash of that slice, so comparing signatures between two versions of a
+diagram tells which classes or tables have to be generated again.
+"""
+import hashlib
+import os
+import sys
+from typing import Dict, List, Tuple
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'meeting_to_diagram'))
+
+from plantuml_ir import ClassNode, Diagram, Entity, Relationship
+from template_code_generator import java_supertypes
+
+
+def _serialize(node) -> str:
+    return Diagram(items=[('', node)]).serialize()
+
+
+def _key_summary(entity: Entity) -> str:
+    """An entity as its neighbours see it: name, stereotype and key attributes."""
+    keys = [attribute for attribute in entity.attributes if attribute.stereotype == 'key']
+    return _serialize(Entity(entity.name, entity.kind, entity.stereotype, keys))
+
+
+def _incident(relationships: List[Relationship], names) -> Dict[str, List[Relationship]]:
+    """Relationships touching each name, in diagram order."""
+    incident = {name: [] for name in names}
+    for relationship in relationships:
+        for end in {relationship.source, relationship.target}:
+            if end in incident:
+                incident[end].append(relationship)
+    return incident
+
+
+def _class_contexts(diagram: Diagram) -> Dict[str, str]:
+    classes = diagram.classes
+    incident = _incident(diagram.relationships, classes)
+    supertypes = java_supertypes(diagram)
+    contexts = {}
+    for key, node in classes.items():
+        lines = [_serialize(node)]
+        neighbours = []
+        for relationship in incident[key]:
+            other = relationship.target if relationship.source == key else relationship.source
+            if other not in classes:
+                continue
+            lines.append(_serialize(relationship))
+            if other != key and other not in neighbours:
+                neighbours.append(other)
+        # Only the declaration line of a neighbour matters (its name and kind)
+        lines.extend(_serialize(classes[other]).split('\n', 1)[0] for other in neighbours)
+        # A concrete class implements the abstract methods of all its supertypes
+        for ancestor in supertypes[key]:
+            parent = classes[ancestor]
+            lines.append(_serialize(ClassNode(parent.name, parent.kind, parent.quoted, parent.generic,
+                                              parent.alias, parent.stereotype, parent.methods)))
+        contexts[key] = '\n'.join(lines)
+    return contexts
+
+
+def _chen_contexts(diagram: Diagram) -> Dict[str, str]:
+    entities = diagram.entities
+    incident = _incident(diagram.relationships, entities)
+    diamonds = {name for name, node in entities.items() if node.kind == 'relationship'}
+
+    def other_end(relationship: Relationship, name: str) -> str:
+        return relationship.target if relationship.source == name else relationship.source
+
+    def diamond_lines(diamond: str) -> List[str]:
+        return [_serialize(entities[diamond])] + [_serialize(relationship) for relationship in incident[diamond]]
+
+    def key_context(name: str) -> List[str]:
+        # The primary key of a weak entity, or of one in an identifying
+        # relationship, includes the keys of the entities it depends on
+        lines = []
+        queue, seen = [name], {name}
+        while queue:
+            current = queue.pop(0)
+            lines.append(_key_summary(entities[current]))
+            for relationship in incident[current]:
+                diamond = other_end(relationship, current)
+                if diamond not in diamonds:
+                    continue
+                if entities[current].stereotype != 'weak' and entities[diamond].stereotype != 'identifying':
+                    continue
+                lines.extend(diamond_lines(diamond))
+                for link in incident[diamond]:
+                    other = other_end(link, diamond)
+                    if other in entities and other not in diamonds and other not in seen:
+                        seen.add(other)
+                        queue.append(other)
+        return lines
+
+    def diamond_context(diamond: str) -> List[str]:
+        # Foreign keys depend on the keys of every participant and on the order of the links
+        lines = diamond_lines(diamond)
+        for relationship in incident[diamond]:
+            other = other_end(relationship, diamond)
+            if other in entities and other not in diamonds:
+                lines.extend(key_context(other))
+        return lines
+
+    contexts = {}
+    for name, node in entities.items():
+        if node.kind == 'relationship':
+            contexts[name] = '\n'.join(diamond_context(name))
+            continue
+        lines = [_serialize(node)]
+        for relationship in incident[name]:
+            other = other_end(relationship, name)
+            if other in diamonds:
+                lines.extend(diamond_context(other))
+        contexts[name] = '\n'.join(lines)
+    return contexts
+
+
+def unit_contexts(diagram: Diagram) -> Dict[str, str]:
+    """
+    PlantUML slice each code unit is generated from.
+
+    Args:
+        diagram: Parsed class or Chen ER diagram
+
+    Returns:
+        Unit name (class key, entity or relationship name) -> PlantUML lines
+        of the unit, its relationships and the nodes they connect it to
+    """
+    return _chen_contexts(diagram) if diagram.kind == 'chen' else _class_contexts(diagram)
+
+
+def unit_signatures(diagram: Diagram) -> Dict[str, str]:
+    """Unit name -> hex SHA-256 of its context (see unit_contexts)."""
+    return {name: hashlib.sha256(context.encode('utf-8')).hexdigest()
+            for name, context in unit_contexts(diagram).items()}
+
+
+def diff_units(old: Dict[str, str], new: Dict[str, str]) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Compare the unit signatures of two versions of a diagram.
+
+    Returns:
+        (unchanged, changed or added, removed) unit names; the first two in
+        the order of the new version
+    """
+    unchanged = [name for name, signature in new.items() if old.get(name) == signature]
+    changed = [name for name, signature in new.items() if old.get(name) != signature]
+    removed = [name for name in old if name not in new]
+    return unchanged, changed, removed
@@ -1,28 +1,55 @@
 import re
 import os
+import sys
+import time
 import replicate
 import pathlib
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from template_code_generator import generate_code, java_units, join_java_units, sql_units
+from code_units import diff_units, unit_contexts, unit_signatures
+from code_stream import extract_code, FenceStripper
+from plantuml_ir import parse_diagram
+from plantuml_normalize import fingerprint, SEMANTIC
+
+JAVA_IMPORT_LINE = re.compile(r'^\s*import\s+(?:static\s+)?[\w.*]+\s*;\s*$')
+JAVA_PACKAGE_LINE = re.compile(r'^\s*package\s+[\w.]+\s*;\s*$')
+
 class GraniteCodeGenerator:
     """
-    Generates Java classes or SQL tables from PlantUML code using Granite Code LLM.
-    This class analyzes the structure of PlantUML code to determine if it represents
-    a UML class diagram or an ER diagram, and generates the corresponding code.
+    Generates Java classes or SQL tables from PlantUML code.
+    Class diagrams and Chen ER diagrams are converted deterministically from
+    their parsed structure (template_code_generator); Granite Code LLM is only
+    used as an optional enrichment pass on that output, and as the fallback
+    for diagrams the templates cannot handle. LLM passes over large diagrams
+    run one concurrent call per class or table (see generate_incremental).
     """
     
     def __init__(self):
-        """Initialize the Granite Code LLM for PlantUML generation"""
+        """Initialize the generator; the Granite client is only needed for LLM passes"""
     
         # Load environment variables from .env file using absolute path
         env_path = pathlib.Path(__file__).parent.parent / '.env'
         load_dotenv(dotenv_path=env_path)
         self.replicate_token = os.getenv("REPLICATE_API_TOKEN")
+        # "template" (default): deterministic generation, LLM only as fallback; "llm": LLM only
+        self.mode = os.getenv("CODE_GEN_MODE", "template").lower()
+        self.enrich = os.getenv("CODE_GEN_LLM_ENRICH", "false").lower() in ("1", "true", "yes")
+        # LLM passes over large diagrams run one call per class / table: "auto" (default)
+        # from CODE_GEN_CHUNK_MIN_UNITS units on, "always" or "off"
+        self.chunking = os.getenv("CODE_GEN_CHUNKING", "auto").lower()
+        self.chunk_min_units = int(os.getenv("CODE_GEN_CHUNK_MIN_UNITS", "6"))
+        self.max_workers = int(os.getenv("CODE_GEN_MAX_WORKERS", "4"))
         
         if not self.replicate_token:
-            raise ValueError("REPLICATE_API_TOKEN environment variable is not set")
-        
-        self.replicate_client = replicate.Client(api_token=self.replicate_token)
+            if self.mode == "llm":
+                raise ValueError("REPLICATE_API_TOKEN environment variable is not set")
+            print("⚠️ REPLICATE_API_TOKEN not set: template code generation only")
+            self.replicate_client = None
+        else:
+            self.replicate_client = replicate.Client(api_token=self.replicate_token)
 
     def generate_real_code_from_plantuml(self, plantuml_code: str, diagram_type: str = None) -> dict:
         """
@@ -34,20 +61,300 @@ class GraniteCodeGenerator:
             plantuml_code: The PlantUML code to convert
             diagram_type: The type of diagram (e.g., "UML Class Diagram", "ER Diagram")
 
-        Returns a dict with: code, language, success flag
+        Returns a dict with: code, language, success flag and generator
+        ("template", "template+llm" or "llm")
         """
+        if self.mode != "llm":
+            start = time.perf_counter()
+            result = generate_code(plantuml_code, diagram_type if diagram_type in ("Class Diagram", "ER Diagram") else None)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if result["success"]:
+                print(f"⚡ Generated {result['language']} from template in {elapsed_ms:.1f} ms")
+                result["generator"] = "template"
+                if self.enrich and self.replicate_client:
+                    if self._chunked(plantuml_code, diagram_type):
+                        return self.generate_incremental(plantuml_code, diagram_type)
+                    return self._enrich_generated_code(plantuml_code, result)
+                return result
+            print(f"⚠️ Template code generation failed: {result['error']}")
+            if not self.replicate_client:
+                return result
 
-        # Choose prompt based on diagram type
-        if diagram_type == "ER Diagram":
-            prompt = self._get_erd_to_sql_prompt(plantuml_code)
-            expected_language = "sql"
-        elif diagram_type == "Class Diagram":
-            prompt = self._get_class_to_java_prompt(plantuml_code)
-            expected_language = "java"
+        return self._generate_with_llm(plantuml_code, diagram_type)
+
+    def stream_real_code_from_plantuml(self, plantuml_code: str, diagram_type: str = None,
+                                       store=None, store_key: str = None):
+        """
+        Generate code like generate_real_code_from_plantuml, yielding it as it
+        is produced so a client can show it before generation ends.
+
+        Template output is complete at once and comes as a single chunk; with
+        enrichment on, a "replace" event follows with the enriched code. LLM
+        output is forwarded token by token with the code fence stripped and
+        the language announced as soon as it is known. Chunked generation of
+        large diagrams (see generate_incremental) yields the merged code when
+        all units are done.
+
+        With a store, template and chunked output go through
+        generate_incremental, so the units are stored for later incremental
+        regeneration (and unchanged units are reused). A single streamed LLM
+        call cannot be split into units, so it drops the stored entry instead,
+        as generate_incremental does for small diagrams in "llm" mode.
+
+        Args:
+            plantuml_code: The PlantUML code to convert
+            diagram_type: The type of diagram (e.g., "Class Diagram", "ER Diagram")
+            store: Cache holding the units per diagram (see generate_incremental), or None
+            store_key: Key of this diagram in the store
+
+        Yields dicts with a "type":
+            language  {"language"}
+            chunk     {"text"} to append to the code shown so far
+            replace   {"code", "generator"} replacing the code shown so far
+            done      the result dict of generate_real_code_from_plantuml
+            error     {"error"}
+        """
+        if self.mode != "llm":
+            result = generate_code(plantuml_code, diagram_type if diagram_type in ("Class Diagram", "ER Diagram") else None)
+            if result["success"]:
+                result["generator"] = "template"
+                yield {"type": "language", "language": result["language"]}
+                yield {"type": "chunk", "text": result["code"]}
+                enrich = self.enrich and self.replicate_client
+                if store is not None or (enrich and self._chunked(plantuml_code, diagram_type)):
+                    shown = result["code"]
+                    result = self.generate_incremental(plantuml_code, diagram_type, store, store_key)
+                    if result["code"] != shown:
+                        yield {"type": "replace", "code": result["code"], "generator": result["generator"]}
+                elif enrich:
+                    result = self._enrich_generated_code(plantuml_code, result)
+                    if result["generator"] != "template":
+                        yield {"type": "replace", "code": result["code"], "generator": result["generator"]}
+                yield {"type": "done", **result}
+                return
+            print(f"⚠️ Template code generation failed: {result['error']}")
+            if not self.replicate_client:
+                yield {"type": "error", "error": result["error"]}
+                return
+
+        if not self.replicate_client:
+            yield {"type": "error", "error": "REPLICATE_API_TOKEN environment variable is not set"}
+            return
+        if self.mode == "llm" and self._chunked(plantuml_code, diagram_type):
+            result = self.generate_incremental(plantuml_code, diagram_type, store, store_key)
+            yield {"type": "language", "language": result["language"]}
+            yield {"type": "chunk", "text": result["code"]}
+            yield {"type": "done", **result}
+            return
+        if store is not None:
+            store.invalidate(store_key)
+
+        prompt, expected_language = self._get_generation_prompt(plantuml_code, diagram_type)
+        stripper = FenceStripper(expected_language)
+        announced = None
+        try:
+            print("🔄 Streaming from Granite Code LLM...")
+            for chunk in self._stream_generation(prompt):
+                text = stripper.feed(chunk)
+                if stripper.language and stripper.language != announced:
+                    announced = stripper.language
+                    yield {"type": "language", "language": announced}
+                if text:
+                    yield {"type": "chunk", "text": text}
+            text = stripper.finish()
+            if text:
+                yield {"type": "chunk", "text": text}
+        except Exception as e:
+            print(f"❌ Error during code generation: {str(e)}")
+            yield {"type": "error", "error": str(e)}
+            return
+
+        code = stripper.code.strip()
+        print(f"✅ Streamed {len(code)} characters of code from LLM")
+        if len(code) < 10:
+            yield {"type": "error", "error": "Generated code appears to be too short or incomplete"}
+            return
+        yield {"type": "done", "code": code, "language": stripper.language or "plain", "success": True, "generator": "llm"}
+
+    def generate_incremental(self, plantuml_code: str, diagram_type: str, store=None, store_key: str = None) -> dict:
+        """
+        Generate code for a (possibly edited) diagram unit by unit (one unit
+        per class, or per entity / relationship owning a table), reusing the
+        code of every unit whose part of the diagram did not change since the
+        last generation stored under store_key. Only changed units are
+        generated again (and enriched, when enrichment is on), so the cost of
+        a regeneration follows the size of the edit. In "llm" mode each unit
+        is its own Granite call; unit calls run concurrently.
+
+        Args:
+            plantuml_code: The PlantUML code to convert
+            diagram_type: The type of diagram (e.g., "Class Diagram", "ER Diagram")
+            store: Cache with get(key) / set(key, value) holding the units per
+                diagram, or None to generate every unit without reuse
+            store_key: Key of this diagram in the store
+
+        Returns the same dict as generate_real_code_from_plantuml, plus "units"
+        with the names of the reused, regenerated and removed units
+        """
+        split = self._split_units(plantuml_code, diagram_type)
+        if split is None or (self.mode == "llm" and not self._use_chunks(len(split[2]))):
+            # Nothing the templates can split, or a small diagram in LLM mode: one call
+            if store is not None:
+                store.invalidate(store_key)
+            return self.generate_real_code_from_plantuml(plantuml_code, diagram_type)
+        diagram, language, signatures, tables = split
+
+        start = time.perf_counter()
+        diagram_fingerprint = fingerprint(plantuml_code, SEMANTIC, diagram_type)
+        previous = store.get(store_key) if store is not None else None
+        if not previous or previous["language"] != language or previous.get("mode") != self.mode:
+            previous = {"fingerprint": None, "units": {}}
+        if previous["fingerprint"] == diagram_fingerprint:
+            print("⚡ Diagram unchanged, reusing generated code")
+            return {**previous["result"], "units": {"reused": list(previous["units"]), "regenerated": [], "removed": []}}
+
+        old_units = previous["units"]
+        unchanged, changed, removed = diff_units(
+            {name: unit["signature"] for name, unit in old_units.items()}, signatures)
+
+        order = list(signatures)
+        if language == "java":
+            fresh = {name: {"code": body, "imports": imports, "generator": "template"}
+                     for name, (body, imports) in java_units(diagram, changed).items()}
         else:
-            # Fallback to auto-detection prompt
-            prompt = self._get_auto_detection_prompt(plantuml_code)
-            expected_language = None
+            fresh = {name: {"code": '\n\n'.join(statement for owner, statement in tables if owner == name),
+                            "imports": [], "generator": "template"}
+                     for name in changed}
+
+        if changed and self.replicate_client and (self.mode == "llm" or self.enrich):
+            contexts = unit_contexts(diagram)
+            produce = self._generate_unit if self.mode == "llm" else self._enrich_unit
+            others = {name: [other for other in order if other != name] for name in changed}
+            updates = self._run_concurrently(
+                lambda name: produce(contexts[name], fresh[name], language, others[name]), changed)
+            for name, update in zip(changed, updates):
+                fresh[name].update(update)
+
+        units = {}
+        for name in order:
+            unit = old_units[name] if name in unchanged else fresh[name]
+            units[name] = {**unit, "signature": signatures[name]}
+
+        code = self._merge_units([units[name] for name in order], language)
+        generators = {unit["generator"] for unit in units.values()}
+        generator = next((name for name in ("llm", "template+llm") if name in generators), "template")
+        result = {"code": code, "language": language, "success": True, "generator": generator}
+        if store is not None:
+            store.set(store_key, {"fingerprint": diagram_fingerprint, "language": language, "mode": self.mode,
+                                  "units": units, "result": result})
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        fallbacks = len([name for name in changed if self.mode == "llm" and fresh[name]["generator"] != "llm"])
+        print(f"⚡ Generated {len(changed)} of {len(order)} {language.upper()} units in {elapsed_ms:.1f} ms "
+              f"({len(unchanged)} reused, {len(removed)} removed"
+              + (f", {fallbacks} from template after failed LLM calls" if fallbacks else "") + ")")
+        return {**result, "units": {"reused": unchanged, "regenerated": changed, "removed": removed}}
+
+    def _split_units(self, plantuml_code: str, diagram_type: str):
+        """
+        Parse a diagram into code units.
+
+        Returns (diagram, language, unit signatures, SQL tables by owner), or
+        None if the templates cannot generate the diagram
+        """
+        template_type = diagram_type if diagram_type in ("Class Diagram", "ER Diagram") else None
+        try:
+            diagram = parse_diagram(plantuml_code)
+            language = "sql" if template_type == "ER Diagram" or (template_type is None and diagram.kind == 'chen') else "java"
+            signatures = unit_signatures(diagram)
+            tables = []
+            if language == "sql":
+                # Units are the entities and relationships that own at least one table
+                tables = sql_units(diagram)
+                signatures = {owner: signatures[owner] for owner, _ in tables}
+            else:
+                signatures = {name: signature for name, signature in signatures.items() if name in diagram.classes}
+        except Exception as e:
+            print(f"⚠️ Could not split diagram into code units: {e}")
+            return None
+        return (diagram, language, signatures, tables) if signatures else None
+
+    def _chunked(self, plantuml_code: str, diagram_type: str) -> bool:
+        """Whether LLM passes over this diagram run one call per unit."""
+        split = self._split_units(plantuml_code, diagram_type)
+        return split is not None and self._use_chunks(len(split[2]))
+
+    def _use_chunks(self, unit_count: int) -> bool:
+        """Whether a diagram with unit_count units is generated one unit per LLM call."""
+        if self.chunking == "always":
+            return True
+        return self.chunking == "auto" and unit_count >= self.chunk_min_units
+
+    def _run_concurrently(self, func, items: list) -> list:
+        """func(item) for every item, on up to CODE_GEN_MAX_WORKERS threads, results in order."""
+        if len(items) <= 1 or self.max_workers <= 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+            return list(pool.map(func, items))
+
+    @staticmethod
+    def _merge_units(units: list, language: str) -> str:
+        """One source file from generated units: Java gets a single package / import header."""
+        if language != "java":
+            return '\n\n'.join(unit["code"] for unit in units)
+        packages = sorted({unit["package"] for unit in units if unit.get("package")})
+        code = join_java_units([(unit["code"], unit["imports"]) for unit in units])
+        return f"{packages[0]}\n\n{code}" if packages else code
+
+    @staticmethod
+    def _split_java_header(code: str, imports: list) -> dict:
+        """Move package and import lines of a generated Java unit to the shared header."""
+        lines = code.split('\n')
+        header = [line.strip() for line in lines if JAVA_IMPORT_LINE.match(line) or JAVA_PACKAGE_LINE.match(line)]
+        body = '\n'.join(line for line in lines if line.strip() not in header).strip()
+        update = {"code": body, "imports": sorted(set(imports) | {line for line in header if line.startswith('import')})}
+        package = next((line for line in header if line.startswith('package')), None)
+        if package:
+            update["package"] = package
+        return update
+
+    def _enrich_unit(self, context: str, unit: dict, language: str, others: list) -> dict:
+        """Enrich one class or table; imports the LLM adds to a Java class are moved to the shared section."""
+        enriched = self._enrich_generated_code(context, {"code": unit["code"], "language": language, "generator": "template"})
+        if enriched["generator"] != "template+llm":
+            return {}
+        update = self._split_java_header(enriched["code"], unit["imports"]) if language == "java" else {"code": enriched["code"]}
+        return {**update, "generator": "template+llm"}
+
+    def _generate_unit(self, context: str, unit: dict, language: str, others: list) -> dict:
+        """
+        Generate one class or table with Granite from its slice of the diagram.
+        The template unit is kept if the output misses any class or table the
+        template declares for this unit, so the merged code stays complete.
+        """
+        declared = re.findall(r'(?:class|interface|enum|CREATE TABLE)\s+"?(\w+)', unit["code"])
+        full_output = self._try_alternative_generation(self._get_unit_prompt(context, declared, others, language))
+        code, _ = extract_code(full_output, language)
+        if not code or any(not re.search(rf'\b{re.escape(name)}\b', code) for name in declared):
+            print(f"⚠️ LLM output for {', '.join(declared)} incomplete, using template output")
+            return {}
+        update = self._split_java_header(code, []) if language == "java" else {"code": code}
+        return {**update, "generator": "llm"}
+
+    def _generate_with_llm(self, plantuml_code: str, diagram_type: str = None) -> dict:
+        """Generate code from scratch with Granite Code LLM."""
+        if not self.replicate_client:
+            return {
+                "code": "",
+                "language": "unknown",
+                "success": False,
+                "error": "REPLICATE_API_TOKEN environment variable is not set"
+            }
+        if self.mode == "llm" and self._chunked(plantuml_code, diagram_type):
+            # Large diagrams: one call per class / table, so the output is never truncated
+            return self.generate_incremental(plantuml_code, diagram_type)
+
+        prompt, expected_language = self._get_generation_prompt(plantuml_code, diagram_type)
         
         try:
             print("🔄 Calling Granite Code LLM...")
@@ -56,13 +363,9 @@ class GraniteCodeGenerator:
             full_output = self._try_alternative_generation(prompt)
             print(f"✅ Received {len(full_output)} characters from LLM")
             
-            # Detect language from code block
-            match = re.search(r"```(java|sql)?(.*?)```", full_output, re.DOTALL)
-            detected_language = match.group(1) if match and match.group(1) else "plain"
-            code = match.group(2).strip() if match else full_output.strip()
-
-            # Use expected language if available, otherwise use detected
-            final_language = expected_language if expected_language else detected_language
+            # The prompt ends with an opening fence, so the reply starts with the code
+            code, detected_language = extract_code(full_output, expected_language)
+            final_language = expected_language or detected_language or "plain"
 
             # Validation: ensure we have actual code content
             if len(code.strip()) < 10:  # Arbitrary minimum length
@@ -76,7 +379,8 @@ class GraniteCodeGenerator:
             return {
                 "code": code,
                 "language": final_language,
-                "success": True
+                "success": True,
+                "generator": "llm"
             }
 
         except Exception as e:
@@ -88,31 +392,61 @@ class GraniteCodeGenerator:
                 "error": str(e)
             }
 
+    def _get_generation_prompt(self, plantuml_code: str, diagram_type: str = None) -> tuple:
+        """Return the prompt for a whole diagram and the language it asks for (None: auto-detect)."""
+        if diagram_type == "ER Diagram":
+            return self._get_erd_to_sql_prompt(plantuml_code), "sql"
+        if diagram_type == "Class Diagram":
+            return self._get_class_to_java_prompt(plantuml_code), "java"
+        # Fallback to auto-detection prompt
+        return self._get_auto_detection_prompt(plantuml_code), None
+
+    def _enrich_generated_code(self, plantuml_code: str, result: dict) -> dict:
+        """
+        Let the LLM refine deterministic output (method bodies, documentation).
+        The enriched code is only used if it still declares every class or
+        table of the template output; otherwise the template result is kept.
+        """
+        language = result["language"]
+        print("🔄 Enriching generated code with Granite Code LLM...")
+        full_output = self._try_alternative_generation(self._get_enrichment_prompt(plantuml_code, result["code"], language))
+        enriched, _ = extract_code(full_output, language)
+
+        declared = re.findall(r'(?:class|interface|enum|CREATE TABLE)\s+"?(\w+)', result["code"])
+        if not enriched or any(not re.search(rf'\b{re.escape(name)}\b', enriched) for name in declared):
+            print("⚠️ Enrichment dropped declarations, keeping template output")
+            return result
+
+        print(f"✅ Enriched code: {len(result['code'])} -> {len(enriched)} characters")
+        return {**result, "code": enriched, "generator": "template+llm"}
+
     def _try_alternative_generation(self, prompt: str) -> str:
         """
         Fallback method: try a simpler, non-streaming approach if available.
         """
-        try:            
-            result = self.replicate_client.run(
-                "ibm-granite/granite-3.3-8b-instruct",
-                input={
-                    "prompt": prompt,
-                    "max_tokens": 4000,      # Allows for substantial code generation
-                    "temperature": 0.0,      # consistent code
-                    "top_p": 0.9            # Focus on most likely tokens
-                }
-            )
-            
-            # Handle both streaming and non-streaming responses
-            if hasattr(result, '__iter__') and not isinstance(result, str):
-                return ''.join(str(chunk) for chunk in result)
-            else:
-                return str(result)
-                
+        try:
+            return ''.join(self._stream_generation(prompt))
         except Exception as e:
             print(f"❌ Alternative method also failed: {str(e)}")
             return ""
 
+    def _stream_generation(self, prompt: str):
+        """Yield the model output token by token as Replicate streams it (server-sent events)."""
+        events = self.replicate_client.stream(
+            "ibm-granite/granite-3.3-8b-instruct",
+            input={
+                "prompt": prompt,
+                "max_tokens": 4000,      # Allows for substantial code generation
+                "temperature": 0.0,      # consistent code
+                "top_p": 0.9            # Focus on most likely tokens
+            }
+        )
+        for event in events:
+            # str() of an output event is its text; log and done events give ""
+            text = str(event)
+            if text:
+                yield text
+
     def _get_erd_to_sql_prompt(self, plantuml_code: str) -> str:
         """Generate SQL-specific prompt for ER diagrams."""
         return f"""
@@ -145,6 +479,65 @@ REQUIREMENTS:
 SQL CODE:
 ```sql"""
 
+    def _get_enrichment_prompt(self, plantuml_code: str, code: str, language: str) -> str:
+        """Generate the prompt that refines template-generated code."""
+        return f"""
+You are a {"database" if language == "sql" else "Java"} expert. The following {language.upper()} code was generated mechanically from a PlantUML diagram.
+
+DIAGRAM:
+{plantuml_code}
+
+GENERATED CODE:
+```{language}
+{code}
+```
+
+TASK:
+- Keep every {"table, column and constraint" if language == "sql" else "class, field and method signature"} exactly as it is
+- {"Add indexes on foreign key columns and sensible NOT NULL / CHECK constraints" if language == "sql" else "Replace stub method bodies (which only return a default value) with straightforward implementations and add short Javadoc comments"}
+- Output ONLY the complete code in a ```{language} code block
+- IMPORTANT: Generate the COMPLETE code, do not truncate
+
+{language.upper()} CODE:
+```{language}"""
+
+    def _get_unit_prompt(self, context: str, declared: list, others: list, language: str) -> str:
+        """Generate the prompt for one class or table of a large diagram."""
+        if language == "sql":
+            return f"""
+You are a database expert. The following lines are the part of a PlantUML Chen ER diagram that concerns {", ".join(declared)}.
+
+DIAGRAM EXCERPT:
+{context}
+
+TASK:
+- Write the CREATE TABLE statement for each of these tables and no others: {", ".join(declared)}
+- Tables for the other entities and relationships ({", ".join(others) or "none"}) are generated separately; reference them in FOREIGN KEY constraints but do not create them
+- Mark `<<key>>` attributes as PRIMARY KEY and use INT, VARCHAR(255), DATE, DECIMAL(10,2) or BOOLEAN column types
+- A 1:N relationship puts the foreign key on the N side; an M:N relationship is a junction table keyed by both foreign keys
+- Output ONLY the SQL code in a ```sql code block
+- IMPORTANT: Generate the COMPLETE code, do not truncate
+
+SQL CODE:
+```sql"""
+        return f"""
+You are a Java expert. The following lines are the part of a PlantUML class diagram that concerns {", ".join(declared)}.
+
+DIAGRAM EXCERPT:
+{context}
+
+TASK:
+- Write the complete Java definition of {", ".join(declared)} and no other type
+- The other classes ({", ".join(others) or "none"}) are generated separately; use them as field, parameter or parent types but do not define them
+- Convert visibility (`+` public, `-` private, `#` protected), fields, methods, constructors (default + parameterized), getters and setters
+- Implement inheritance (extends / implements) and associations as fields or List collections
+- Include the imports this class needs (java.time.LocalDateTime, java.util.List, etc.)
+- Output ONLY the Java code in a ```java code block
+- IMPORTANT: Generate the COMPLETE code, do not truncate
+
+JAVA CODE:
+```java"""
+
     def _get_class_to_java_prompt(self, plantuml_code: str) -> str:
         """Generate Java-specific prompt for UML class diagrams."""
         return f"""
@@ -0,0 +1,701 @@
+"""
+Deterministic code generation from parsed diagrams.
+Class diagrams become Java classes (fields, constructors, getters/setters,
+extends/implements, collections for many-valued associations) and Chen ER
+diagrams become SQL DDL (PRIMARY KEY from <<key>>, FOREIGN KEYs and junction
+tables from relationships). Everything is derived from the plantuml_ir parse,
+so the same diagram always produces the same code, in milliseconds.
+"""
+import os
+import re
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'meeting_to_diagram'))
+
+from plantuml_ir import parse_diagram, Attribute, Cardinality, ClassNode, Diagram, Entity, Method
+
+INDENT = '    '
+
+JAVA_TYPES = {
+    'string': 'String', 'str': 'String', 'text': 'String', 'varchar': 'String', 'char': 'char',
+    'integer': 'int', 'int': 'int', 'long': 'long', 'short': 'short', 'byte': 'byte',
+    'double': 'double', 'float': 'double', 'number': 'double',
+    'boolean': 'boolean', 'bool': 'boolean',
+    'date': 'LocalDate', 'datetime': 'LocalDateTime', 'timestamp': 'LocalDateTime',
+    'time': 'LocalTime', 'decimal': 'BigDecimal', 'money': 'BigDecimal', 'uuid': 'UUID',
+    'void': 'void', 'object': 'Object',
+    'list': 'List', 'array': 'List', 'set': 'Set', 'map': 'Map', 'dict': 'Map',
+}
+JAVA_IMPORTS = {
+    'LocalDate': 'java.time.LocalDate',
+    'LocalDateTime': 'java.time.LocalDateTime',
+    'LocalTime': 'java.time.LocalTime',
+    'BigDecimal': 'java.math.BigDecimal',
+    'UUID': 'java.util.UUID',
+    'List': 'java.util.List',
+    'ArrayList': 'java.util.ArrayList',
+    'Set': 'java.util.Set',
+    'Map': 'java.util.Map',
+}
+JAVA_BOXED = {
+    'int': 'Integer', 'long': 'Long', 'short': 'Short', 'byte': 'Byte', 'char': 'Character',
+    'double': 'Double', 'boolean': 'Boolean',
+}
+JAVA_VISIBILITY = {'+': 'public', '-': 'private', '#': 'protected', '~': ''}
+# "public " of a top-level (unindented) type declaration
+PUBLIC_TOP_LEVEL_TYPE = re.compile(
+    r'^public\s+(?=(?:(?:abstract|final|sealed|non-sealed|strictfp)\s+)*(?:class|interface|enum|record|@interface)\b)',
+    re.MULTILINE)
+
+SQL_TYPES = {
+    'integer': 'INT', 'int': 'INT', 'bigint': 'BIGINT', 'long': 'BIGINT', 'smallint': 'SMALLINT',
+    'string': 'VARCHAR(255)', 'str': 'VARCHAR(255)', 'varchar': 'VARCHAR(255)', 'char': 'CHAR(1)',
+    'text': 'TEXT', 'date': 'DATE', 'datetime': 'TIMESTAMP', 'timestamp': 'TIMESTAMP', 'time': 'TIME',
+    'decimal': 'DECIMAL(10,2)', 'money': 'DECIMAL(10,2)', 'numeric': 'DECIMAL(10,2)',
+    'float': 'FLOAT', 'double': 'DOUBLE PRECISION', 'real': 'REAL',
+    'boolean': 'BOOLEAN', 'bool': 'BOOLEAN', 'uuid': 'UUID', 'blob': 'BLOB',
+}
+# Identifiers that must be quoted when used as table or column names
+SQL_RESERVED = frozenset({
+    'order', 'user', 'group', 'table', 'select', 'from', 'where', 'key', 'index', 'check',
+    'references', 'limit', 'default', 'column', 'desc', 'asc', 'values', 'primary', 'foreign',
+    'unique', 'constraint', 'grant', 'role', 'session', 'transaction', 'case', 'end', 'date',
+    'time', 'timestamp', 'level', 'comment', 'position', 'value', 'year', 'month',
+})
+SQL_SIZED_TYPE = re.compile(r'^(\w+)\s*(\(\s*\d+(?:\s*,\s*\d+)?\s*\))$')
+TYPE_TOKEN = re.compile(r'[A-Za-z_]\w*')
+
+
+# --------------------------------------------------------------------------
+# Java
+# --------------------------------------------------------------------------
+
+def _java_type(type_: Optional[str], imports: set) -> str:
+    """Map a diagram type ("Integer", "List<Order>", "string[]") to Java and record its imports."""
+    if not type_:
+        return 'Object'
+    type_ = type_.strip()
+    if type_.endswith('[]'):
+        element = _java_type(type_[:-2], imports)
+        imports.add('List')
+        return f"List<{JAVA_BOXED.get(element, element)}>"
+
+    def replace(match):
+        name = JAVA_TYPES.get(match.group(0).lower(), match.group(0))
+        if name in JAVA_IMPORTS:
+            imports.add(name)
+        return name
+
+    mapped = TYPE_TOKEN.sub(replace, type_)
+    if '<' in mapped:
+        # Generic arguments must be reference types
+        head, rest = mapped.split('<', 1)
+        rest = re.sub(r'\b(int|long|short|byte|char|double|boolean)\b', lambda m: JAVA_BOXED[m.group(1)], rest)
+        mapped = f"{head}<{rest}"
+    return mapped
+
+
+def _identifier(name: str) -> str:
+    """Java-safe identifier from a diagram name."""
+    name = re.sub(r'\W+', '_', name.strip()).strip('_')
+    return name if name and not name[0].isdigit() else f"_{name}"
+
+
+def _lower_first(name: str) -> str:
+    return name[:1].lower() + name[1:]
+
+
+def _upper_first(name: str) -> str:
+    return name[:1].upper() + name[1:]
+
+
+def _plural(name: str) -> str:
+    if name.endswith('y') and name[-2:-1] not in tuple('aeiou'):
+        return name[:-1] + 'ies'
+    if name.endswith(('s', 'x', 'z', 'ch', 'sh')):
+        return name + 'es'
+    return name + 's'
+
+
+class _JavaField:
+    __slots__ = ('name', 'type', 'visibility', 'static', 'default')
+
+    def __init__(self, name: str, type_: str, visibility: str = 'private',
+                 static: bool = False, default: Optional[str] = None):
+        self.name = name
+        self.type = type_
+        self.visibility = visibility
+        self.static = static
+        self.default = default
+
+
+def _association_fields(diagram: Diagram, classes: Dict[str, ClassNode]) -> Tuple[Dict[str, List[Tuple[str, bool]]], Dict[str, Optional[str]], Dict[str, List[str]]]:
+    """
+    Derive extends / implements / association fields from the relationships.
+
+    Returns:
+        (fields by class: [(referenced class, many)], superclass by class, interfaces by class)
+    """
+    fields = {key: [] for key in classes}
+    superclass = {}
+    interfaces = {key: [] for key in classes}
+
+    for relationship in diagram.relationships:
+        source, target = relationship.source, relationship.target
+        if source not in classes or target not in classes:
+            continue
+        head, tail = relationship.head, relationship.tail
+        kind = relationship.kind
+
+        if kind in ('inheritance', 'realization') and head:
+            parent = classes[head]
+            child = classes[tail]
+            if kind == 'realization' or (parent.kind == 'interface' and child.kind != 'interface'):
+                interfaces[tail].append(head)
+            elif child.kind == 'interface':
+                interfaces[tail].append(head)  # interface extends interface
+            elif tail not in superclass:
+                superclass[tail] = head
+            continue
+        if kind == 'dependency':
+            continue
+
+        # Composition / aggregation: the whole holds the parts.
+        # Association: the undecorated end holds the one the arrow points at.
+        if kind in ('composition', 'aggregation'):
+            owner = head
+        else:
+            owner = tail or source
+        held = target if owner == source else source
+        cardinality = relationship.target_cardinality if owner == source else relationship.source_cardinality
+        fields[owner].append((held, bool(cardinality and cardinality.is_many)))
+
+    return fields, superclass, interfaces
+
+
+def _is_abstract_class(node: ClassNode) -> bool:
+    return node.kind in ('abstract class', 'abstract') or node.stereotype == 'abstract'
+
+
+def _supertypes(key: str, superclass: Dict[str, Optional[str]], interfaces: Dict[str, List[str]]) -> List[str]:
+    """Superclasses and interfaces of a class, transitively, nearest first."""
+    ancestors, queue = [], [key]
+    while queue:
+        current = queue.pop(0)
+        parents = ([superclass[current]] if current in superclass else []) + interfaces[current]
+        for parent in parents:
+            if parent != key and parent not in ancestors:
+                ancestors.append(parent)
+                queue.append(parent)
+    return ancestors
+
+
+def java_supertypes(diagram: Diagram) -> Dict[str, List[str]]:
+    """Class key -> keys of its superclasses and interfaces, transitively, nearest first."""
+    classes = diagram.classes
+    _, superclass, interfaces = _association_fields(diagram, classes)
+    return {key: _supertypes(key, superclass, interfaces) for key in classes}
+
+
+def _inherited_abstract_methods(key: str, classes: Dict[str, ClassNode],
+                                superclass: Dict[str, Optional[str]],
+                                interfaces: Dict[str, List[str]]) -> List[Method]:
+    """Interface and abstract methods a class inherits without an implementation in a superclass."""
+    # The nearest concrete superclass implements everything above it
+    covered, parent, seen = set(), superclass.get(key), {key}
+    while parent and parent not in seen:
+        if not _is_abstract_class(classes[parent]):
+            covered = {parent, *_supertypes(parent, superclass, interfaces)}
+            break
+        seen.add(parent)
+        parent = superclass.get(parent)
+
+    required, implemented = {}, set()
+    for ancestor in _supertypes(key, superclass, interfaces):
+        node = classes[ancestor]
+        for method in node.methods:
+            signature = (method.name, len(method.parameters))
+            if ancestor in covered:
+                implemented.add(signature)
+            elif node.kind == 'interface' or ('abstract' in method.modifiers and _is_abstract_class(node)):
+                required.setdefault(signature, method)
+            else:
+                implemented.add(signature)
+    return [method for signature, method in required.items() if signature not in implemented]
+
+
+def _java_parameters(method: Method, imports: set) -> str:
+    return ', '.join(
+        f"{_java_type(parameter.type, imports)} {_identifier(parameter.name)}"
+        for parameter in method.parameters
+    )
+
+
+def _default_return(return_type: str) -> Optional[str]:
+    if return_type == 'void':
+        return None
+    if return_type == 'boolean':
+        return 'false'
+    if return_type in ('int', 'long', 'short', 'byte', 'double', 'char'):
+        return '0'
+    return 'null'
+
+
+def _java_class(node: ClassNode, extends: Optional[str], implements: List[str],
+                associations: List[Tuple[str, bool]], classes: Dict[str, ClassNode],
+                imports: set, inherited: Optional[List[Method]] = None) -> List[str]:
+    """Lines of one Java type declaration; a concrete class gets stubs for the abstract methods in `inherited`."""
+    name = _identifier(node.name)
+    abstract_class = _is_abstract_class(node)
+    generic = f"<{node.generic}>" if node.generic else ''
+
+    if node.kind == 'enum':
+        constants = [_identifier(attribute.name).upper() for attribute in node.attributes]
+        lines = [f"public enum {name} {{"]
+        if constants:
+            lines.append(f"{INDENT}{', '.join(constants)}")
+        lines.append('}')
+        return lines
+
+    if node.kind == 'interface':
+        header = f"public interface {name}{generic}"
+        parents = implements + ([extends] if extends else [])
+        if parents:
+            header += ' extends ' + ', '.join(_identifier(classes[parent].name) for parent in parents)
+        lines = [header + ' {']
+        for method in node.methods:
+            return_type = _java_type(method.return_type or 'void', imports)
+            lines.append(f"{INDENT}{return_type} {_identifier(method.name)}({_java_parameters(method, imports)});")
+        lines.append('}')
+        return lines
+
+    header = f"public {'abstract ' if abstract_class else ''}class {name}{generic}"
+    if extends:
+        header += f" extends {_identifier(classes[extends].name)}"
+    if implements:
+        header += ' implements ' + ', '.join(_identifier(classes[parent].name) for parent in implements)
+    lines = [header + ' {']
+
+    fields = []
+    for attribute in node.attributes:
+        fields.append(_JavaField(
+            _identifier(attribute.name),
+            _java_type(attribute.type, imports),
+            JAVA_VISIBILITY.get(attribute.visibility, 'private') if attribute.visibility else 'private',
+            'static' in attribute.modifiers,
+            attribute.default,
+        ))
+    taken = {field.name for field in fields}
+    for referenced, many in associations:
+        type_name = _identifier(classes[referenced].name)
+        field_name = _lower_first(type_name)
+        if many:
+            field_name = _plural(field_name)
+        if field_name in taken:
+            continue
+        taken.add(field_name)
+        if many:
+            imports.update(('List', 'ArrayList'))
+            fields.append(_JavaField(field_name, f"List<{type_name}>", default='new ArrayList<>()'))
+        else:
+            fields.append(_JavaField(field_name, type_name))
+
+    for field in fields:
+        prefix = ' '.join(part for part in (field.visibility, 'static' if field.static else '') if part)
+        default = f" = {field.default}" if field.default is not None else ''
+        lines.append(f"{INDENT}{prefix} {field.type} {field.name}{default};")
+
+    # Constructors: default + one taking every instance field that is not a collection
+    instance_fields = [field for field in fields if not field.static]
+    constructor_fields = [field for field in instance_fields if field.default is None]
+    if fields:
+        lines.append('')
+    lines.append(f"{INDENT}public {name}() {{")
+    lines.append(f"{INDENT}}}")
+    if constructor_fields:
+        parameters = ', '.join(f"{field.type} {field.name}" for field in constructor_fields)
+        lines.append('')
+        lines.append(f"{INDENT}public {name}({parameters}) {{")
+        for field in constructor_fields:
+            lines.append(f"{INDENT * 2}this.{field.name} = {field.name};")
+        lines.append(f"{INDENT}}}")
+
+    # Accessors: generated for every instance field; a declared getter/setter gets the same body
+    accessors = {}
+    for field in instance_fields:
+        accessors[(('is' if field.type == 'boolean' else 'get') + _upper_first(field.name), 0)] = field
+        accessors[('set' + _upper_first(field.name), 1)] = field
+    declared = {(method.name, len(method.parameters)) for method in node.methods}
+    for (accessor, arity), field in accessors.items():
+        if (accessor, arity) in declared:
+            continue
+        lines.append('')
+        if arity == 0:
+            lines.append(f"{INDENT}public {field.type} {accessor}() {{")
+            lines.append(f"{INDENT * 2}return {field.name};")
+        else:
+            lines.append(f"{INDENT}public void {accessor}({field.type} {field.name}) {{")
+            lines.append(f"{INDENT * 2}this.{field.name} = {field.name};")
+        lines.append(f"{INDENT}}}")
+
+    for method in node.methods:
+        if _identifier(method.name) == name:
+            continue  # constructors are generated above
+        visibility = JAVA_VISIBILITY.get(method.visibility, 'public') if method.visibility else 'public'
+        modifiers = [visibility] if visibility else []
+        if 'static' in method.modifiers:
+            modifiers.append('static')
+        abstract_method = 'abstract' in method.modifiers and abstract_class
+        if abstract_method:
+            modifiers.append('abstract')
+        return_type = _java_type(method.return_type or 'void', imports)
+        parameters = _java_parameters(method, imports)
+        signature = f"{' '.join(modifiers + [return_type])} {_identifier(method.name)}({parameters})"
+        lines.append('')
+        if abstract_method:
+            lines.append(f"{INDENT}{signature};")
+            continue
+        lines.append(f"{INDENT}{signature} {{")
+        field = accessors.get((method.name, len(method.parameters)))
+        if field is not None and not method.parameters:
+            lines.append(f"{INDENT * 2}return {field.name};")
+        elif field is not None:
+            lines.append(f"{INDENT * 2}this.{field.name} = {_identifier(method.parameters[0].name)};")
+        else:
+            # Compilable stub: the default value of the return type
+            default = _default_return(return_type)
+            if default is not None:
+                lines.append(f"{INDENT * 2}return {default};")
+        lines.append(f"{INDENT}}}")
+
+    if not abstract_class:
+        for method in inherited or []:
+            if (method.name, len(method.parameters)) in declared or (method.name, len(method.parameters)) in accessors:
+                continue
+            return_type = _java_type(method.return_type or 'void', imports)
+            lines.append('')
+            lines.append(f"{INDENT}@Override")
+            lines.append(f"{INDENT}public {return_type} {_identifier(method.name)}({_java_parameters(method, imports)}) {{")
+            default = _default_return(return_type)
+            if default is not None:
+                lines.append(f"{INDENT * 2}return {default};")
+            lines.append(f"{INDENT}}}")
+
+    lines.append('}')
+    return lines
+
+
+def java_units(diagram: Diagram, names: Optional[Iterable[str]] = None) -> Dict[str, Tuple[str, List[str]]]:
+    """
+    Java source of each class, interface and enum, generated independently.
+
+    Args:
+        diagram: Parsed class diagram
+        names: Class keys to generate (all classes when omitted)
+
+    Returns:
+        Class key -> (type declaration, import lines it needs), in diagram order
+    """
+    classes = diagram.classes
+    fields, superclass, interfaces = _association_fields(diagram, classes)
+    wanted = set(names) if names is not None else None
+    units = {}
+    for key, node in classes.items():
+        if wanted is not None and key not in wanted:
+            continue
+        imports = set()
+        inherited = _inherited_abstract_methods(key, classes, superclass, interfaces)
+        body = '\n'.join(_java_class(node, superclass.get(key), interfaces[key], fields[key], classes, imports, inherited))
+        units[key] = (body, sorted(f"import {JAVA_IMPORTS[name]};" for name in imports if name in JAVA_IMPORTS))
+    return units
+
+
+def join_java_units(units: List[Tuple[str, List[str]]]) -> str:
+    """
+    Java source from (declaration, import lines) units, the shared imports
+    first. A compilation unit may only have one public top-level type, so
+    every top-level type after the first is made package-private.
+    """
+    import_lines = sorted({line for _, imports in units for line in imports})
+    parts = ['\n'.join(import_lines)] if import_lines else []
+    bodies = []
+    public_seen = False
+    for body, _ in units:
+        if public_seen:
+            body = PUBLIC_TOP_LEVEL_TYPE.sub('', body)
+        elif PUBLIC_TOP_LEVEL_TYPE.search(body):
+            public_seen = True
+            first = PUBLIC_TOP_LEVEL_TYPE.search(body).end()
+            body = body[:first] + PUBLIC_TOP_LEVEL_TYPE.sub('', body[first:])
+        bodies.append(body)
+    return '\n\n'.join(parts + bodies)
+
+
+def generate_java(diagram: Diagram) -> str:
+    """
+    Java source for every class, interface and enum of a class diagram.
+
+    Args:
+        diagram: Parsed class diagram
+
+    Returns:
+        Java source, one type declaration after another, imports first
+    """
+    return join_java_units(list(java_units(diagram).values()))
+
+
+# --------------------------------------------------------------------------
+# SQL
+# --------------------------------------------------------------------------
+
+def _sql_type(type_: Optional[str]) -> str:
+    """Map a diagram attribute type to a SQL column type, keeping explicit sizes."""
+    if not type_:
+        return 'VARCHAR(255)'
+    type_ = type_.strip()
+    sized = SQL_SIZED_TYPE.match(type_)
+    if sized:
+        return sized.group(1).upper() + re.sub(r'\s+', '', sized.group(2))
+    return SQL_TYPES.get(type_.lower(), 'VARCHAR(255)')
+
+
+def _sql_identifier(name: str) -> str:
+    return re.sub(r'\W+', '_', name.strip()).strip('_') or 'unnamed'
+
+
+def _sql_quote(name: str) -> str:
+    return f'"{name}"' if name.lower() in SQL_RESERVED else name
+
+
+def _sql_names(names: List[str]) -> str:
+    return ', '.join(_sql_quote(name) for name in names)
+
+
+class _Table:
+    __slots__ = ('name', 'columns', 'primary_key', 'foreign_keys', 'unique')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.columns = []       # (name, sql type, not null)
+        self.primary_key = []
+        self.foreign_keys = []  # (columns, referenced table, referenced columns)
+        self.unique = []        # column groups
+
+    def has_column(self, name: str) -> bool:
+        return any(column[0].lower() == name.lower() for column in self.columns)
+
+    def add_column(self, name: str, type_: str, not_null: bool = False) -> str:
+        """Add a column, prefixing the name if it is already taken; returns the name used."""
+        if self.has_column(name):
+            name = f"{self.name}_{name}"
+        self.columns.append((name, type_, not_null))
+        return name
+
+    def render(self) -> str:
+        lines = []
+        for name, type_, not_null in self.columns:
+            not_null = not_null or name in self.primary_key
+            lines.append(f"{INDENT}{_sql_quote(name)} {type_}{' NOT NULL' if not_null else ''}")
+        if self.primary_key:
+            lines.append(f"{INDENT}PRIMARY KEY ({_sql_names(self.primary_key)})")
+        for columns in self.unique:
+            lines.append(f"{INDENT}UNIQUE ({_sql_names(columns)})")
+        for columns, table, referenced in self.foreign_keys:
+            lines.append(f"{INDENT}FOREIGN KEY ({_sql_names(columns)}) REFERENCES {_sql_quote(table)}({_sql_names(referenced)})")
+        return f"CREATE TABLE {_sql_quote(self.name)} (\n" + ',\n'.join(lines) + '\n);'
+
+
+def _add_attributes(table: _Table, attributes: List[Attribute], multi_valued: List[Tuple[_Table, Attribute]]) -> None:
+    """Columns for Chen attributes: composites are flattened, multi-valued ones get their own table."""
+    for attribute in attributes:
+        if attribute.stereotype == 'derived':
+            continue
+        if attribute.children:
+            _add_attributes(table, attribute.children, multi_valued)
+            continue
+        if attribute.stereotype == 'multi':
+            multi_valued.append((table, attribute))
+            continue
+        name = table.add_column(_sql_identifier(attribute.name), _sql_type(attribute.type))
+        if attribute.stereotype == 'key':
+            table.primary_key.append(name)
+
+
+def _participants(diagram: Diagram, entities: Dict[str, Entity]) -> Dict[str, List[Tuple[str, Optional[Cardinality]]]]:
+    """Entities taking part in each Chen relationship, with the cardinality of their end."""
+    participants = {name: [] for name, node in entities.items() if node.kind == 'relationship'}
+    for relationship in diagram.relationships:
+        source, target = relationship.source, relationship.target
+        if source in participants and target in entities and target not in participants:
+            diamond, entity = source, target
+        elif target in participants and source in entities and source not in participants:
+            diamond, entity = target, source
+        else:
+            continue
+        if relationship.kind == 'link':
+            cardinality = relationship.target_cardinality
+        else:
+            # Class-style edge inside an ERD: the multiplicity written next to the entity
+            cardinality = relationship.source_cardinality if entity == source else relationship.target_cardinality
+        participants[diamond].append((entity, cardinality))
+    return participants
+
+
+def _order_tables(tables: List[_Table]) -> List[_Table]:
+    """Referenced tables before the tables pointing at them (declaration order otherwise)."""
+    by_name = {table.name: table for table in tables}
+    ordered, placed, visiting = [], set(), set()
+
+    def place(table):
+        if table.name in placed or table.name in visiting:
+            return
+        visiting.add(table.name)
+        for _, referenced, _ in table.foreign_keys:
+            if referenced in by_name and referenced != table.name:
+                place(by_name[referenced])
+        visiting.discard(table.name)
+        placed.add(table.name)
+        ordered.append(table)
+
+    for table in tables:
+        place(table)
+    return ordered
+
+
+def sql_units(diagram: Diagram) -> List[Tuple[str, str]]:
+    """
+    CREATE TABLE statements of a Chen ER diagram, each tagged with the
+    entity or relationship it comes from (see generate_sql).
+
+    Args:
+        diagram: Parsed @startchen diagram
+
+    Returns:
+        (entity or relationship name, CREATE TABLE statement), referenced
+        tables first; tables of <<multi>> attributes belong to the entity
+        or relationship whose table holds the attribute
+    """
+    entities = diagram.entities
+    tables = {}
+    owners = {}  # table name -> entity or relationship name
+    multi_valued = []
+    for name, entity in entities.items():
+        if entity.kind != 'entity':
+            continue
+        table = _Table(_sql_identifier(name))
+        _add_attributes(table, entity.attributes, multi_valued)
+        if not table.primary_key:
+            table.columns.insert(0, (f"{table.name}_id", 'INT', True))
+            table.primary_key.append(f"{table.name}_id")
+        tables[name] = table
+        owners[table.name] = name
+
+    def key_columns(table):
+        return [(column, type_) for column, type_, _ in table.columns if column in table.primary_key]
+
+    def add_foreign_key(table, referenced, not_null=False, identifying=False):
+        columns = []
+        for column, type_ in key_columns(referenced):
+            name = column if not table.has_column(column) else f"{referenced.name}_{column}"
+            columns.append(table.add_column(name, type_, not_null or identifying))
+        table.foreign_keys.append((columns, referenced.name, [column for column, _ in key_columns(referenced)]))
+        if identifying:
+            table.primary_key.extend(columns)
+        return columns
+
+    junctions = []
+    for diamond, members in _participants(diagram, entities).items():
+        members = [(entity, cardinality) for entity, cardinality in members if entity in tables]
+        relationship = entities[diamond]
+        identifying = relationship.stereotype == 'identifying'
+        if len(members) == 2:
+            (first, first_card), (second, second_card) = members
+            first_many = bool(first_card and first_card.is_many)
+            second_many = bool(second_card and second_card.is_many)
+            if first_many != second_many:
+                # One-to-many: the "many" side references the "one" side
+                child, parent = (first, second) if first_many else (second, first)
+                child_card = first_card if first_many else second_card
+                weak = identifying or entities[child].stereotype == 'weak'
+                add_foreign_key(tables[child], tables[parent], bool(child_card and child_card.total), weak)
+                _add_attributes(tables[child], relationship.attributes, multi_valued)
+                continue
+            if not first_many:
+                # One-to-one: a unique reference from the second entity
+                if entities[first].stereotype == 'weak':
+                    first, second, second_card = second, first, first_card
+                weak = identifying or entities[second].stereotype == 'weak'
+                columns = add_foreign_key(tables[second], tables[first], bool(second_card and second_card.total), weak)
+                if not weak:
+                    tables[second].unique.append(columns)
+                _add_attributes(tables[second], relationship.attributes, multi_valued)
+                continue
+        if len(members) < 2:
+            continue
+        # Many-to-many and n-ary relationships: junction table
+        junction = _Table(_sql_identifier(diamond))
+        for entity, _ in members:
+            add_foreign_key(junction, tables[entity], identifying=True)
+        _add_attributes(junction, relationship.attributes, multi_valued)
+        junctions.append(junction)
+        owners[junction.name] = diamond
+
+    for table, attribute in multi_valued:
+        values = _Table(f"{table.name}_{_sql_identifier(attribute.name)}")
+        add_foreign_key(values, table, identifying=True)
+        values.primary_key.append(values.add_column(_sql_identifier(attribute.name), _sql_type(attribute.type), True))
+        junctions.append(values)
+        owners[values.name] = owners[table.name]
+
+    ordered = _order_tables(list(tables.values()) + junctions)
+    return [(owners[table.name], table.render()) for table in ordered]
+
+
+def generate_sql(diagram: Diagram) -> str:
+    """
+    SQL DDL for a Chen ER diagram.
+
+    Entities become tables (primary key from <<key>> attributes, or a
+    synthetic <name>_id). For each relationship diamond: 1:N puts a foreign
+    key on the N side, 1:1 a unique foreign key on the second entity, and
+    M:N or n-ary relationships get a junction table. Relationship attributes
+    go where the foreign key goes.
+
+    Args:
+        diagram: Parsed @startchen diagram
+
+    Returns:
+        CREATE TABLE statements, referenced tables first
+    """
+    return '\n\n'.join(statement for _, statement in sql_units(diagram))
+
+
+# --------------------------------------------------------------------------
+# Entry point
+# --------------------------------------------------------------------------
+
+def generate_code(plantuml_code: str, diagram_type: Optional[str] = None) -> Dict:
+    """
+    Generate Java or SQL from PlantUML without an LLM.
+
+    Args:
+        plantuml_code: Class diagram or @startchen ER diagram
+        diagram_type: "Class Diagram" or "ER Diagram"; detected from the code when omitted
+
+    Returns:
+        Dict with code, language, success and, on failure, error
+    """
+    try:
+        diagram = parse_diagram(plantuml_code)
+    except Exception as e:
+        return {"code": "", "language": "unknown", "success": False, "error": f"Could not parse diagram: {e}"}
+
+    if diagram_type == "ER Diagram" or (diagram_type is None and diagram.kind == 'chen'):
+        if not any(entity.kind == 'entity' for entity in diagram.entities.values()):
+            return {"code": "", "language": "sql", "success": False, "error": "No entities found in diagram"}
+        return {"code": generate_sql(diagram), "language": "sql", "success": True}
+
+    if not diagram.classes:
+        return {"code": "", "language": "java", "success": False, "error": "No classes found in diagram"}
+    return {"code": generate_java(diagram), "language": "java", "success": True}
@@ -1,9 +1,11 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, Response
 from flask_cors import CORS, cross_origin
 import replicate
 import os
 import sys
 import json
+import threading
+import time
 from plantuml import PlantUML
 from dotenv import load_dotenv
 import pathlib
@@ -20,6 +22,65 @@ from summarizer import summarize_transcript
 from transcriber import transcribe_audio
 from diagram_selector.diagram_classifier import analyze_meeting
 
+sys.path.append(os.path.join(os.path.dirname(__file__), 'meeting_to_diagram'))
+from result_cache import DiagramResultCache
+from speculative_store import SpeculativeGenerationStore
+from render_cache import RenderCache
+
+# Generated diagrams keyed by meeting content + diagram type (see /generate)
+result_cache = DiagramResultCache(
+  max_entries=int(os.getenv("DIAGRAM_CACHE_MAX_ENTRIES", "128")),
+  ttl_seconds=float(os.getenv("DIAGRAM_CACHE_TTL_SECONDS", "3600"))
+)
+
+# Generated Java/SQL per class or table for each diagram, so /regenerate-code
+# after an edit only generates the units whose part of the diagram changed
+code_unit_store = DiagramResultCache(
+  max_entries=int(os.getenv("CODE_UNIT_STORE_MAX_ENTRIES", "256")),
+  ttl_seconds=float(os.getenv("CODE_UNIT_STORE_TTL_SECONDS", "3600"))
+)
+
+# Background generation started right after /upload (opt-in, see /generate)
+speculative_store = None
+if os.getenv("SPECULATIVE_GENERATION", "false").lower() in ("1", "true", "yes"):
+  speculative_store = SpeculativeGenerationStore(
+    max_workers=int(os.getenv("SPECULATIVE_MAX_WORKERS", "3")),
+    ttl_seconds=float(os.getenv("SPECULATIVE_TTL_SECONDS", "1800"))
+  )
+
+# Diagram rendering: "local" renders SVG in-process through SVGConverter (JPype +
+# the local PlantUML JAR) and returns it inline; "url" returns plantuml.com links.
+# When local rendering fails, PLANTUML_RENDER_FALLBACK=url falls back to a link.
+RENDER_MODE = os.getenv("PLANTUML_RENDER_MODE", "local").lower()
+RENDER_FALLBACK = os.getenv("PLANTUML_RENDER_FALLBACK", "url").lower()
+PLANTUML_SERVER_URL = os.getenv("PLANTUML_SERVER_URL", "http://www.plantuml.com/plantuml/img/")
+
+_svg_converter = None
+_svg_converter_lock = threading.Lock()
+
+# PLANTUML_RENDER_WORKERS > 0 renders in that many worker processes (one warm
+# JVM each) instead of in the Flask process, so rendering scales across cores
+RENDER_WORKERS = int(os.getenv("PLANTUML_RENDER_WORKERS", "0"))
+_render_pool = None
+RENDER_BATCH_MAX = int(os.getenv("PLANTUML_RENDER_BATCH_MAX", "20"))
+
+# Validate generated PlantUML with the local engine's parser; its line-numbered
+# errors drive AI revisions, and code it accepts skips the improvement pass
+RENDERER_VALIDATION = os.getenv(
+  "PLANTUML_RENDERER_VALIDATION", "true" if RENDER_MODE == "local" else "false"
+).lower() in ("1", "true", "yes")
+
+# Rendered SVGs keyed by normalized source + format + PlantUML version
+render_cache = RenderCache(
+  max_memory_bytes=int(float(os.getenv("PLANTUML_RENDER_CACHE_MB", "64")) * 1024 * 1024),
+  disk_dir=os.getenv("PLANTUML_RENDER_CACHE_DIR") or None,
+  max_disk_bytes=int(float(os.getenv("PLANTUML_RENDER_CACHE_DISK_MB", "256")) * 1024 * 1024)
+)
+
+# Live-preview sessions for the PlantUML editor (see /preview/*)
+preview_channel = None
+_preview_channel_lock = threading.Lock()
+
 meeting = None
 app = Flask(__name__)
 # Development wildcard CORS - allows all origins (easiest for dev)
@@ -30,6 +91,343 @@ CORS(app, origins="*", allow_headers="*", methods="*")
 def index():
   return render_template("index.html")
 
+
+def _get_svg_converter():
+  """Return the shared SVGConverter (JPype can only start one JVM per process)."""
+  global _svg_converter
+  with _svg_converter_lock:
+    if _svg_converter is None:
+      from svg_converter import SVGConverter
+      _svg_converter = SVGConverter()
+    return _svg_converter
+
+
+def _get_render_pool():
+  """Return the shared render worker pool, starting it on first use."""
+  global _render_pool
+  with _svg_converter_lock:
+    if _render_pool is None:
+      from render_pool import RenderWorkerPool
+      _render_pool = RenderWorkerPool(
+        num_workers=RENDER_WORKERS,
+        job_timeout=float(os.getenv("PLANTUML_RENDER_TIMEOUT", "30"))
+      )
+      _render_pool.start()
+    return _render_pool
+
+
+def _use_render_pool():
+  """Whether local renders go to the worker pool; once every worker failed they run in-process."""
+  return RENDER_WORKERS > 0 and _get_render_pool().available()
+
+
+def _check_syntax(plantuml_code):
+  """Parse PlantUML with the local engine (pool worker or in-process JVM)."""
+  if _use_render_pool():
+    return _get_render_pool().check_syntax(plantuml_code)
+  return _get_svg_converter().check_syntax(plantuml_code)
+
+
+def _new_plantuml_generator():
+  """Create a PlantUML generator, wired to the renderer-backed syntax check if enabled."""
+  from plantuml_generator import GranitePlantUMLGenerator
+  return GranitePlantUMLGenerator(syntax_checker=_check_syntax if RENDERER_VALIDATION else None)
+
+
+def _export_diagram(plantuml_code, output_format):
+  """Render PlantUML to SVG, PNG or PDF bytes through the render cache.
+  
+  Returns a dict with success, data, content_type, etag (the render cache key
+  for this format), cache_hit and errors.
+  """
+  from svg_converter import PLANTUML_VERSION, EXPORT_FORMATS
+  output_format = output_format.lower()
+  if output_format not in EXPORT_FORMATS:
+    return {"success": False, "errors": [f"Unsupported format '{output_format}', use one of: {', '.join(EXPORT_FORMATS)}"]}
+  
+  cache_key = RenderCache.make_key(plantuml_code, output_format, PLANTUML_VERSION)
+  exported = {"success": True, "data": None, "content_type": EXPORT_FORMATS[output_format],
+              "etag": cache_key, "cache_hit": False, "errors": []}
+  
+  cached = render_cache.get(cache_key)
+  if cached is not None:
+    exported["data"] = cached
+    exported["cache_hit"] = True
+    return exported
+  
+  if _use_render_pool():
+    result = _get_render_pool().export(plantuml_code, output_format)
+  else:
+    result = _get_svg_converter().export(plantuml_code, output_format)
+  if not result["success"]:
+    return {"success": False, "errors": result.get("errors", [])}
+  
+  render_cache.set(cache_key, result["data"])
+  exported["data"] = result["data"]
+  return exported
+
+
+def _render_svgs_locally(sources):
+  """Render a batch in one round trip, through the worker pool if configured."""
+  if _use_render_pool():
+    return _get_render_pool().render_batch(sources)
+  return _get_svg_converter().convert_batch(sources)
+
+
+def _render_diagram(plantuml_code):
+  """Render one PlantUML diagram according to PLANTUML_RENDER_MODE.
+  
+  Returns a dict with svg_content (inline SVG from local rendering), svg_etag
+  (its render cache key, servable from /diagram/<etag>.svg), svg_file
+  (plantuml.com URL), render_mode ("local", "url" or None if rendering failed),
+  render_ms, queue_wait_ms (time waiting for a pool worker), cache_hit and errors.
+  """
+  return _render_diagrams([plantuml_code])[0]
+
+
+def _render_diagrams(sources):
+  """Render several PlantUML diagrams, sending all cache misses in one batch.
+  
+  Returns one dict per source, in order, shaped like _render_diagram's result.
+  """
+  renders = [{
+    "svg_content": None,
+    "svg_etag": None,
+    "svg_file": None,
+    "render_mode": None,
+    "render_ms": None,
+    "queue_wait_ms": None,
+    "cache_hit": False,
+    "errors": []
+  } for _ in sources]
+  
+  if RENDER_MODE == "local":
+    start = time.perf_counter()
+    misses = []
+    try:
+      from svg_converter import PLANTUML_VERSION
+      for i, plantuml_code in enumerate(sources):
+        renders[i]["svg_etag"] = RenderCache.make_key(plantuml_code, "svg", PLANTUML_VERSION)
+        cached_svg = render_cache.get(renders[i]["svg_etag"])
+        if cached_svg is not None:
+          renders[i]["svg_content"] = cached_svg.decode("utf-8")
+          renders[i]["render_mode"] = "local"
+          renders[i]["cache_hit"] = True
+        else:
+          misses.append(i)
+      
+      if misses:
+        results = _render_svgs_locally([sources[i] for i in misses])
+      else:
+        results = []
+    except Exception as e:
+      misses = [i for i in range(len(sources)) if not renders[i]["cache_hit"]]
+      results = [{"success": False, "errors": [f"Local renderer unavailable: {e}"]} for _ in misses]
+    
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    for i, svg_result in zip(misses, results):
+      rendered = renders[i]
+      rendered["queue_wait_ms"] = svg_result.get("queue_wait_ms")
+      rendered["render_ms"] = svg_result.get("render_ms")
+      if rendered["render_ms"] is None:
+        rendered["render_ms"] = elapsed_ms
+      
+      if svg_result["success"]:
+        render_cache.set(rendered["svg_etag"], svg_result["svg_content"].encode("utf-8"))
+        rendered["svg_content"] = svg_result["svg_content"]
+        rendered["render_mode"] = "local"
+        continue
+      
+      rendered["svg_etag"] = None
+      rendered["errors"] = svg_result.get("errors", [])
+      print(f"⚠️ Local rendering failed: {'; '.join(rendered['errors'])}")
+    for i in range(len(sources)):
+      if renders[i]["render_ms"] is None:
+        renders[i]["render_ms"] = 0.0 if renders[i]["cache_hit"] else elapsed_ms
+    
+    if RENDER_FALLBACK != "url":
+      return renders
+  
+  server = PlantUML(url=PLANTUML_SERVER_URL)
+  for plantuml_code, rendered in zip(sources, renders):
+    if not rendered["render_mode"]:
+      rendered["svg_file"] = server.get_url(plantuml_code)
+      rendered["render_mode"] = "url"
+  return renders
+
+
+def _preview_render(plantuml_code):
+  """Render for the live preview; returns the fields the editor needs."""
+  rendered = _render_diagram(plantuml_code)
+  return {
+    "success": rendered["render_mode"] is not None,
+    "svg_content": rendered["svg_content"],
+    "svg_etag": rendered["svg_etag"],
+    "svg_file": rendered["svg_file"],
+    "render_mode": rendered["render_mode"],
+    "errors": rendered["errors"]
+  }
+
+
+def _get_preview_channel():
+  """Return the live-preview channel, creating it on first use."""
+  global preview_channel
+  with _preview_channel_lock:
+    if preview_channel is None:
+      from preview_channel import PreviewChannel
+      preview_channel = PreviewChannel(
+        _preview_render,
+        debounce_seconds=float(os.getenv("PREVIEW_DEBOUNCE_MS", "300")) / 1000,
+        max_workers=int(os.getenv("PREVIEW_MAX_RENDERS", "2"))
+      )
+    return preview_channel
+
+
+def _load_code_generator():
+  """Load the real code generator, or return None if it is not available."""
+  import importlib.util
+  try:
+    spec = importlib.util.spec_from_file_location("granite_diagram_to_code", os.path.join(os.path.dirname(__file__), 'diagram_to_code', 'granite_diagram_to_code.py'))
+    granite_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(granite_module)
+    GraniteCodeGenerator = granite_module.GraniteCodeGenerator
+    return GraniteCodeGenerator()
+  except Exception as e:
+    print(f"⚠️ Real code generator not available: {e}")
+    return None
+
+
+def _diagram_cache_key(meeting_data, diagram_type):
+  """Result cache key for one diagram type of a meeting."""
+  from plantuml_generator import GENERATOR_VERSION
+  return DiagramResultCache.make_key(
+    meeting_data.get("transcript", ""),
+    meeting_data.get("summary", ""),
+    meeting_data.get("keywords", []),
+    diagram_type,
+    GENERATOR_VERSION
+  )
+
+
+def _code_unit_store_key(meeting_data, diagram_id, diagram_type):
+  """code_unit_store key of a meeting's diagram, or of a client-chosen diagram id."""
+  if meeting_data:
+    return _diagram_cache_key(meeting_data, diagram_type)
+  return f"id:{diagram_id}:{diagram_type}"
+
+
+def _apply_render(diagram_result, rendered):
+  """Copy a _render_diagram result into a diagram result."""
+  diagram_type = diagram_result["diagram_type"]
+  diagram_result["svg_content"] = rendered["svg_content"]
+  diagram_result["svg_file"] = rendered["svg_file"]
+  diagram_result["svg_etag"] = rendered["svg_etag"]
+  diagram_result["generation_details"]["render_mode"] = rendered["render_mode"]
+  diagram_result["generation_details"]["render_ms"] = rendered["render_ms"]
+  diagram_result["generation_details"]["queue_wait_ms"] = rendered["queue_wait_ms"]
+  if rendered["render_mode"]:
+    print(f"✅ {diagram_type} SVG generated successfully ({rendered['render_mode']})")
+  else:
+    print(f"⚠️ SVG generation failed for {diagram_type}")
+
+
+def _generate_diagram_result(meeting_data, diagram_type, generator, code_generator, render=True):
+  """Generate PlantUML, SVG and real code for one diagram type of a meeting.
+  
+  Successful results are stored in the result cache. With render=False the
+  SVG step is skipped and the caller renders (see _render_and_cache).
+  """
+  # Create a copy of meeting data with single diagram type
+  single_diagram_meeting = meeting_data.copy()
+  single_diagram_meeting["output_diagram"] = diagram_type
+  print(f"📝 Processing diagram type: {diagram_type}")
+  print(f"📝 Single diagram meeting output_diagram: {single_diagram_meeting['output_diagram']}")
+  
+  # Generate PlantUML for this specific diagram type
+  result = generator.generate_from_meeting(
+    single_diagram_meeting
+  )
+  
+  diagram_result = {
+    "diagram_type": diagram_type,
+    "plantuml_code": "",
+    "plantuml_status": "failed",
+    "svg_content": None,
+    "svg_etag": None,
+    "svg_file": None,
+    "real_code": None,
+    "real_code_language": None,
+    "generation_details": {
+    "success": result.get("success", False),
+    "is_valid": result.get("is_valid", False),
+    "status_message": result.get("status_message", "Unknown error"),
+    "validation_errors": result.get("validation_errors", []),
+    "validation_findings": result.get("validation_findings", []),
+    "revision_attempts": result.get("revision_attempts", 0)
+    }
+  }
+  
+  if result['success']:
+    diagram_result["plantuml_code"] = result['plantuml_code']
+    diagram_result["plantuml_status"] = "success"
+    print(f"✅ {diagram_type} PlantUML generated successfully")
+    print(result['plantuml_code'])
+    
+    # 5. Generate SVG for this diagram
+    if render and result['plantuml_code']:
+      print(f"🖼️ Generating SVG for {diagram_type}...")
+      try:
+        _apply_render(diagram_result, _render_diagram(result['plantuml_code']))
+      except Exception as e:
+        print(f"⚠️ SVG generation failed for {diagram_type}: {e}")
+        diagram_result["svg_file"] = None
+    
+    # 6. Generate Real Code (if applicable)
+    code_supported_types = ["Class Diagram", "ER Diagram"]
+    if diagram_type in code_supported_types and code_generator and result['plantuml_code']:
+      print(f"🔧 Generating {diagram_type} real code...")
+      try:
+        code_result = code_generator.generate_incremental(
+          result['plantuml_code'], diagram_type, code_unit_store, _diagram_cache_key(meeting_data, diagram_type)
+        )
+        
+        if code_result["success"]:
+          diagram_result["real_code"] = code_result["code"]
+          diagram_result["real_code_language"] = code_result["language"]
+          print(f"✅ {diagram_result['real_code_language'].upper()} code generated for {diagram_type}")
+        else:
+          print(f"⚠️ Real code generation failed for {diagram_type}: {code_result.get('error', 'Unknown error')}")
+      except Exception as e:
+        print(f"⚠️ Error during real code generation for {diagram_type}: {e}")
+    
+    if render:
+      result_cache.set(_diagram_cache_key(meeting_data, diagram_type), diagram_result)
+  
+  else:
+    print(f"⚠️ {diagram_type} generation failed: {result.get('status_message', 'Unknown error')}")
+  
+  return diagram_result
+
+
+def _render_and_cache(meeting_data, diagram_results):
+  """Render freshly generated diagrams in one batch, then cache the results."""
+  pending = [d for d in diagram_results if d["plantuml_code"]]
+  if pending:
+    print(f"🖼️ Generating SVGs for {', '.join(d['diagram_type'] for d in pending)} in one batch...")
+    try:
+      for diagram_result, rendered in zip(pending, _render_diagrams([d["plantuml_code"] for d in pending])):
+        _apply_render(diagram_result, rendered)
+    except Exception as e:
+      print(f"⚠️ SVG generation failed: {e}")
+  for diagram_result in diagram_results:
+    result_cache.set(_diagram_cache_key(meeting_data, diagram_result["diagram_type"]), diagram_result)
+
+
+def _speculative_generate(meeting_data, diagram_type):
+  """Background job: generate one diagram with its own generator instances."""
+  return _generate_diagram_result(meeting_data, diagram_type, _new_plantuml_generator(), _load_code_generator())
+
+
 @app.route("/upload", methods=["POST"])
 @cross_origin()
 def upload():
@@ -46,16 +444,33 @@ def upload():
     meeting_data = analyze_meeting(transcript_text)
     print(f"✅ Meeting analyzed - Suggested diagrams: {', '.join(meeting_data.get('output_diagram', []))}")
 
-    # 4. Generate PlantUML Code for All Suggested Diagrams
-    
-    return jsonify({
+    response_data = {
       "success": True,
+      "id": meeting_data['id'],
       "transcript": transcript_text,
       "summary": summary_text,
       "title": meeting_data['title'],
       "output_diagram": meeting_data['output_diagram'],
       "keywords": meeting_data['keywords']
-    }), 200
+    }
+
+    # 4. Optionally start generating the suggested diagrams before /generate is called
+    if speculative_store and response_data["output_diagram"]:
+      diagram_types = response_data["output_diagram"]
+      if not isinstance(diagram_types, list):
+        diagram_types = [diagram_types]
+      try:
+        content_keys = {dt: _diagram_cache_key(response_data, dt) for dt in diagram_types}
+        speculative_store.start(
+          response_data["id"],
+          diagram_types,
+          content_keys,
+          lambda dt: _speculative_generate(dict(response_data), dt)
+        )
+      except ImportError as e:
+        print(f"⚠️ Speculative generation not available: {e}")
+    
+    return jsonify(response_data), 200
 
 
 
@@ -65,6 +480,7 @@ def generate():
 
     meeting_json = request.form.get("meeting")
     meeting_data = json.loads(meeting_json)
+    use_cache = request.form.get("use_cache", "true").lower() != "false"
     print("🛠️ Step 4: Generating PlantUML code for all suggested diagrams...")
     # Get all suggested diagram types
     diagram_types = meeting_data.get("output_diagram", [])
@@ -78,102 +494,53 @@ def generate():
     try:
       # Add paths for meeting_to_diagram components
       sys.path.append(os.path.join(os.path.dirname(__file__), 'meeting_to_diagram'))
-      from plantuml_generator import GranitePlantUMLGenerator
       
       # Initialize PlantUML generator
-      generator = GranitePlantUMLGenerator()
-      
-      # Initialize SVG converter (do this once)
-      sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'meeting_to_diagram'))
-      from svg_converter import SVGConverter
-      svg_converter = SVGConverter()
+      generator = _new_plantuml_generator()
       
       # Initialize real code generator (do this once)
-      import importlib.util
-      code_generator = None
-      try:
-        spec = importlib.util.spec_from_file_location("granite_diagram_to_code", os.path.join(os.path.dirname(__file__), 'diagram_to_code', 'granite_diagram_to_code.py'))
-        granite_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(granite_module)
-        GraniteCodeGenerator = granite_module.GraniteCodeGenerator
-        code_generator = GraniteCodeGenerator()
-      except Exception as e:
-        print(f"⚠️ Real code generator not available: {e}")
+      code_generator = _load_code_generator()
+      
+      # Fresh diagrams are rendered together after the loop
+      to_render = []
       
       # Generate diagrams for each type
       for i, diagram_type in enumerate(diagram_types):
         print(f"\n🎯 Generating {diagram_type} ({i+1}/{len(diagram_types)})...")
+        cache_key = _diagram_cache_key(meeting_data, diagram_type)
+        diagram_result = None
         
-        # Create a copy of meeting data with single diagram type
-        single_diagram_meeting = meeting_data.copy()
-        single_diagram_meeting["output_diagram"] = diagram_type
-        print(f"📝 Processing diagram type: {diagram_type}")
-        print(f"📝 Single diagram meeting output_diagram: {single_diagram_meeting['output_diagram']}")
-        
-        # Generate PlantUML for this specific diagram type
-        result = generator.generate_from_meeting(
-          single_diagram_meeting
-        )
-        
-        diagram_result = {
-          "diagram_type": diagram_type,
-          "plantuml_code": "",
-          "plantuml_status": "failed",
-          "svg_content": None,
-          "svg_file": None,
-          "real_code": None,
-          "real_code_language": None,
-          "generation_details": {
-          "success": result.get("success", False),
-          "is_valid": result.get("is_valid", False),
-          "status_message": result.get("status_message", "Unknown error"),
-          "validation_errors": result.get("validation_errors", []),
-          "revision_attempts": result.get("revision_attempts", 0)
-          }
-        }
-        
-        if result['success']:
-          diagram_result["plantuml_code"] = result['plantuml_code']
-          diagram_result["plantuml_status"] = "success"
-          print(f"✅ {diagram_type} PlantUML generated successfully")
-          print(result['plantuml_code'])
-          
-          # 5. Generate SVG for this diagram
-          if result['plantuml_code']:
-            print(f"🖼️ Generating SVG for {diagram_type}...")
-            try:
-              server = PlantUML(url="http://www.plantuml.com/plantuml/img/")
-              svg_url = server.get_url(result['plantuml_code'])
-              print("SVG URL:", svg_url)
-              diagram_result["svg_file"] = svg_url
-              print(f"✅ {diagram_type} SVG generated successfully")
-            except Exception as e:
-              print(f"⚠️ SVG generation failed for {diagram_type}: {e}")
-              diagram_result["svg_file"] = None
-          
-          # 6. Generate Real Code (if applicable)
-          code_supported_types = ["Class Diagram", "ER Diagram"]
-          if diagram_type in code_supported_types and code_generator and result['plantuml_code']:
-            print(f"🔧 Generating {diagram_type} real code...")
+        # Attach to speculative work started by /upload, if any
+        if speculative_store and use_cache:
+          future = speculative_store.claim(meeting_data.get("id"), diagram_type, cache_key)
+          if future is not None:
+            print(f"🔮 Attaching to speculative generation for {diagram_type}")
             try:
-              code_result = code_generator.generate_real_code_from_plantuml(result['plantuml_code'], diagram_type)
-              
-              if code_result["success"]:
-                diagram_result["real_code"] = code_result["code"]
-                diagram_result["real_code_language"] = code_result["language"]
-                print(f"✅ {diagram_result['real_code_language'].upper()} code generated for {diagram_type}")
-              else:
-                print(f"⚠️ Real code generation failed for {diagram_type}: {code_result.get('error', 'Unknown error')}")
+              diagram_result = future.result()
+              diagram_result["generation_details"]["speculative"] = True
             except Exception as e:
-              print(f"⚠️ Error during real code generation for {diagram_type}: {e}")
+              print(f"⚠️ Speculative generation failed for {diagram_type}: {e}")
         
-        else:
-          print(f"⚠️ {diagram_type} generation failed: {result.get('status_message', 'Unknown error')}")
+        # Reuse a previous result for the same meeting content and diagram type
+        if diagram_result is None and use_cache:
+          diagram_result = result_cache.get(cache_key)
+          if diagram_result:
+            print(f"⚡ Using cached result for {diagram_type}")
+            diagram_result["generation_details"]["cached"] = True
+        
+        if diagram_result is None:
+          diagram_result = _generate_diagram_result(meeting_data, diagram_type, generator, code_generator, render=False)
+          if diagram_result["plantuml_status"] == "success":
+            to_render.append(diagram_result)
+        
+        if diagram_result["plantuml_status"] != "success":
           overall_status = "partial"
         
         # Add this diagram result to the collection
         all_diagrams.append(diagram_result)
       
+      _render_and_cache(meeting_data, to_render)
+      
       print(f"\n🎯 All diagrams processed! Generated {len([d for d in all_diagrams if d['plantuml_status'] == 'success'])}/{len(diagram_types)} successfully")
 
     except ImportError as e:
@@ -198,7 +565,7 @@ def generate():
       response_data["plantuml_status"] = first_diagram["plantuml_status"]
       
       # Add SVG data if available
-      if first_diagram.get("svg_content"):
+      if first_diagram.get("svg_content") or first_diagram.get("svg_file"):
         response_data["svg_content"] = first_diagram["svg_content"]
         response_data["svg_file"] = first_diagram["svg_file"]
       
@@ -214,6 +581,203 @@ def generate():
     return jsonify(response_data)
 
 
+@app.route("/speculative-stats", methods=["GET"])
+@cross_origin()
+def speculative_stats():
+    """Report started, claimed and wasted speculative generations"""
+    if not speculative_store:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **speculative_store.stats()})
+
+@app.route("/diagram/<etag>.<fmt>", methods=["GET"])
+@cross_origin()
+def cached_diagram(etag, fmt):
+    """Serve a rendered diagram (SVG, or PNG/PDF from /export) from the render cache by its content address"""
+    from svg_converter import EXPORT_FORMATS
+    if fmt.lower() not in EXPORT_FORMATS:
+        return jsonify({"success": False, "error": f"Unsupported format '{fmt}'"}), 404
+    if RenderCache.key_format(etag) != fmt.lower():
+        # The key was rendered for another format; never serve it under this one
+        return jsonify({"success": False, "error": f"Diagram not found in render cache as {fmt}"}), 404
+    
+    if request.if_none_match.contains(etag) and render_cache.contains(etag):
+        return Response(status=304, headers={"ETag": f'"{etag}"'})
+    
+    data = render_cache.get(etag)
+    if data is None:
+        return jsonify({"success": False, "error": "Diagram not found in render cache"}), 404
+    
+    response = Response(data, mimetype=EXPORT_FORMATS[fmt.lower()])
+    response.set_etag(etag)
+    # Content-addressed: the bytes behind a key never change
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
+@app.route("/export", methods=["POST"])
+@cross_origin()
+def export_diagram():
+    """Render a diagram to SVG, PNG or PDF on demand and return the file.
+    
+    Expects {"plantuml_code": ..., "format": "svg" | "png" | "pdf",
+    "diagram_type": ...}. Each format is cached separately; the ETag can be
+    reused with /diagram/<etag>.<format> or If-None-Match.
+    """
+    try:
+        data = request.get_json() or {}
+        plantuml_code = data.get('plantuml_code')
+        output_format = (data.get('format') or 'svg').lower()
+        diagram_type = data.get('diagram_type') or 'diagram'
+        
+        if not plantuml_code:
+            return jsonify({"success": False, "error": "PlantUML code is required"}), 400
+        
+        exported = _export_diagram(plantuml_code, output_format)
+        if not exported["success"]:
+            status = 400 if any(e.startswith("Unsupported format") for e in exported["errors"]) else 500
+            return jsonify({"success": False, "error": "; ".join(exported["errors"])}), status
+        
+        if request.if_none_match.contains(exported["etag"]):
+            return Response(status=304, headers={"ETag": f'"{exported["etag"]}"'})
+        
+        filename = "_".join(diagram_type.lower().split()) + "." + output_format
+        response = Response(exported["data"], mimetype=exported["content_type"])
+        response.headers["Content-Length"] = str(len(exported["data"]))
+        response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+        response.headers["X-Render-Cache"] = "hit" if exported["cache_hit"] else "miss"
+        response.set_etag(exported["etag"])
+        return response
+        
+    except Exception as e:
+        print(f"Error exporting diagram: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@app.route("/export-zip", methods=["POST"])
+@cross_origin()
+def export_zip():
+    """Stream a ZIP of all artifacts for a meeting.
+    
+    Expects {"meeting": {...}, "diagrams": [...]} with the diagram results from
+    /generate. Without "diagrams", results are looked up in the result cache.
+    The archive is written incrementally while the SVGs render in parallel.
+    """
+    try:
+        data = request.get_json() or {}
+        meeting_data = data.get('meeting')
+        diagrams = data.get('diagrams')
+        
+        if not meeting_data:
+            return jsonify({"success": False, "error": "Meeting data is required"}), 400
+        
+        if not diagrams:
+            diagram_types = meeting_data.get("output_diagram", [])
+            if not isinstance(diagram_types, list):
+                diagram_types = [diagram_types]
+            diagrams = [d for d in (result_cache.get(_diagram_cache_key(meeting_data, dt)) for dt in diagram_types) if d]
+        if not any(d.get("plantuml_code") for d in diagrams):
+            return jsonify({"success": False, "error": "No generated diagrams to export"}), 404
+        
+        from artifact_export import stream_artifact_zip, archive_name
+        chunks = stream_artifact_zip(
+            meeting_data,
+            diagrams,
+            lambda code: _export_diagram(code, "svg"),
+            max_workers=max(1, RENDER_WORKERS or 3)
+        )
+        
+        return Response(
+            chunks,
+            mimetype="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="{archive_name(meeting_data)}"'}
+        )
+        
+    except Exception as e:
+        print(f"Error exporting meeting artifacts: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@app.route("/preview/session", methods=["POST"])
+@cross_origin()
+def open_preview_session():
+    """Open a live-preview session for the PlantUML editor"""
+    channel = _get_preview_channel()
+    session_id = channel.open_session()
+    data = request.get_json(silent=True) or {}
+    if data.get('plantuml_code'):
+        channel.submit(session_id, data['plantuml_code'], data.get('seq'))
+    return jsonify({"success": True, "session_id": session_id})
+
+
+@app.route("/preview/<session_id>/events", methods=["GET"])
+@cross_origin()
+def preview_events(session_id):
+    """Server-Sent Events stream pushing the render of the latest revision"""
+    events = _get_preview_channel().stream(session_id)
+    if events is None:
+        return jsonify({"success": False, "error": "Unknown preview session"}), 404
+    return Response(
+        events,
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.route("/preview/<session_id>/revision", methods=["POST"])
+@cross_origin()
+def preview_revision(session_id):
+    """Accept a source revision; only the latest one after a pause is rendered"""
+    data = request.get_json() or {}
+    plantuml_code = data.get('plantuml_code')
+    if not plantuml_code:
+        return jsonify({"success": False, "error": "PlantUML code is required"}), 400
+    
+    seq = _get_preview_channel().submit(session_id, plantuml_code, data.get('seq'))
+    if seq is None:
+        return jsonify({"success": False, "error": "Unknown preview session"}), 404
+    return jsonify({"success": True, "seq": seq}), 202
+
+
+@app.route("/preview/<session_id>", methods=["DELETE"])
+@cross_origin()
+def close_preview_session(session_id):
+    """Close a live-preview session"""
+    return jsonify({"success": _get_preview_channel().close_session(session_id)})
+
+
+@app.route("/preview-stats", methods=["GET"])
+@cross_origin()
+def preview_stats():
+    """Report live-preview revisions received, renders run and revisions dropped"""
+    return jsonify(_get_preview_channel().stats())
+
+
+@app.route("/render-health", methods=["GET"])
+@cross_origin()
+def render_health():
+    """Check that the local PlantUML render paths respond"""
+    try:
+        return jsonify({"success": True, **_get_svg_converter().health_check()})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 503
+
+
+@app.route("/render-pool-stats", methods=["GET"])
+@cross_origin()
+def render_pool_stats():
+    """Report render worker pool jobs, timeouts, queue wait and render time"""
+    if RENDER_WORKERS <= 0:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **_get_render_pool().stats()})
+
+
+@app.route("/render-cache-stats", methods=["GET"])
+@cross_origin()
+def render_cache_stats():
+    """Report render cache hits, misses and tier sizes"""
+    return jsonify(render_cache.stats())
+
+
 @app.route("/regenerate-svg", methods=["POST"])
 @cross_origin()
 def regenerate_svg():
@@ -226,13 +790,18 @@ def regenerate_svg():
         if not plantuml_code:
             return jsonify({"success": False, "error": "PlantUML code is required"}), 400
             
-        # Generate SVG using PlantUML server
-        server = PlantUML(url="http://www.plantuml.com/plantuml/img/")
-        svg_url = server.get_url(plantuml_code)
+        rendered = _render_diagram(plantuml_code)
+        if not rendered["render_mode"]:
+            return jsonify({"success": False, "error": "; ".join(rendered["errors"])}), 500
         
         return jsonify({
             "success": True,
-            "svg_file": svg_url,
+            "svg_content": rendered["svg_content"],
+            "svg_etag": rendered["svg_etag"],
+            "svg_file": rendered["svg_file"],
+            "render_mode": rendered["render_mode"],
+            "render_ms": rendered["render_ms"],
+            "queue_wait_ms": rendered["queue_wait_ms"],
             "diagram_type": diagram_type
         })
         
@@ -241,10 +810,58 @@ def regenerate_svg():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@app.route("/render-batch", methods=["POST"])
+@cross_origin()
+def render_batch():
+    """Render a list of PlantUML sources in one renderer round trip.
+    
+    Expects {"sources": ["@startuml ...", "@startchen ...", ...]} and returns
+    one result per source, in order, each with its own errors.
+    """
+    try:
+        data = request.get_json() or {}
+        sources = data.get('sources')
+        
+        if not isinstance(sources, list) or not sources or not all(isinstance(s, str) and s.strip() for s in sources):
+            return jsonify({"success": False, "error": "sources must be a non-empty list of PlantUML strings"}), 400
+        if len(sources) > RENDER_BATCH_MAX:
+            return jsonify({"success": False, "error": f"At most {RENDER_BATCH_MAX} sources per batch"}), 400
+        
+        results = []
+        for i, rendered in enumerate(_render_diagrams(sources)):
+            results.append({
+                "index": i,
+                "success": rendered["render_mode"] is not None,
+                "svg_content": rendered["svg_content"],
+                "svg_etag": rendered["svg_etag"],
+                "svg_file": rendered["svg_file"],
+                "render_mode": rendered["render_mode"],
+                "render_ms": rendered["render_ms"],
+                "queue_wait_ms": rendered["queue_wait_ms"],
+                "cache_hit": rendered["cache_hit"],
+                "errors": rendered["errors"]
+            })
+        
+        succeeded = len([r for r in results if r["success"]])
+        return jsonify({
+            "success": succeeded == len(results),
+            "total": len(results),
+            "succeeded": succeeded,
+            "results": results
+        })
+        
+    except Exception as e:
+        print(f"Error rendering batch: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
 @app.route("/regenerate-diagram", methods=["POST"])
 @cross_origin()
 def regenerate_diagram():
-    """Fully regenerate diagram including PlantUML code and SVG"""
+    """Fully regenerate diagram including PlantUML code and SVG.
+    
+    Always bypasses the result cache; the fresh result replaces the cached one.
+    """
     try:
         data = request.get_json()
         meeting_data = data.get('meeting_data')
@@ -255,10 +872,9 @@ def regenerate_diagram():
         
         # Add paths for meeting_to_diagram components
         sys.path.append(os.path.join(os.path.dirname(__file__), 'meeting_to_diagram'))
-        from plantuml_generator import GranitePlantUMLGenerator
         
         # Initialize PlantUML generator
-        generator = GranitePlantUMLGenerator()
+        generator = _new_plantuml_generator()
         
         # Create meeting data for single diagram type
         single_diagram_meeting = meeting_data.copy()
@@ -271,35 +887,58 @@ def regenerate_diagram():
         
         if result['success'] and result['plantuml_code']:
             # Generate SVG
-            server = PlantUML(url="http://www.plantuml.com/plantuml/img/")
-            svg_url = server.get_url(result['plantuml_code'])
+            rendered = _render_diagram(result['plantuml_code'])
             
             # Generate real code if applicable
             real_code = None
             real_code_language = None
             code_supported_types = ["Class Diagram", "ER Diagram"]
             
-            if diagram_type in code_supported_types:
+            code_generator = _load_code_generator() if diagram_type in code_supported_types else None
+            if code_generator is not None:
                 try:
-                    import importlib.util
-                    spec = importlib.util.spec_from_file_location("granite_diagram_to_code", os.path.join(os.path.dirname(__file__), 'diagram_to_code', 'granite_diagram_to_code.py'))
-                    granite_module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(granite_module)
-                    GraniteCodeGenerator = granite_module.GraniteCodeGenerator
-                    code_generator = GraniteCodeGenerator()
-                    
-                    code_result = code_generator.generate_real_code_from_plantuml(result['plantuml_code'], diagram_type)
+                    code_result = code_generator.generate_incremental(
+                        result['plantuml_code'], diagram_type, code_unit_store, _diagram_cache_key(meeting_data, diagram_type)
+                    )
                     if code_result["success"]:
                         real_code = code_result["code"]
                         real_code_language = code_result["language"]
                 except Exception as e:
                     print(f"Error generating real code: {e}")
             
+            # Write the fresh result through so later /generate calls return it
+            result_cache.set(_diagram_cache_key(meeting_data, diagram_type), {
+                "diagram_type": diagram_type,
+                "plantuml_code": result['plantuml_code'],
+                "plantuml_status": "success",
+                "svg_content": rendered["svg_content"],
+                "svg_etag": rendered["svg_etag"],
+                "svg_file": rendered["svg_file"],
+                "real_code": real_code,
+                "real_code_language": real_code_language,
+                "generation_details": {
+                    "success": result.get("success", False),
+                    "is_valid": result.get("is_valid", False),
+                    "status_message": result.get("status_message", "Unknown error"),
+                    "validation_errors": result.get("validation_errors", []),
+                    "validation_findings": result.get("validation_findings", []),
+                    "revision_attempts": result.get("revision_attempts", 0),
+                    "render_mode": rendered["render_mode"],
+                    "render_ms": rendered["render_ms"],
+                    "queue_wait_ms": rendered["queue_wait_ms"]
+                }
+            })
+            
             return jsonify({
                 "success": True,
                 "diagram_type": diagram_type,
                 "plantuml_code": result['plantuml_code'],
-                "svg_file": svg_url,
+                "svg_content": rendered["svg_content"],
+                "svg_etag": rendered["svg_etag"],
+                "svg_file": rendered["svg_file"],
+                "render_mode": rendered["render_mode"],
+                "render_ms": rendered["render_ms"],
+                "queue_wait_ms": rendered["queue_wait_ms"],
                 "real_code": real_code,
                 "real_code_language": real_code_language
             })
@@ -314,6 +953,159 @@ def regenerate_diagram():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@app.route("/regenerate-code", methods=["POST"])
+@cross_origin()
+def regenerate_code():
+    """Regenerate Java/SQL for an edited diagram.
+    
+    Expects {"plantuml_code", "diagram_type", "meeting_data"} (or a
+    client-chosen "diagram_id" instead of meeting_data). Only the classes or
+    tables whose part of the diagram changed since the last generation for
+    the same meeting and diagram type are generated again; "units" lists the
+    reused, regenerated and removed ones.
+    """
+    try:
+        data = request.get_json() or {}
+        plantuml_code = data.get('plantuml_code')
+        diagram_type = data.get('diagram_type')
+        meeting_data = data.get('meeting_data')
+        diagram_id = data.get('diagram_id')
+        
+        if not plantuml_code or not diagram_type:
+            return jsonify({"success": False, "error": "PlantUML code and diagram type are required"}), 400
+        if not meeting_data and not diagram_id:
+            return jsonify({"success": False, "error": "Either meeting_data or diagram_id is required"}), 400
+        if diagram_type not in ["Class Diagram", "ER Diagram"]:
+            return jsonify({"success": False, "error": f"Code generation is not supported for {diagram_type}"}), 400
+        
+        code_generator = _load_code_generator()
+        if code_generator is None:
+            return jsonify({"success": False, "error": "Real code generator not available"}), 500
+        
+        store_key = _code_unit_store_key(meeting_data, diagram_id, diagram_type)
+        start = time.perf_counter()
+        code_result = code_generator.generate_incremental(plantuml_code, diagram_type, code_unit_store, store_key)
+        generation_ms = round((time.perf_counter() - start) * 1000, 1)
+        
+        if not code_result["success"]:
+            return jsonify({"success": False, "error": code_result.get("error", "Code generation failed")}), 500
+        
+        return jsonify({
+            "success": True,
+            "diagram_type": diagram_type,
+            "real_code": code_result["code"],
+            "real_code_language": code_result["language"],
+            "generator": code_result.get("generator"),
+            "units": code_result.get("units"),
+            "generation_ms": generation_ms
+        })
+        
+    except Exception as e:
+        print(f"Error regenerating code: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@app.route("/generate-code/stream", methods=["POST"])
+@cross_origin()
+def stream_code():
+    """Server-Sent Events stream of Java/SQL as it is generated.
+
+    Expects {"plantuml_code", "diagram_type"} and optionally "meeting_data"
+    or "diagram_id" (as for /regenerate-code): the generated units are then
+    stored so a later /regenerate-code only redoes what an edit changed.
+    Events: "language" as soon as the language is known, "chunk" with code
+    text to append, "replace" when enrichment rewrote the code shown so far,
+    then "done" with the full result or "error".
+    """
+    data = request.get_json() or {}
+    plantuml_code = data.get('plantuml_code')
+    diagram_type = data.get('diagram_type')
+    meeting_data = data.get('meeting_data')
+    diagram_id = data.get('diagram_id')
+
+    if not plantuml_code or not diagram_type:
+        return jsonify({"success": False, "error": "PlantUML code and diagram type are required"}), 400
+    if diagram_type not in ["Class Diagram", "ER Diagram"]:
+        return jsonify({"success": False, "error": f"Code generation is not supported for {diagram_type}"}), 400
+
+    code_generator = _load_code_generator()
+    if code_generator is None:
+        return jsonify({"success": False, "error": "Real code generator not available"}), 500
+
+    store, store_key = None, None
+    if meeting_data or diagram_id:
+        store, store_key = code_unit_store, _code_unit_store_key(meeting_data, diagram_id, diagram_type)
+
+    def events():
+        try:
+            for event in code_generator.stream_real_code_from_plantuml(plantuml_code, diagram_type, store, store_key):
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            print(f"Error streaming code: {e}")
+            yield f"event: error\ndata: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.route("/edit-diagram", methods=["POST"])
+@cross_origin()
+def edit_diagram():
+    """Apply a small change to an existing diagram instead of regenerating it"""
+    try:
+        data = request.get_json()
+        plantuml_code = data.get('plantuml_code')
+        diagram_type = data.get('diagram_type')
+        change_request = data.get('change_request')
+        edited_code = data.get('edited_code')
+        
+        if not plantuml_code or not diagram_type:
+            return jsonify({"success": False, "error": "PlantUML code and diagram type are required"}), 400
+        if not change_request and not edited_code:
+            return jsonify({"success": False, "error": "Either change_request or edited_code is required"}), 400
+        
+        # Add paths for meeting_to_diagram components
+        sys.path.append(os.path.join(os.path.dirname(__file__), 'meeting_to_diagram'))
+        
+        generator = _new_plantuml_generator()
+        result = generator.edit_plantuml(
+            plantuml_code,
+            diagram_type,
+            change_request=change_request,
+            edited_code=edited_code
+        )
+        
+        if not result['plantuml_code']:
+            return jsonify({"success": False, "error": result['status_message']}), 500
+        
+        # Generate SVG
+        rendered = _render_diagram(result['plantuml_code'])
+        
+        return jsonify({
+            "success": result['success'],
+            "diagram_type": diagram_type,
+            "plantuml_code": result['plantuml_code'],
+            "svg_content": rendered["svg_content"],
+            "svg_etag": rendered["svg_etag"],
+            "svg_file": rendered["svg_file"],
+            "render_mode": rendered["render_mode"],
+            "render_ms": rendered["render_ms"],
+            "queue_wait_ms": rendered["queue_wait_ms"],
+            "status_message": result['status_message'],
+            "validation_errors": result['validation_errors'],
+            "validation_findings": result['validation_findings'],
+            "changed_lines": result['changed_lines'],
+            "ai_calls": result['ai_calls']
+        })
+        
+    except Exception as e:
+        print(f"Error editing diagram: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
 @app.route("/update-plantuml", methods=["POST"])
 @cross_origin()
 def update_plantuml():
@@ -340,13 +1132,18 @@ def update_plantuml():
                 "error": "Invalid PlantUML code: must start with @start... and end with @end... tags"
             }), 400
         
-        # Generate SVG using PlantUML server
-        server = PlantUML(url="http://www.plantuml.com/plantuml/img/")
-        svg_url = server.get_url(plantuml_code)
+        rendered = _render_diagram(plantuml_code)
+        if not rendered["render_mode"]:
+            return jsonify({"success": False, "error": "; ".join(rendered["errors"])}), 500
         
         return jsonify({
             "success": True,
-            "svg_file": svg_url,
+            "svg_content": rendered["svg_content"],
+            "svg_etag": rendered["svg_etag"],
+            "svg_file": rendered["svg_file"],
+            "render_mode": rendered["render_mode"],
+            "render_ms": rendered["render_ms"],
+            "queue_wait_ms": rendered["queue_wait_ms"],
             "plantuml_code": plantuml_code,
             "diagram_type": diagram_type
         })
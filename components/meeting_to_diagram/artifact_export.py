@@ -0,0 +1,144 @@
+"""
+Streaming ZIP export of a meeting's artifacts.
+The archive is written through zipfile into an unseekable buffer that is
+drained after every entry, so memory stays bounded by the largest artifact
+instead of the whole archive. Diagrams render in a thread pool while the
+text artifacts are being written.
+"""
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List
+
+from plantuml_utils import PlantUMLProcessor
+
+# File extensions for generated real code, by language
+CODE_EXTENSIONS = {
+    'java': 'java',
+    'sql': 'sql',
+    'python': 'py',
+    'javascript': 'js',
+    'typescript': 'ts',
+}
+
+
+class _ZipStream:
+    """Write-only, unseekable sink that zipfile writes into and the generator drains."""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # zipfile needs offsets for the central directory, but never seeks
+        return self._offset
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        """Return and forget everything written since the last drain."""
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _slug(text: str) -> str:
+    """File-system friendly name for a diagram type."""
+    return re.sub(r'[^a-z0-9]+', '_', (text or 'diagram').lower()).strip('_') or 'diagram'
+
+
+def archive_name(meeting: Dict) -> str:
+    """ZIP file name for a meeting's artifacts."""
+    return f"{_slug(str(meeting.get('title') or meeting.get('id') or 'meeting'))}.zip"
+
+
+def _code_filename(slug: str, code: str, language: str) -> str:
+    """Name a real code file; Java files are named after their public class."""
+    language = (language or '').lower()
+    extension = CODE_EXTENSIONS.get(language, 'txt')
+    if language == 'java':
+        match = re.search(r'public\s+(?:abstract\s+|final\s+)*(?:class|interface|enum)\s+(\w+)', code)
+        if match:
+            return f"{match.group(1)}.java"
+    return f"{slug}.{extension}"
+
+
+def stream_artifact_zip(meeting: Dict, diagrams: List[Dict],
+                        render_func: Callable[[str], Dict],
+                        max_workers: int = 3) -> Iterator[bytes]:
+    """
+    Yield a ZIP archive of a meeting's artifacts chunk by chunk.
+
+    Layout:
+        summary.md                      meeting report (PlantUMLProcessor.format_output)
+        <diagram>/<diagram>.puml        PlantUML source
+        <diagram>/<diagram>.svg         rendered diagram
+        <diagram>/<Class>.java | .sql   generated real code, if any
+        errors.txt                      artifacts that could not be rendered
+
+    Args:
+        meeting: Meeting data (transcript, summary, keywords, title)
+        diagrams: Diagram results with diagram_type, plantuml_code and
+            optionally real_code / real_code_language
+        render_func: Called with PlantUML code; returns a dict with success,
+            data (SVG bytes) and errors
+        max_workers: Number of diagrams rendered concurrently
+
+    Yields:
+        Consecutive chunks of the ZIP file
+    """
+    diagrams = [d for d in diagrams if d.get('plantuml_code')]
+    slugs = []
+    for diagram in diagrams:
+        slug = _slug(diagram.get('diagram_type'))
+        while slug in slugs:
+            slug += '_'
+        slugs.append(slug)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="zip-render")
+    futures = {
+        executor.submit(render_func, diagram['plantuml_code']): slug
+        for diagram, slug in zip(diagrams, slugs)
+    }
+
+    stream = _ZipStream()
+    try:
+        with zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+            # Text artifacts first, while the diagrams render
+            processor = PlantUMLProcessor()
+            all_code = '\n\n'.join(d['plantuml_code'] for d in diagrams)
+            archive.writestr('summary.md', processor.format_output(meeting, all_code))
+            yield stream.drain()
+
+            for diagram, slug in zip(diagrams, slugs):
+                archive.writestr(f"{slug}/{slug}.puml", diagram['plantuml_code'])
+                if diagram.get('real_code'):
+                    filename = _code_filename(slug, diagram['real_code'], diagram.get('real_code_language'))
+                    archive.writestr(f"{slug}/{filename}", diagram['real_code'])
+                yield stream.drain()
+
+            # Rendered diagrams in completion order
+            errors = []
+            for future in as_completed(futures):
+                slug = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'success': False, 'errors': [str(e)]}
+                if result.get('success'):
+                    archive.writestr(f"{slug}/{slug}.svg", result['data'])
+                else:
+                    errors.append(f"{slug}: {'; '.join(result.get('errors', [])) or 'render failed'}")
+                yield stream.drain()
+
+            if errors:
+                archive.writestr('errors.txt', '\n'.join(errors) + '\n')
+        yield stream.drain()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,69 @@
+"""
+Throughput of PlantUMLProcessor.clean_plantuml_output on the raw model
+outputs in corpus/.
+
+Each corpus file is cleaned twice: without a diagram type (every fixer runs,
+the legacy behaviour) and with its diagram type (only the matching fixers run).
+
+Usage:
+    python bench_clean.py [--iterations N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from plantuml_utils import PlantUMLProcessor
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+# Corpus file -> diagram type passed to the cleaner
+CORPUS_TYPES = {
+    'class_diagram.txt': 'Class Diagram',
+    'sequence_diagram.txt': 'Sequence Diagram',
+    'activity_diagram.txt': 'Activity Diagram',
+    'component_diagram.txt': 'Component Diagram',
+    'usecase_diagram.txt': 'Use Case Diagram',
+    'er_diagram.txt': 'ER Diagram',
+    'class_diagram_truncated.txt': 'Class Diagram',
+    'sequence_diagram_fences.txt': 'Sequence Diagram',
+    'activity_diagram_truncated.txt': 'Activity Diagram',
+    'er_diagram_chen_fenced.txt': 'ER Diagram',
+}
+
+
+def load_corpus():
+    """Return (file name, diagram type, raw output) for every corpus file."""
+    corpus = []
+    for filename, diagram_type in CORPUS_TYPES.items():
+        with open(os.path.join(CORPUS_DIR, filename), encoding='utf-8') as f:
+            corpus.append((filename, diagram_type, f.read()))
+    return corpus
+
+
+def time_clean(processor, raw_output, diagram_type, iterations):
+    """Return cleans per second."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        processor.clean_plantuml_output(raw_output, diagram_type)
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    processor = PlantUMLProcessor()
+    print(f"🧹 clean_plantuml_output, {args.iterations} iterations per file")
+    print(f"{'file':<34}{'untyped ops/s':>16}{'typed ops/s':>16}")
+    for filename, diagram_type, raw_output in load_corpus():
+        untyped = time_clean(processor, raw_output, None, args.iterations)
+        typed = time_clean(processor, raw_output, diagram_type, args.iterations)
+        print(f"{filename:<34}{untyped:>16,.0f}{typed:>16,.0f}")
+
+
+if __name__ == '__main__':
+    main()
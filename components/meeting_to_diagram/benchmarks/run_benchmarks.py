@@ -0,0 +1,215 @@
+"""
+Microbenchmarks for the PlantUML processing path, on the raw model outputs
+in corpus/ and the meeting transcript in corpus/transcript.txt.
+
+Cases:
+    clean/<file>               PlantUMLProcessor.clean_plantuml_output with the diagram type
+    validate/<file>            PlantUMLProcessor.validate_plantuml of the cleaned output
+                               (a fresh processor per call, so nothing is cached)
+    prompt/enhanced/<type>     prompt_templates.get_enhanced_prompt
+    prompt/revision/<type>     prompt_templates.get_revision_prompt
+    fingerprint/<level>/<file> plantuml_normalize.fingerprint of the cleaned output
+    legacy/clean/<file>        module-level clean_plantuml_output wrapper
+    legacy/validate/<file>     module-level validate_plantuml wrapper
+
+For every case it prints ops/s, p50 and p99 latency and the peak memory
+allocated by one call (tracemalloc), and compares them with a stored
+baseline (baseline.json next to this file by default).
+
+Usage:
+    python run_benchmarks.py [--iterations N] [--filter TEXT]
+                             [--baseline PATH] [--save-baseline]
+                             [--threshold PCT] [--fail-on-regression]
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BENCH_DIR, '..'))
+
+import plantuml_utils
+from plantuml_utils import PlantUMLProcessor
+from plantuml_normalize import fingerprint, LAYOUT, SEMANTIC
+from prompt_templates import ENHANCED_PROMPT_TEMPLATES, get_enhanced_prompt, get_revision_prompt
+from validation_engine import canonical_diagram_type
+from bench_clean import CORPUS_DIR, load_corpus
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+SUMMARY = "The team designed an order management service: checkout reserves inventory, charges the card and emails a confirmation."
+KEYWORDS = ["order service", "checkout", "payment gateway", "inventory", "refund"]
+
+
+def build_cases():
+    """Return [(case name, zero-argument callable)] in report order."""
+    with open(os.path.join(CORPUS_DIR, 'transcript.txt'), encoding='utf-8') as f:
+        transcript = f.read()
+
+    processor = PlantUMLProcessor()
+    corpus = [(filename.rsplit('.', 1)[0], diagram_type, raw_output)
+              for filename, diagram_type, raw_output in load_corpus()]
+    cleaned = {name: processor.clean_plantuml_output(raw_output, diagram_type)
+               for name, diagram_type, raw_output in corpus}
+
+    cases = []
+    for name, diagram_type, raw_output in corpus:
+        cases.append((f"clean/{name}",
+                      lambda raw=raw_output, t=diagram_type: processor.clean_plantuml_output(raw, t)))
+    for name, diagram_type, _ in corpus:
+        cases.append((f"validate/{name}",
+                      lambda code=cleaned[name], t=diagram_type: PlantUMLProcessor().validate_plantuml(code, t)))
+
+    # Revision prompts embed a cleaned diagram of the same type and its validation errors
+    examples = {}
+    for name, diagram_type, _ in corpus:
+        examples.setdefault(canonical_diagram_type(diagram_type), (cleaned[name], diagram_type))
+    for prompt_type in ENHANCED_PROMPT_TEMPLATES:
+        slug = prompt_type.lower().replace(' ', '_')
+        cases.append((f"prompt/enhanced/{slug}",
+                      lambda t=prompt_type: get_enhanced_prompt(t, transcript, SUMMARY, KEYWORDS)))
+        code, diagram_type = examples.get(canonical_diagram_type(prompt_type), next(iter(examples.values())))
+        _, errors = processor.validate_plantuml(code, diagram_type)
+        cases.append((f"prompt/revision/{slug}",
+                      lambda c=code, t=prompt_type, e=errors or ["Missing relationships"]:
+                      get_revision_prompt(c, t, transcript, SUMMARY, KEYWORDS, e)))
+
+    for level in (LAYOUT, SEMANTIC):
+        for name, diagram_type, _ in corpus:
+            cases.append((f"fingerprint/{level}/{name}",
+                          lambda code=cleaned[name], t=diagram_type, l=level: fingerprint(code, l, t)))
+
+    for name, diagram_type, raw_output in corpus:
+        cases.append((f"legacy/clean/{name}",
+                      lambda raw=raw_output, t=diagram_type: plantuml_utils.clean_plantuml_output(raw, t)))
+    for name, diagram_type, _ in corpus:
+        cases.append((f"legacy/validate/{name}",
+                      lambda code=cleaned[name], t=diagram_type: plantuml_utils.validate_plantuml(code, t)))
+    return cases
+
+
+def _percentile(sorted_samples, percent):
+    return sorted_samples[min(len(sorted_samples) - 1, int(percent / 100 * len(sorted_samples)))]
+
+
+def measure(func, iterations, warmup):
+    """
+    Time ``func`` call by call.
+
+    Returns:
+        Dict with ops_per_sec, p50_us, p99_us and peak_kib (the most memory
+        one call had allocated at any point, lowest of a few traced calls)
+    """
+    for _ in range(warmup):
+        func()
+    gc.collect()
+
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(iterations):
+        start = clock()
+        func()
+        samples.append(clock() - start)
+    samples.sort()
+
+    tracemalloc.start()
+    try:
+        peaks = []
+        for _ in range(3):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            func()
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'ops_per_sec': round(len(samples) * 1e9 / sum(samples), 1),
+        'p50_us': round(_percentile(samples, 50) / 1000, 2),
+        'p99_us': round(_percentile(samples, 99) / 1000, 2),
+        'peak_kib': round(min(peaks) / 1024, 1),
+    }
+
+
+def compare(result, baseline, threshold):
+    """Return (p50 change in percent, 'slower' / 'faster' / '') against a baseline entry."""
+    if not baseline or not baseline.get('p50_us'):
+        return None, ''
+    change = (result['p50_us'] - baseline['p50_us']) / baseline['p50_us'] * 100
+    if change > threshold:
+        return change, 'slower'
+    if change < -threshold:
+        return change, 'faster'
+    return change, ''
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get('cases', {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--filter', default='', help="Only run cases whose name contains this text")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Write this run's results to the baseline file")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="p50 change in percent reported as a regression or improvement")
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help="Exit with status 1 if any case is slower than the baseline")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    cases = [(name, func) for name, func in build_cases() if args.filter in name]
+    print(f"⏱️  {len(cases)} cases, {args.iterations} iterations each"
+          + (f", baseline {os.path.basename(args.baseline)}" if baseline else ", no baseline"))
+    print(f"{'case':<48}{'ops/s':>12}{'p50 µs':>10}{'p99 µs':>10}{'peak KiB':>10}{'vs base':>10}")
+
+    results = {}
+    regressions = []
+    for name, func in cases:
+        result = measure(func, args.iterations, args.warmup)
+        results[name] = result
+        change, verdict = compare(result, baseline.get(name), args.threshold)
+        delta = f"{change:+.1f}%" if change is not None else '-'
+        marker = {'slower': ' ▲', 'faster': ' ▼'}.get(verdict, '')
+        print(f"{name:<48}{result['ops_per_sec']:>12,.0f}{result['p50_us']:>10.1f}"
+              f"{result['p99_us']:>10.1f}{result['peak_kib']:>10.1f}{delta:>10}{marker}")
+        if verdict == 'slower':
+            regressions.append(name)
+
+    if baseline:
+        print(f"\n{'⚠️' if regressions else '✅'} {len(regressions)} case(s) more than "
+              f"{args.threshold:.0f}% slower than the baseline")
+        for name in regressions:
+            print(f"   ▲ {name}")
+
+    if args.save_baseline:
+        saved = {'cases': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                saved = json.load(f)
+        saved['python'] = platform.python_version()
+        saved['machine'] = platform.machine()
+        saved['iterations'] = args.iterations
+        saved.setdefault('cases', {}).update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(saved, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"💾 Saved {len(results)} results to {args.baseline}")
+
+    if args.fail_on_regression and regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""
+Long-lived PlantUML render process driven through its pipe mode.
+One JVM renders many diagrams over stdin/stdout, so the subprocess fallback no
+longer pays JVM startup and JIT warmup per diagram.
+"""
+import os
+import queue
+import re
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+# Printed by PlantUML after each diagram in pipe mode (-pipedelimitor)
+PIPE_DELIMITER = "___TALKTOTECH_DIAGRAM_END___"
+HEALTH_CHECK_DIAGRAM = "@startuml\nA -> B\n@enduml"
+# Pipe mode emits one image per @start... block; outputs are matched to
+# sources by order, so each source must hold exactly one block
+DIAGRAM_START = re.compile(r'^\s*@start[a-z]+\b', re.MULTILINE | re.IGNORECASE)
+
+
+def _block_count_error(source: str) -> Optional[str]:
+    """Error for a source that would not produce exactly one output, None if it is fine."""
+    blocks = len(DIAGRAM_START.findall(source))
+    if blocks == 1:
+        return None
+    if blocks == 0:
+        return "PlantUML source has no @start... block"
+    return f"PlantUML source has {blocks} @start... blocks; render one diagram at a time"
+
+
+class PlantUMLRenderDaemon:
+    """A persistent ``java -jar plantuml.jar -pipe`` worker for one output format."""
+
+    def __init__(self, jar_path: str, output_format: str = "svg",
+                 render_timeout: float = 30, java_command: str = "java"):
+        """
+        Args:
+            jar_path: Path to the PlantUML JAR
+            output_format: PlantUML output type, e.g. "svg" or "png"
+            render_timeout: Seconds to wait for one diagram before restarting the process
+            java_command: Java executable
+        """
+        self.jar_path = jar_path
+        self.output_format = output_format
+        self.render_timeout = render_timeout
+        self.java_command = java_command
+
+        self._process = None
+        self._outputs = queue.Queue()
+        self._stderr_lines = deque(maxlen=50)
+        self._lock = threading.Lock()
+        self.restarts = 0
+        self.renders = 0
+
+    def start(self) -> None:
+        """Start the PlantUML process if it is not running."""
+        if self.is_alive():
+            return
+        cmd = [
+            self.java_command, '-Djava.awt.headless=true', '-jar', self.jar_path,
+            '-pipe', f'-t{self.output_format}', '-charset', 'UTF-8',
+            '-pipedelimitor', PIPE_DELIMITER
+        ]
+        self._outputs = queue.Queue()
+        self._process = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        threading.Thread(target=self._read_stdout, args=(self._process, self._outputs), daemon=True).start()
+        threading.Thread(target=self._read_stderr, args=(self._process,), daemon=True).start()
+        print(f"Started PlantUML render daemon (pid {self._process.pid}, format {self.output_format})")
+
+    def stop(self, force: bool = False) -> None:
+        """Terminate the PlantUML process, killing it right away if ``force`` is set."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        if force:
+            process.kill()
+            process.wait()
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def restart(self) -> None:
+        """Kill and start the process again."""
+        self.stop(force=True)
+        self.restarts += 1
+        self.start()
+
+    def is_alive(self) -> bool:
+        """Whether the PlantUML process is running."""
+        return self._process is not None and self._process.poll() is None
+
+    def health_check(self) -> bool:
+        """Render a trivial diagram to confirm the process responds."""
+        result = self.render(HEALTH_CHECK_DIAGRAM, timeout=min(self.render_timeout, 10))
+        return result["success"]
+
+    def render(self, plantuml_code: str, timeout: Optional[float] = None) -> Dict:
+        """
+        Render one diagram through the running process.
+
+        A crashed process is restarted and the render retried once; a render
+        that exceeds the timeout kills and restarts the process. Sources with
+        more or fewer than one @start... block are rejected without being
+        written, since their outputs would go to the next caller.
+
+        Returns:
+            Dict with success, data (rendered bytes), render_ms and errors
+        """
+        timeout = timeout or self.render_timeout
+        source = plantuml_code.strip() + "\n"
+        error = _block_count_error(source)
+        if error:
+            return {"success": False, "data": b"", "errors": [error]}
+
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    self.start()
+                    start = time.perf_counter()
+                    self._process.stdin.write(source.encode("utf-8"))
+                    self._process.stdin.flush()
+                    data = self._outputs.get(timeout=timeout)
+                except queue.Empty:
+                    self.restart()
+                    return {"success": False, "data": b"",
+                            "errors": [f"PlantUML render timed out after {timeout}s; daemon restarted"]}
+                except (OSError, ValueError) as e:
+                    # Broken pipe: the process died between renders
+                    if attempt == 0:
+                        self.restart()
+                        continue
+                    return {"success": False, "data": b"", "errors": [f"PlantUML daemon failed: {str(e)}"]}
+
+                if data is None:
+                    # stdout closed mid-render: the process crashed
+                    if attempt == 0:
+                        self.restart()
+                        continue
+                    self.stop()
+                    return {"success": False, "data": b"", "errors": [self._stderr_summary("PlantUML daemon crashed")]}
+
+                self.renders += 1
+                render_ms = round((time.perf_counter() - start) * 1000, 1)
+                if not data:
+                    return {"success": False, "data": b"", "render_ms": render_ms,
+                            "errors": [self._stderr_summary("PlantUML produced no output")]}
+                return {"success": True, "data": data, "render_ms": render_ms, "errors": []}
+
+    def render_batch(self, sources: List[str], timeout: Optional[float] = None) -> List[Dict]:
+        """
+        Render several diagrams in one round trip.
+
+        All sources are written to the process before any output is read, so
+        PlantUML renders them back to back. Sources with more or fewer than
+        one @start... block fail without being written. If the process times
+        out or crashes, the remaining items fail and the process is restarted.
+
+        Args:
+            sources: PlantUML sources, any mix of @startuml/@startchen/...
+            timeout: Seconds to wait for each diagram
+
+        Returns:
+            One dict per source, in order, with success, data, render_ms and errors
+        """
+        timeout = timeout or self.render_timeout
+        results = [None] * len(sources)
+        for index, source in enumerate(sources):
+            error = _block_count_error(source)
+            if error:
+                results[index] = {"success": False, "data": b"", "errors": [error]}
+        pending = [index for index, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+        payload = "".join(sources[index].strip() + "\n" for index in pending)
+
+        with self._lock:
+            try:
+                self.start()
+                start = time.perf_counter()
+                self._process.stdin.write(payload.encode("utf-8"))
+                self._process.stdin.flush()
+            except (OSError, ValueError) as e:
+                self.restart()
+                for index in pending:
+                    results[index] = {"success": False, "data": b"", "errors": [f"PlantUML daemon failed: {str(e)}"]}
+                return results
+
+            done = 0
+            for index in pending:
+                try:
+                    data = self._outputs.get(timeout=timeout)
+                except queue.Empty:
+                    self.restart()
+                    break
+                if data is None:
+                    self.stop()
+                    break
+
+                self.renders += 1
+                done += 1
+                now = time.perf_counter()
+                render_ms = round((now - start) * 1000, 1)
+                start = now
+                if not data:
+                    results[index] = {"success": False, "data": b"", "render_ms": render_ms,
+                                      "errors": [self._stderr_summary("PlantUML produced no output")]}
+                else:
+                    results[index] = {"success": True, "data": data, "render_ms": render_ms, "errors": []}
+
+            if done < len(pending):
+                error = self._stderr_summary("PlantUML daemon stopped before finishing the batch")
+                for index in pending[done:]:
+                    results[index] = {"success": False, "data": b"", "errors": [error]}
+        return results
+
+    def _stderr_summary(self, message: str) -> str:
+        """Append the most recent stderr output to an error message."""
+        recent = " ".join(self._stderr_lines)
+        return f"{message}: {recent}" if recent else message
+
+    def _read_stdout(self, process: subprocess.Popen, outputs: queue.Queue) -> None:
+        """Split stdout on the pipe delimiter and queue each rendered diagram."""
+        delimiter = PIPE_DELIMITER.encode("utf-8")
+        buffer = b""
+        fd = process.stdout.fileno()
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                outputs.put(None)
+                return
+            buffer += chunk
+            while delimiter in buffer:
+                data, buffer = buffer.split(delimiter, 1)
+                buffer = buffer.lstrip(b"\r\n")
+                outputs.put(data.rstrip(b"\r\n") if self.output_format == "svg" else data)
+
+    def _read_stderr(self, process: subprocess.Popen) -> None:
+        """Keep the last stderr lines for error messages (and keep the pipe drained)."""
+        for line in iter(process.stderr.readline, b""):
+            self._stderr_lines.append(line.decode("utf-8", "replace").strip())
@@ -6,15 +6,36 @@ import os
 import replicate
 from plantuml_utils import (
     generate_plantuml_simple, 
+    generate_plantuml_speculative,
     PlantUMLProcessor, 
     create_plantuml_processor
 )
 from dotenv import load_dotenv
 import pathlib
 
+# Bump whenever prompts, cleaning or validation change in a way that should
+# invalidate previously cached generation results.
+GENERATOR_VERSION = "granite-3.3-8b-instruct/7"
+
 class GranitePlantUMLGenerator:
-    def __init__(self):
-        """Initialize the Granite Code LLM for PlantUML generation"""
+    def __init__(self, speculative_candidates: int = None, compact_revision: bool = None,
+                 syntax_checker=None):
+        """
+        Initialize the Granite Code LLM for PlantUML generation
+        
+        Args:
+            speculative_candidates: Number of candidate generations.
+                Values above 1 enable speculative first-valid-wins generation.
+                Defaults to the PLANTUML_SPECULATIVE_CANDIDATES env var (1 = off).
+                PLANTUML_SPECULATIVE_CONCURRENCY caps how many run at once
+                (default one fewer than the candidates).
+            compact_revision: Send only failing lines on revision and apply the
+                returned replacement blocks locally. Defaults to the
+                PLANTUML_COMPACT_REVISION env var.
+            syntax_checker: Optional callable that parses PlantUML with the local
+                engine (e.g. SVGConverter.check_syntax). Its "Line N" errors drive
+                revisions, and code it accepts skips the AI improvement pass.
+        """
         
         # Load environment variables from .env file using absolute path
         env_path = pathlib.Path(__file__).parent.parent / '.env'
@@ -29,14 +50,24 @@ class GranitePlantUMLGenerator:
         self.replicate_client = replicate.Client(api_token=REPLICATE_TOKEN)
         
         # Initialize the processor
-        self.processor = PlantUMLProcessor()
+        self.syntax_checker = syntax_checker
+        self.processor = PlantUMLProcessor(syntax_checker=syntax_checker)
+        
+        if speculative_candidates is None:
+            speculative_candidates = int(os.getenv("PLANTUML_SPECULATIVE_CANDIDATES", "1"))
+        self.speculative_candidates = max(1, speculative_candidates)
+        concurrency = os.getenv("PLANTUML_SPECULATIVE_CONCURRENCY")
+        self.speculative_concurrency = int(concurrency) if concurrency else None
+        
+        if compact_revision is None:
+            compact_revision = os.getenv("PLANTUML_COMPACT_REVISION", "false").lower() in ("1", "true", "yes")
+        self.compact_revision = compact_revision
     
-    def _ai_generate_func(self, prompt: str) -> str:
+    def _ai_generate_func(self, prompt: str, temperature: float = 0.05) -> str:
         """Internal function to call the Granite Code model with a prompt"""
         output = self.replicate_client.run(
             "ibm-granite/granite-3.3-8b-instruct", 
-            input={"prompt": prompt},
-            temperature=0.05
+            input={"prompt": prompt, "temperature": temperature}
         )
         return ''.join(output)
     
@@ -57,14 +88,30 @@ class GranitePlantUMLGenerator:
             keywords = []
             
         try:
-            # Use simple generation function
-            result = generate_plantuml_simple(
-                diagram_type=diagram_type,
-                transcript=transcript,
-                summary=summary,
-                keywords=keywords,
-                ai_generate_func=self._ai_generate_func
-            )
+            if self.speculative_candidates > 1:
+                # Race several candidates and keep the first valid one
+                result = generate_plantuml_speculative(
+                    diagram_type=diagram_type,
+                    transcript=transcript,
+                    summary=summary,
+                    keywords=keywords,
+                    ai_generate_func=self._ai_generate_func,
+                    num_candidates=self.speculative_candidates,
+                    max_concurrent=self.speculative_concurrency,
+                    compact_revision=self.compact_revision,
+                    syntax_checker=self.syntax_checker
+                )
+            else:
+                # Use simple generation function
+                result = generate_plantuml_simple(
+                    diagram_type=diagram_type,
+                    transcript=transcript,
+                    summary=summary,
+                    keywords=keywords,
+                    ai_generate_func=self._ai_generate_func,
+                    compact_revision=self.compact_revision,
+                    syntax_checker=self.syntax_checker
+                )
             
             # Print status for user feedback
             if not result['success']:
@@ -86,6 +133,44 @@ class GranitePlantUMLGenerator:
                 'used_fallback': True
             }
     
+    def edit_plantuml(self, plantuml_code, diagram_type, change_request=None, edited_code=None):
+        """
+        Apply a small change to an existing diagram instead of regenerating it.
+        
+        Parameters:
+        - plantuml_code (str): Current PlantUML code.
+        - diagram_type (str): Diagram type of the code.
+        - change_request (str, optional): Natural-language description of the change.
+        - edited_code (str, optional): The user's manually edited code.
+        
+        Returns:
+        - dict: Result with plantuml_code, success status, validation info
+        """
+        try:
+            result = self.processor.edit_plantuml_with_ai(
+                code=plantuml_code,
+                diagram_type=diagram_type,
+                change_request=change_request,
+                edited_code=edited_code,
+                ai_generate_func=self._ai_generate_func
+            )
+            print(f"✏️ Edit for {diagram_type}: {result['status_message']} ({result['ai_calls']} AI call(s))")
+            return result
+            
+        except Exception as e:
+            print(f"Error editing PlantUML with Granite Code: {str(e)}")
+            return {
+                'plantuml_code': plantuml_code,
+                'success': False,
+                'is_valid': False,
+                'status_message': f"Exception occurred: {str(e)[:100]}",
+                'validation_errors': [],
+                'diagram_type': diagram_type,
+                'used_fallback': True,
+                'ai_calls': 0,
+                'changed_lines': []
+            }
+    
     def generate_plantuml_code_only(self, transcript, diagram_type, keywords=None, summary=""):
         """
         Simple interface that returns just the PlantUML code (for backward compatibility).
@@ -0,0 +1,538 @@
+"""
+Parser and intermediate representation for class diagrams and Chen ER
+(@startchen) diagrams.
+parse_diagram() turns PlantUML into a Diagram of compact __slots__ nodes
+(classes, attributes, methods, entities, relationships, cardinalities);
+Diagram.serialize() writes it back. Lines the parser does not model (notes,
+skinparams, packages, comments, ...) are kept verbatim in source order, so
+parse_diagram(diagram.serialize()) == diagram for any parsed diagram.
+"""
+import re
+from typing import Dict, List, Optional, Tuple, Union
+
+from plantuml_tokens import tokenize, DECLARATION, MEMBER, RELATIONSHIP
+
+CLASS_KINDS = ('abstract class', 'class', 'interface', 'enum', 'annotation', 'abstract', 'entity')
+
+CLASS_DECLARATION = re.compile(
+    r'^(abstract\s+class|class|interface|enum|annotation|abstract|entity)\s+'
+    r'(?:"([^"]+)"|([\w.$]+))'
+    r'(?:\s*<([^<>]+)>)?'
+    r'(?:\s+as\s+([\w.$]+))?'
+    r'(?:\s*<([^<>]+)>)?'
+    r'(?:\s*<<\s*([^>]+?)\s*>>)?'
+    r'\s*(\{\s*\}|\{)?\s*$'
+)
+CHEN_DECLARATION = re.compile(
+    r'^(entity|relationship)\s+([\w.$]+)(?:\s*<<\s*(\w+)\s*>>)?\s*(\{\s*\}|\{)?\s*$',
+    re.IGNORECASE
+)
+RELATIONSHIP_LINE = re.compile(
+    r'^(?:"([^"]+)"|([\w.$]+))'
+    r'(?:\s+"([^"]*)")?'
+    r'\s*([<*o#x}+^|]*[-.]+(?:\[[^\]]*\]|up|down|left|right|[udlr])?[-.]*[>*o#x{+^|]*)'
+    r'(?:\s*"([^"]*)")?'
+    r'\s*(?:"([^"]+)"|([\w.$]+))'
+    r'(?:\s*:\s*(.*?))?\s*$'
+)
+CHEN_LINK = re.compile(r'^([\w.$]+)\s*([-=])(\([^)]*\)|[^-=\s]*)([-=])\s*([\w.$]+)\s*$')
+MODIFIER_PREFIX = re.compile(r'^\{(static|abstract|classifier)\}\s*')
+VISIBILITY = '+-#~'
+SEPARATOR = re.compile(r'^(--|\.\.|==|__)')
+CHEN_ATTRIBUTE = re.compile(r'^([\w.$]+)(?:\s*:\s*([^<{]+?))?(?:\s*<<\s*(\w+)\s*>>)?\s*(\{\s*\}|\{)?\s*$')
+
+
+class _Node:
+    """Base for IR nodes: value equality and a readable repr over __slots__."""
+
+    __slots__ = ()
+
+    def _values(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._values() == other._values()
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Cardinality(_Node):
+    """Multiplicity of a relationship end: "1", "0..*", "many", Chen "N", "(1,N)"..."""
+
+    __slots__ = ('text', 'total')
+
+    def __init__(self, text: str, total: bool = False):
+        self.text = text
+        self.total = total  # Chen total participation (double line)
+
+    @property
+    def is_many(self) -> bool:
+        """Whether more than one instance can take part."""
+        upper = self.text.strip('()').replace(',', '..').split('..')[-1].strip().lower()
+        if upper in ('*', 'n', 'm', 'many'):
+            return True
+        return upper.isdigit() and int(upper) > 1
+
+
+class Attribute(_Node):
+    """Class attribute, enum constant or Chen attribute (possibly composite)."""
+
+    __slots__ = ('name', 'type', 'visibility', 'modifiers', 'default', 'stereotype', 'children')
+
+    def __init__(self, name: str, type: Optional[str] = None, visibility: str = '',
+                 modifiers: Tuple[str, ...] = (), default: Optional[str] = None,
+                 stereotype: Optional[str] = None, children: Optional[List['Attribute']] = None):
+        self.name = name
+        self.type = type
+        self.visibility = visibility
+        self.modifiers = tuple(modifiers)
+        self.default = default
+        self.stereotype = stereotype      # Chen: key, derived, multi
+        self.children = children or []    # Chen composite attribute parts
+
+
+class Parameter(_Node):
+    """Method parameter."""
+
+    __slots__ = ('name', 'type')
+
+    def __init__(self, name: str, type: Optional[str] = None):
+        self.name = name
+        self.type = type
+
+
+class Method(_Node):
+    """Class method."""
+
+    __slots__ = ('name', 'parameters', 'return_type', 'visibility', 'modifiers')
+
+    def __init__(self, name: str, parameters: Optional[List[Parameter]] = None,
+                 return_type: Optional[str] = None, visibility: str = '',
+                 modifiers: Tuple[str, ...] = ()):
+        self.name = name
+        self.parameters = parameters or []
+        self.return_type = return_type
+        self.visibility = visibility
+        self.modifiers = tuple(modifiers)
+
+
+class ClassNode(_Node):
+    """Class, interface, enum or abstract class with its members in source order."""
+
+    __slots__ = ('name', 'kind', 'quoted', 'generic', 'alias', 'stereotype', 'members')
+
+    def __init__(self, name: str, kind: str = 'class', quoted: bool = False,
+                 generic: Optional[str] = None, alias: Optional[str] = None,
+                 stereotype: Optional[str] = None,
+                 members: Optional[List[Union[Attribute, Method, str]]] = None):
+        self.name = name
+        self.kind = kind
+        self.quoted = quoted
+        self.generic = generic
+        self.alias = alias
+        self.stereotype = stereotype
+        self.members = members or []  # Attributes, Methods and separator lines ("--", "..")
+
+    @property
+    def key(self) -> str:
+        """Name relationships use to refer to this class."""
+        return self.alias or self.name
+
+    @property
+    def attributes(self) -> List[Attribute]:
+        return [member for member in self.members if isinstance(member, Attribute)]
+
+    @property
+    def methods(self) -> List[Method]:
+        return [member for member in self.members if isinstance(member, Method)]
+
+
+class Entity(_Node):
+    """Chen entity or relationship (diamond) with its attributes."""
+
+    __slots__ = ('name', 'kind', 'stereotype', 'attributes')
+
+    def __init__(self, name: str, kind: str = 'entity', stereotype: Optional[str] = None,
+                 attributes: Optional[List[Attribute]] = None):
+        self.name = name
+        self.kind = kind              # "entity" or "relationship"
+        self.stereotype = stereotype  # weak / identifying
+        self.attributes = attributes or []
+
+    @property
+    def key(self) -> str:
+        return self.name
+
+    @property
+    def keys(self) -> List[Attribute]:
+        """Attributes marked <<key>>."""
+        return [attribute for attribute in self.attributes if attribute.stereotype == 'key']
+
+
+class Relationship(_Node):
+    """Edge between two classes, or a Chen link between a relationship and an entity."""
+
+    __slots__ = ('source', 'target', 'arrow', 'kind', 'source_cardinality',
+                 'target_cardinality', 'label')
+
+    def __init__(self, source: str, target: str, arrow: str, kind: Optional[str] = None,
+                 source_cardinality: Optional[Cardinality] = None,
+                 target_cardinality: Optional[Cardinality] = None,
+                 label: Optional[str] = None):
+        self.source = source
+        self.target = target
+        self.arrow = arrow
+        self.kind = kind or relationship_kind(arrow)
+        self.source_cardinality = source_cardinality
+        self.target_cardinality = target_cardinality
+        self.label = label
+
+    @property
+    def head(self) -> Optional[str]:
+        """
+        The decorated end: parent for inheritance/realization, whole for
+        composition/aggregation, pointed-to end for directed associations.
+        """
+        if self.kind == 'link':
+            return None
+        if self.arrow[0] in '<*o#x}+^|':
+            return self.source
+        if self.arrow[-1] in '>*o#x{+^|':
+            return self.target
+        return None
+
+    @property
+    def tail(self) -> Optional[str]:
+        """The undecorated end, e.g. the subclass of an inheritance."""
+        head = self.head
+        if head is None:
+            return None
+        return self.target if head == self.source else self.source
+
+
+def relationship_kind(arrow: str) -> str:
+    """Classify a PlantUML class-diagram arrow."""
+    if '|>' in arrow or '<|' in arrow:
+        return 'realization' if '.' in arrow else 'inheritance'
+    if arrow[0] == '*' or arrow[-1] == '*':
+        return 'composition'
+    if arrow[0] == 'o' or arrow[-1] == 'o':
+        return 'aggregation'
+    if '.' in arrow:
+        return 'dependency'
+    return 'association'
+
+
+Item = Union[ClassNode, Entity, Relationship, str]
+
+
+class Diagram(_Node):
+    """A parsed diagram: nodes and verbatim lines in source order."""
+
+    __slots__ = ('kind', 'items')
+
+    def __init__(self, kind: str = 'class', items: Optional[List[Tuple[str, Item]]] = None):
+        self.kind = kind          # "class" or "chen"
+        self.items = items or []  # (indent, node or verbatim line)
+
+    @property
+    def classes(self) -> Dict[str, ClassNode]:
+        """Classes by the name relationships use."""
+        return {node.key: node for _, node in self.items if isinstance(node, ClassNode)}
+
+    @property
+    def entities(self) -> Dict[str, Entity]:
+        """Chen entities and relationships by name."""
+        return {node.name: node for _, node in self.items if isinstance(node, Entity)}
+
+    @property
+    def relationships(self) -> List[Relationship]:
+        return [node for _, node in self.items if isinstance(node, Relationship)]
+
+    def serialize(self) -> str:
+        """Write the diagram back as PlantUML."""
+        lines = []
+        for indent, item in self.items:
+            if isinstance(item, str):
+                lines.append(item)
+            elif isinstance(item, ClassNode):
+                _serialize_class(item, indent, lines)
+            elif isinstance(item, Entity):
+                _serialize_entity(item, indent, lines)
+            else:
+                lines.append(indent + _serialize_relationship(item))
+        return '\n'.join(lines)
+
+
+def _split_parameters(text: str) -> List[Parameter]:
+    """Parse "a : int, b : String" or Java-style "int a, String b"."""
+    parameters = []
+    depth = 0
+    current = ''
+    for char in text + ',':
+        if char == ',' and depth == 0:
+            part = current.strip()
+            current = ''
+            if not part:
+                continue
+            if ':' in part:
+                name, type_ = part.split(':', 1)
+                parameters.append(Parameter(name.strip(), type_.strip() or None))
+            elif ' ' in part:
+                type_, name = part.rsplit(None, 1)
+                parameters.append(Parameter(name, type_))
+            else:
+                parameters.append(Parameter(part))
+            continue
+        depth += char in '<(['
+        depth -= char in '>)]'
+        current += char
+    return parameters
+
+
+def _take_modifiers(text: str, modifiers: list) -> str:
+    """Strip leading {static} / {abstract} / {classifier} markers into modifiers."""
+    while True:
+        match = MODIFIER_PREFIX.match(text)
+        if not match:
+            return text
+        modifiers.append(match.group(1))
+        text = text[match.end():]
+
+
+def parse_member(line: str) -> Union[Attribute, Method, str]:
+    """Parse one line of a class body; separators and unknown lines stay strings."""
+    text = line.strip()
+    if not text or SEPARATOR.match(text):
+        return text
+    modifiers = []
+    text = _take_modifiers(text, modifiers)
+    visibility = ''
+    if text and text[0] in VISIBILITY:
+        visibility = text[0]
+        # "{abstract}" may also follow the visibility: "+{abstract} draw()"
+        text = _take_modifiers(text[1:].strip(), modifiers)
+
+    paren = text.find('(')
+    if paren > 0 and text.rfind(')') > paren:
+        close = text.rfind(')')
+        head = text[:paren].strip()
+        return_type = text[close + 1:].strip()
+        if return_type.startswith(':'):
+            return_type = return_type[1:].strip()
+        if ' ' in head:
+            # Java style: "String getName(...)"
+            return_type, head = head.rsplit(None, 1)
+        return Method(head, _split_parameters(text[paren + 1:close]), return_type or None,
+                      visibility, tuple(modifiers))
+
+    default = None
+    if '=' in text:
+        text, default = (part.strip() for part in text.split('=', 1))
+    if ':' in text:
+        name, type_ = (part.strip() for part in text.split(':', 1))
+    elif ' ' in text:
+        type_, name = text.rsplit(None, 1)
+    else:
+        name, type_ = text, None
+    return Attribute(name, type_ or None, visibility, tuple(modifiers), default)
+
+
+def parse_chen_attribute(line: str) -> Attribute:
+    """Parse a Chen attribute line ("Name : TYPE <<key>>" or "Name {"); unknown lines keep their text as the name."""
+    match = CHEN_ATTRIBUTE.match(line.strip())
+    if not match:
+        return Attribute(line.strip())
+    name, type_, stereotype, _ = match.groups()
+    return Attribute(name, type_.strip() if type_ else None, stereotype=stereotype)
+
+
+def parse_diagram(code: str) -> Diagram:
+    """
+    Parse a class diagram or a @startchen ER diagram.
+
+    Args:
+        code: PlantUML source
+
+    Returns:
+        Diagram with ClassNode / Entity / Relationship nodes; every other line
+        is kept verbatim
+    """
+    tokens = tokenize(code)
+    is_chen = any(token.keyword == '@startchen' for token in tokens)
+    diagram = Diagram('chen' if is_chen else 'class')
+    bodies = []  # one entry per open brace: the node or attribute it belongs to, or None for verbatim
+
+    for token in tokens:
+        text = token.text
+        stripped = text.strip()
+        indent = text[:len(text) - len(text.lstrip())]
+        owner = bodies[-1] if bodies else None
+
+        if stripped.startswith('}') and bodies:
+            closes = max(1, token.code.count('}') - token.code.count('{'))
+            closed = [bodies.pop() for _ in range(min(closes, len(bodies)))]
+            if None in closed:
+                diagram.items.append(('', text))
+            continue
+
+        if token.kind == MEMBER and owner is not None:
+            if isinstance(owner, ClassNode):
+                owner.members.append(parse_member(stripped))
+                continue
+            attribute = parse_chen_attribute(stripped)
+            (owner.attributes if isinstance(owner, Entity) else owner.children).append(attribute)
+            if stripped.endswith('{') and not stripped.endswith('{}'):
+                bodies.append(attribute)
+            continue
+
+        node = None
+        opens = False
+        if token.kind == DECLARATION:
+            if is_chen:
+                match = CHEN_DECLARATION.match(stripped)
+                if match:
+                    node = Entity(match.group(2), match.group(1).lower(), match.group(3))
+                    opens = match.group(4) == '{'
+            else:
+                match = CLASS_DECLARATION.match(stripped)
+                if match:
+                    kind = re.sub(r'\s+', ' ', match.group(1))
+                    name = match.group(2) or match.group(3)
+                    node = ClassNode(name, kind, match.group(2) is not None,
+                                     match.group(4) or match.group(6), match.group(5), match.group(7))
+                    opens = match.group(8) == '{'
+        elif token.kind == RELATIONSHIP:
+            node = _parse_relationship(stripped, is_chen)
+
+        if node is None:
+            diagram.items.append(('', text))
+            # Keep brace bookkeeping for verbatim blocks (packages, skinparam, ...)
+            net = token.code.count('{') - token.code.count('}')
+            if net > 0:
+                bodies.extend([None] * net)
+            continue
+
+        diagram.items.append((indent, node))
+        if opens:
+            bodies.append(node)
+
+    return diagram
+
+
+def _parse_relationship(line: str, is_chen: bool) -> Optional[Relationship]:
+    if is_chen:
+        match = CHEN_LINK.match(line)
+        if match and match.group(2) == match.group(4):
+            source, line_char, card, _, target = match.groups()
+            cardinality = Cardinality(card, total=line_char == '=') if card or line_char == '=' else None
+            return Relationship(source, target, f"{line_char}{card}{line_char}", 'link',
+                                target_cardinality=cardinality)
+    match = RELATIONSHIP_LINE.match(line)
+    if not match:
+        return None
+    source = match.group(1) or match.group(2)
+    target = match.group(6) or match.group(7)
+    source_cardinality = Cardinality(match.group(3)) if match.group(3) is not None else None
+    target_cardinality = Cardinality(match.group(5)) if match.group(5) is not None else None
+    return Relationship(source, target, match.group(4), None, source_cardinality,
+                        target_cardinality, match.group(8) or None)
+
+
+def _quote(name: str, quoted: bool) -> str:
+    return f'"{name}"' if quoted or not re.match(r'^[\w.$]+$', name) else name
+
+
+def _serialize_attribute(attribute: Attribute, indent: str, lines: List[str], chen: bool) -> None:
+    if chen:
+        text = attribute.name
+        if attribute.type:
+            text += f" : {attribute.type}"
+        if attribute.stereotype:
+            text += f" <<{attribute.stereotype}>>"
+        if attribute.children:
+            lines.append(f"{indent}{text} {{")
+            for child in attribute.children:
+                _serialize_attribute(child, indent + '  ', lines, chen)
+            lines.append(f"{indent}}}")
+            return
+        lines.append(indent + text)
+        return
+
+    text = ''.join(f"{{{modifier}}} " for modifier in attribute.modifiers)
+    text += attribute.visibility + attribute.name
+    if attribute.type:
+        text += f" : {attribute.type}"
+    if attribute.default is not None:
+        text += f" = {attribute.default}"
+    lines.append(indent + text)
+
+
+def _serialize_method(method: Method) -> str:
+    parameters = ', '.join(
+        f"{parameter.name} : {parameter.type}" if parameter.type else parameter.name
+        for parameter in method.parameters
+    )
+    text = ''.join(f"{{{modifier}}} " for modifier in method.modifiers)
+    text += f"{method.visibility}{method.name}({parameters})"
+    if method.return_type:
+        text += f" : {method.return_type}"
+    return text
+
+
+def _serialize_class(node: ClassNode, indent: str, lines: List[str]) -> None:
+    header = f"{node.kind} {_quote(node.name, node.quoted)}"
+    if node.alias:
+        header += f" as {node.alias}"
+    if node.generic:
+        header += f"<{node.generic}>"
+    if node.stereotype:
+        header += f" <<{node.stereotype}>>"
+    if not node.members:
+        lines.append(indent + header)
+        return
+    lines.append(f"{indent}{header} {{")
+    for member in node.members:
+        if isinstance(member, Method):
+            lines.append(f"{indent}  {_serialize_method(member)}")
+        elif isinstance(member, Attribute):
+            _serialize_attribute(member, indent + '  ', lines, chen=False)
+        else:
+            lines.append(f"{indent}  {member}")
+    lines.append(f"{indent}}}")
+
+
+def _serialize_entity(node: Entity, indent: str, lines: List[str]) -> None:
+    header = f"{node.kind} {node.name}"
+    if node.stereotype:
+        header += f" <<{node.stereotype}>>"
+    if not node.attributes:
+        lines.append(f"{indent}{header} {{}}" if node.kind == 'relationship' else indent + header)
+        return
+    lines.append(f"{indent}{header} {{")
+    for attribute in node.attributes:
+        _serialize_attribute(attribute, indent + '  ', lines, chen=True)
+    lines.append(f"{indent}}}")
+
+
+def _serialize_relationship(relationship: Relationship) -> str:
+    if relationship.kind == 'link':
+        return f"{relationship.source} {relationship.arrow} {relationship.target}"
+    parts = [_quote(relationship.source, False)]
+    if relationship.source_cardinality is not None:
+        parts.append(f'"{relationship.source_cardinality.text}"')
+    parts.append(relationship.arrow)
+    if relationship.target_cardinality is not None:
+        parts.append(f'"{relationship.target_cardinality.text}"')
+    parts.append(_quote(relationship.target, False))
+    text = ' '.join(parts)
+    if relationship.label:
+        text += f" : {relationship.label}"
+    return text
@@ -0,0 +1,211 @@
+"""
+Canonical form and fingerprint of PlantUML and Chen sources, so caches can
+key on what a diagram says rather than how it is formatted.
+
+Two levels:
+    layout    Only rewrites that render identically: line endings, comments,
+              blank lines, indentation, spacing around arrows and labels, and
+              quotes around plain identifiers. Used for rendered output.
+    semantic  The layout form without styling (skinparam / !theme, including
+              the block _add_styling injects), with whitespace collapsed and
+              class / ER diagrams re-serialized through plantuml_ir with their
+              top-level declarations and relationships sorted. Used for
+              anything derived from the diagram's content (generated code).
+"""
+import hashlib
+import re
+from typing import List, Optional
+
+from plantuml_tokens import tokenize, BLANK, COMMENT, NOTE, STRING, DECLARATION, RELATIONSHIP
+from plantuml_ir import parse_diagram, ClassNode, Diagram, Entity, Relationship, RELATIONSHIP_LINE
+from validation_engine import canonical_diagram_type
+
+LAYOUT = 'layout'
+SEMANTIC = 'semantic'
+
+# Bump when the normalization rules change, so old fingerprints stop matching
+NORMALIZER_VERSION = 1
+
+STYLING_KEYWORDS = frozenset({'skinparam', '!theme'})
+# Diagram types whose top-level declarations and relationships are unordered sets
+SORTABLE_DIAGRAM_TYPES = frozenset({'Class Diagram', 'ER Diagram'})
+CLASS_KEYWORDS = frozenset({'class', 'interface', 'enum', 'abstract', 'annotation'})
+
+IDENTIFIER = re.compile(r'^[A-Za-z_][\w.$]*$')
+QUOTED_DECLARATION_NAME = re.compile(r'^((?:abstract\s+)?[\w]+\s+)"([A-Za-z_][\w.$]*)"(?=[\s{<]|$)')
+OPENING_BRACE = re.compile(r'\s*\{$')
+STRING_OR_SPACE = re.compile(r'("[^"\n]*")|\s+')
+
+
+def _unquote(name: str) -> str:
+    return name if IDENTIFIER.match(name) else f'"{name}"'
+
+
+def _relationship_line(stripped: str) -> str:
+    """Relationship with single spaces around the arrow and " : " before the label."""
+    match = RELATIONSHIP_LINE.match(stripped)
+    if match is None:
+        return stripped
+    source, source_card, arrow, target_card, target, label = (
+        match.group(1) or match.group(2), match.group(3), match.group(4),
+        match.group(5), match.group(6) or match.group(7), match.group(8))
+    parts = [_unquote(source)]
+    if source_card is not None:
+        parts.append(f'"{source_card}"')
+    parts.append(arrow)
+    if target_card is not None:
+        parts.append(f'"{target_card}"')
+    parts.append(_unquote(target))
+    text = ' '.join(parts)
+    if label:
+        text += f" : {label}"
+    return text
+
+
+def _declaration_line(stripped: str) -> str:
+    """Declaration without quotes around a plain name and with " {" before a body."""
+    stripped = QUOTED_DECLARATION_NAME.sub(r'\1\2', stripped)
+    if stripped.endswith('{') and not stripped.endswith('{}'):
+        stripped = OPENING_BRACE.sub(' {', stripped)
+    return stripped
+
+
+def _collapse_whitespace(text: str) -> str:
+    """Single spaces between words, quoted strings untouched."""
+    return STRING_OR_SPACE.sub(lambda match: match.group(1) or ' ', text)
+
+
+def _layout_lines(code: str) -> List[str]:
+    lines = []
+    previous = None
+    for token in tokenize(code.replace('\r\n', '\n').replace('\r', '\n')):
+        kind = token.kind
+        if kind == COMMENT:
+            continue
+        if kind == BLANK:
+            # Blank lines only show inside multi-line notes and text blocks
+            if previous in (NOTE, STRING):
+                lines.append('')
+            continue
+        previous = kind
+        if kind in (NOTE, STRING):
+            lines.append(token.text.rstrip())
+        elif kind == RELATIONSHIP:
+            lines.append(_relationship_line(token.text.strip()))
+        elif kind == DECLARATION:
+            lines.append(_declaration_line(token.text.strip()))
+        else:
+            lines.append(token.text.strip())
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def _without_styling(lines: List[str]) -> List[str]:
+    kept = []
+    depth = 0
+    for token in tokenize('\n'.join(lines)):
+        if depth:
+            depth += token.code.count('{') - token.code.count('}')
+            continue
+        if token.keyword in STYLING_KEYWORDS:
+            depth = max(0, token.code.count('{') - token.code.count('}'))
+            continue
+        if token.kind in (NOTE, STRING, BLANK):
+            kept.append(token.text)
+        else:
+            kept.append(_collapse_whitespace(token.text))
+    return kept
+
+
+def _is_sortable(code: str, diagram_type: Optional[str]) -> bool:
+    canonical = canonical_diagram_type(diagram_type)
+    if canonical is not None:
+        return canonical in SORTABLE_DIAGRAM_TYPES
+    tokens = tokenize(code)
+    if any(token.keyword == '@startchen' for token in tokens):
+        return True
+    # "entity" alone is also a sequence participant, so only class keywords count
+    return any(token.kind == DECLARATION and token.keyword in CLASS_KEYWORDS for token in tokens)
+
+
+def _sorted_diagram(code: str) -> str:
+    """
+    Serialize through the IR with each run of top-level declarations and
+    relationships sorted; verbatim lines (packages, notes, directives) stay
+    where they are and bound the runs.
+    """
+    diagram = parse_diagram(code)
+    items = []
+    run = []
+    depth = 0  # braces opened by verbatim lines (packages, ...)
+
+    def flush():
+        run.sort(key=lambda item: (isinstance(item[1], Relationship), _serialized(item)))
+        items.extend(run)
+        run.clear()
+
+    for indent, item in diagram.items:
+        if isinstance(item, str):
+            flush()
+            items.append((indent, item))
+            if '{' in item or '}' in item:
+                token = tokenize(item)[0]
+                depth = max(0, depth + token.code.count('{') - token.code.count('}'))
+        elif depth == 0 and isinstance(item, (ClassNode, Entity, Relationship)):
+            run.append(('', item))
+        else:
+            flush()
+            items.append((indent, item))
+    flush()
+    diagram.items = items
+    return diagram.serialize()
+
+
+def _serialized(item) -> str:
+    return Diagram(items=[item]).serialize()
+
+
+def normalize(code: str, level: str = SEMANTIC, diagram_type: Optional[str] = None) -> str:
+    """
+    Canonicalize PlantUML or Chen source.
+
+    Args:
+        code: PlantUML source
+        level: LAYOUT (renders identically) or SEMANTIC (same content)
+        diagram_type: Diagram type in any spelling; decides at the semantic
+            level whether declarations may be reordered (detected from the
+            source when omitted)
+
+    Returns:
+        Normalized source
+    """
+    if level not in (LAYOUT, SEMANTIC):
+        raise ValueError(f"Unknown normalization level: {level!r}")
+    lines = _layout_lines(code)
+    if level == LAYOUT:
+        return '\n'.join(lines)
+
+    normalized = '\n'.join(_without_styling(lines))
+    if _is_sortable(normalized, diagram_type):
+        normalized = _sorted_diagram(normalized)
+    return normalized
+
+
+def fingerprint(code: str, level: str = SEMANTIC, diagram_type: Optional[str] = None) -> str:
+    """
+    Stable hash of a diagram's canonical form, for use as (part of) a cache key.
+
+    Args:
+        code: PlantUML source
+        level: LAYOUT for anything rendered from the source, SEMANTIC for
+            anything derived from its content
+        diagram_type: Diagram type in any spelling (see normalize)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{NORMALIZER_VERSION}\0{level}\0".encode('utf-8'))
+    digest.update(normalize(code, level, diagram_type).encode('utf-8'))
+    return digest.hexdigest()
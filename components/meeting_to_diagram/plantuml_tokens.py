@@ -0,0 +1,219 @@
+"""
+Single-pass line tokenizer for PlantUML source.
+Every line is classified once (directive, declaration, member, relationship,
+statement, note, comment, string or blank) and carries a masked copy of its
+code in which quoted strings, inline comments and free-text labels are
+blanked out, so cleaning and validation rules can run per line without firing
+inside labels or comments.
+"""
+import re
+from typing import List
+
+BLANK = 'blank'
+COMMENT = 'comment'
+DIRECTIVE = 'directive'
+DECLARATION = 'declaration'
+MEMBER = 'member'
+RELATIONSHIP = 'relationship'
+STATEMENT = 'statement'
+NOTE = 'note'
+STRING = 'string'
+
+# Kinds whose masked code takes part in syntax checks
+CODE_KINDS = frozenset({DIRECTIVE, DECLARATION, MEMBER, RELATIONSHIP, STATEMENT})
+
+DIRECTIVE_KEYWORDS = frozenset({
+    'skinparam', 'hide', 'show', 'title', 'caption', 'scale', 'autonumber',
+    'left', 'top', 'allowmixing', 'allow_mixing', 'start', 'stop', 'newpage',
+    'header', 'footer', 'legend', 'endlegend', 'remove', 'restore', 'set',
+})
+DECLARATION_KEYWORDS = frozenset({
+    'class', 'interface', 'enum', 'annotation', 'abstract', 'entity',
+    'relationship', 'participant', 'actor', 'boundary', 'control', 'database',
+    'collections', 'queue', 'usecase', 'component', 'package', 'node',
+    'folder', 'frame', 'cloud', 'rectangle', 'namespace', 'object', 'artifact',
+    'storage', 'card', 'agent', 'state', 'map', 'file', 'hexagon', 'person',
+    'together', 'partition',
+})
+# Declarations whose { ... } body holds members rather than other declarations
+MEMBER_BODY_KEYWORDS = frozenset({
+    'class', 'interface', 'enum', 'annotation', 'abstract', 'entity',
+    'relationship', 'object', 'map',
+})
+MODIFIERS = frozenset({'abstract', 'static', 'public', 'private', 'protected'})
+NOTE_KEYWORDS = frozenset({'note', 'hnote', 'rnote'})
+# Blocks of free text closed by "end<keyword>" / "end <keyword>"
+TEXT_BLOCK_KEYWORDS = frozenset({'legend', 'title', 'header', 'footer'})
+
+KEYWORD_PATTERN = re.compile(r'[@!]?\w+')
+STRING_LITERAL = re.compile(r'"[^"\n]*"')
+INLINE_COMMENT = re.compile(r"/'.*?'/")
+ARROW_PATTERN = re.compile(
+    r'<\|?[-.]|[-.]\|?>|--|\.\.|-\[[^\]]*\]-|-(?:up|down|left|right|[udlrNM1]|\d+|\([^)]*\))-|=[NM1]?='
+)
+ACTOR_SHORTHAND = re.compile(r':[^:;]+:')
+NOTE_END = re.compile(r'end\s*(note|ref)\b')
+# Directive lines (@enduml, !include, ...) that end an unterminated note,
+# text block or activity label instead of being swallowed by it
+BLOCK_BREAK = re.compile(r'(?:@(?:start|end)[a-z]+|![a-z]+)\b')
+
+
+class LineToken:
+    """One classified source line."""
+
+    __slots__ = ('number', 'kind', 'keyword', 'text', 'code', 'depth')
+
+    def __init__(self, number: int, kind: str, keyword: str, text: str, code: str, depth: int):
+        self.number = number    # 1-based line number
+        self.kind = kind
+        self.keyword = keyword  # lowercased first word ("class", "@startuml", ...) or ""
+        self.text = text        # the line as written
+        self.code = code        # text with strings, comments and labels blanked out
+        self.depth = depth      # brace nesting depth before this line
+
+    def __repr__(self):
+        return f"LineToken({self.number}, {self.kind!r}, {self.text!r})"
+
+
+def _keyword(lowered: str) -> str:
+    """First word of a line, skipping modifiers in front of a declaration keyword."""
+    match = KEYWORD_PATTERN.match(lowered)
+    if match is None:
+        return ''
+    keyword = match.group(0)
+    if keyword in MODIFIERS:
+        words = lowered.split(None, 2)
+        if len(words) > 1:
+            match = KEYWORD_PATTERN.match(words[1])
+            if match and match.group(0) in DECLARATION_KEYWORDS:
+                return match.group(0)
+    return keyword
+
+
+def _strip_label(code: str) -> str:
+    """Drop the free-text label after the first colon of a relationship."""
+    index = code.find(':')
+    return code[:index] if index >= 0 else code
+
+
+def tokenize(code: str) -> List[LineToken]:
+    """
+    Classify every line of PlantUML source in one pass.
+
+    Args:
+        code: PlantUML source
+
+    Returns:
+        One LineToken per line, in order
+    """
+    tokens = []
+    bodies = []          # stack of open brace bodies: 'members', 'directive' or 'container'
+    block_comment = False
+    note_block = False
+    text_block = None    # keyword of an open legend/title/... block
+    label_open = False   # multi-line activity label waiting for its ';'
+
+    for number, text in enumerate(code.split('\n'), 1):
+        stripped = text.strip()
+        depth = len(bodies)
+
+        if block_comment:
+            if "'/" in stripped:
+                block_comment = False
+            tokens.append(LineToken(number, COMMENT, '', text, '', depth))
+            continue
+        if not stripped:
+            tokens.append(LineToken(number, BLANK, '', text, '', depth))
+            continue
+        first = stripped[0]
+        if first == "'":
+            tokens.append(LineToken(number, COMMENT, '', text, '', depth))
+            continue
+        if first == '/' and stripped.startswith("/'"):
+            block_comment = "'/" not in stripped[2:]
+            tokens.append(LineToken(number, COMMENT, '', text, '', depth))
+            continue
+        lowered = stripped.lower()
+        if (note_block or text_block or label_open) and first in '@!' and BLOCK_BREAK.match(lowered):
+            note_block = label_open = False
+            text_block = None
+        if note_block:
+            note_block = not NOTE_END.match(lowered)
+            tokens.append(LineToken(number, NOTE, '', text, '', depth))
+            continue
+        if text_block:
+            if re.match(rf'end\s*{text_block}\b', lowered):
+                tokens.append(LineToken(number, DIRECTIVE, 'end' + text_block, text, stripped, depth))
+                text_block = None
+            else:
+                tokens.append(LineToken(number, STRING, '', text, '', depth))
+            continue
+        if label_open:
+            label_open = stripped[-1] != ';'
+            tokens.append(LineToken(number, STRING, '', text, '', depth))
+            continue
+
+        masked = STRING_LITERAL.sub('""', stripped) if '"' in stripped else stripped
+        if "/'" in masked:
+            masked = INLINE_COMMENT.sub('', masked)
+            if "/'" in masked:
+                masked = masked[:masked.index("/'")]
+                block_comment = True
+        keyword = _keyword(lowered)
+        body = bodies[-1] if bodies else None
+
+        if first == '@' or first == '!':
+            kind = DIRECTIVE
+        elif body == 'members' and first != '}':
+            # Attribute names such as "title" or "left" are not directives here
+            kind = MEMBER
+        elif keyword in NOTE_KEYWORDS:
+            kind = NOTE
+            note_block = ':' not in masked
+            masked = ''
+        elif keyword in TEXT_BLOCK_KEYWORDS and lowered == keyword:
+            kind = DIRECTIVE
+            text_block = keyword
+        elif keyword in DIRECTIVE_KEYWORDS and not ARROW_PATTERN.search(masked):
+            kind = DIRECTIVE
+        elif first == '}':
+            kind = DIRECTIVE if body == 'directive' else DECLARATION
+        elif body == 'directive':
+            kind = DIRECTIVE
+        elif keyword in DECLARATION_KEYWORDS and not ARROW_PATTERN.search(masked):
+            kind = DECLARATION
+        elif first == ':' and (stripped[-1] == ';' or not ACTOR_SHORTHAND.match(stripped)):
+            # Activity: the label is free text
+            label_open = stripped[-1] != ';'
+            kind = STATEMENT
+            masked = ':' if label_open else ':;'
+        elif first in '=.|' and stripped.startswith(('==', '...', '|')):
+            # Sequence dividers/delays and activity swimlanes
+            kind = STATEMENT
+            masked = ''
+        elif ARROW_PATTERN.search(masked):
+            kind = RELATIONSHIP
+            masked = _strip_label(masked)
+        elif first in '[(:':
+            kind = DECLARATION
+        else:
+            kind = STATEMENT
+
+        tokens.append(LineToken(number, kind, keyword, text, masked, depth))
+
+        # Track brace bodies so member lines can be told apart from declarations
+        if '{' in masked or '}' in masked:
+            opens, closes = masked.count('{'), masked.count('}')
+            if closes > opens:
+                del bodies[max(0, len(bodies) - (closes - opens)):]
+            elif opens > closes:
+                if keyword == 'skinparam' or kind == DIRECTIVE:
+                    body = 'directive'
+                elif kind == MEMBER or (kind == DECLARATION and keyword in MEMBER_BODY_KEYWORDS):
+                    # Composite attributes nest inside a member body
+                    body = 'members'
+                else:
+                    body = 'container'
+                bodies.extend([body] * (opens - closes))
+
+    return tokens
@@ -2,57 +2,348 @@
 Simplified utility functions for PlantUML code processing and validation.
 Focused on cleaning and validation with AI revision capability.
 """
+import difflib
 import re
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import Dict, List, Optional, Tuple, Callable
 
+from plantuml_tokens import (
+    tokenize, LineToken, STRING_LITERAL, CODE_KINDS,
+    DIRECTIVE, DECLARATION, MEMBER, RELATIONSHIP, STATEMENT, NOTE, STRING,
+)
+from validation_engine import anchor_word_start, canonical_diagram_type, check_patterns, ERROR, WARNING
+
+# Sampling temperatures and prompt suffixes used by speculative generation.
+# Candidate i uses entry i modulo the list length, so N candidates spread over
+# both a temperature range and a few differently-phrased requests.
+SPECULATIVE_TEMPERATURES = [0.05, 0.3, 0.6]
+SPECULATIVE_PROMPT_VARIANTS = [
+    "",
+    "\nBefore answering, double-check every line against the syntax rules above.",
+    "\nKeep the diagram focused: include only the most important elements and relationships.",
+]
+
+# Validation messages that point at specific lines, with the per-line pattern
+# that triggers them. Used by compact revision to send only the failing lines.
+ERROR_LINE_PATTERNS = [
+    ("Invalid arrow syntax", re.compile(r'-->\s*-->')),
+]
+LINE_NUMBER_PREFIX = re.compile(r'^Line (\d+)\b')
+UNMATCHED_BRACKETS_PREFIX = re.compile(r'^Unmatched (\S)(\S) brackets')
+
+# Replacement block returned by the model in compact revision mode:
+# <<<< START-END / replacement lines / >>>>
+REVISION_BLOCK_PATTERN = re.compile(
+    r'^<<<<\s*(\d+)\s*-\s*(\d+)\s*$\n?(.*?)^>>>>\s*$',
+    re.MULTILINE | re.DOTALL
+)
+
+
+# Fix rules run per line on the token stream (see plantuml_tokens): each table
+# maps a line kind to the (pattern, replacement) pairs applied to lines of that
+# kind, in order. Comments, notes and free-text lines are never rewritten.
+CODE_LINE_KINDS = (DECLARATION, MEMBER, RELATIONSHIP, STATEMENT)
+
+
+def _line_local(pattern: str) -> str:
+    """
+    Rewrite a pattern so it can never match across a newline: \\s becomes
+    "whitespace except newline" and negated classes also exclude newlines.
+    """
+    out = []
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\' and i + 1 < len(pattern):
+            escape = pattern[i:i + 2]
+            if escape == '\\s':
+                escape = ' \\t\\r\\f\\v' if in_class else '[^\\S\\n]'
+            out.append(escape)
+            i += 2
+            continue
+        if not in_class and char == '[':
+            in_class = True
+            if pattern.startswith('[^', i):
+                out.append('[^\\n')
+                i += 2
+                continue
+        elif in_class and char == ']' and pattern[i - 1] not in '[^':
+            in_class = False
+        out.append(char)
+        i += 1
+    return ''.join(out)
+
+
+def _compile_fixes(fixes, flags=0):
+    """
+    Compile (pattern, replacement) pairs once at import.
+    
+    Patterns are made line-local (see _line_local) so a rule can run once over
+    all lines of a kind joined with newlines. Patterns that start with a word
+    are anchored with \\b (validation_engine.anchor_word_start) so a failed
+    match is not retried from every character inside that word.
+    """
+    return [(re.compile(_line_local(anchor_word_start(pattern)), flags | re.MULTILINE), replacement)
+            for pattern, replacement in fixes]
+
+
+def _for_kinds(kinds, fixes):
+    """Table entry applying the same compiled fixes to several line kinds."""
+    return {kind: fixes for kind in kinds}
+
+
+# Type names are only rewritten outside quoted labels
+COMMON_TYPE_FIXES = _compile_fixes([
+    (r':\w+\+', ': String'),
+    (r':\s*(\w+)\s*-->', ': String'),
+    (r'\bstring\b', 'String'),
+    (r'\bint\b', 'Integer'),
+    (r'\bbool\b', 'Boolean'),
+    (r'\bfloat\b', 'Double'),
+], re.IGNORECASE)
+
+COMMON_FIXES = _for_kinds(CODE_LINE_KINDS, _compile_fixes([
+    # Arrow fixes
+    (r'-->\s*\w+\s*-->', '-->'),
+    (r'<<include>>', '-->'),
+    (r'<<extend>>', '-->'),
+    (r'<--', '--'),
+    
+    # Syntax fixes
+    (r'{\s*{', '{'),
+    (r'}\s*}', '}'),
+    (r'\(\s*\(', '('),
+    (r'\)\s*\)', ')'),
+    (r'\[\s*\[', '['),
+    (r'\]\s*\]', ']'),
+], re.IGNORECASE))
+
+CLASS_RELATIONSHIP_FIXES = _compile_fixes([
+    # Convert old syntax to correct PlantUML syntax; reversed arrows swap ends
+    # so the parent / whole stays on the decorated side
+    (r'\b(\w+)\s*--\|>\s*(\w+)', r'\2 <|-- \1'),
+    (r'\b(\w+)\s*-\|>\s*(\w+)', r'\2 <|-- \1'),
+    (r'\b(\w+)\s*<\|\.\s*(\w+)', r'\1 <|.. \2'),
+    (r'\b(\w+)\s*--\*\s*(\w+)', r'\2 *-- \1'),
+    (r'\b(\w+)\s*o-\s*(\w+)', r'\1 o-- \2'),
+    (r'\b(\w+)\s*-->\s*(\w+)', r'\1 --> \2'),
+    # Fix cardinality with double quotes and proper spacing
+    (r'\b(\w+)\s+"(\d+|\*|many)"\s*(\*--|o--|-->)\s*"(\d+|\*|many)"\s*(\w+)', r'\1 "\2" \3 "\4" \5'),
+    (r'\b(\w+)\s+"(\d+|\*|many)"\s*(\*--|o--|-->)\s*(\w+)', r'\1 "\2" \3 \4'),
+    (r'\b(\w+)\s*(\*--|o--|-->)\s*"(\d+|\*|many)"\s*(\w+)', r'\1 \2 "\3" \4'),
+])
+CLASS_MEMBER_FIXES = _compile_fixes([
+    # Fix attribute declarations
+    (r'([+\-#])\s*(\w+)\s*:\s*(\w+)', r'\1\2: \3'),
+    # Fix method declarations
+    (r'([+\-#])\s*(\w+)\s*\(\s*\)\s*:\s*(\w+)', r'\1\2(): \3'),
+])
+CLASS_FIXES = {
+    DECLARATION: _compile_fixes([
+        # Fix class declarations
+        (r'class\s+(\w+)\s*{\s*{', r'class \1 {'),
+        (r'}\s*}', '}'),
+    ]),
+    MEMBER: CLASS_MEMBER_FIXES,
+    RELATIONSHIP: CLASS_RELATIONSHIP_FIXES,
+    STATEMENT: CLASS_MEMBER_FIXES + CLASS_RELATIONSHIP_FIXES,
+}
+
+SEQUENCE_FIXES = {
+    DECLARATION: _compile_fixes([
+        # Fix participant declarations
+        (r'participant\s+"([^"]+)"\s+as\s+(\w+)', r'participant "\1" as \2'),
+        (r'participant\s+(\w+)', r'participant \1'),
+    ]),
+    RELATIONSHIP: _compile_fixes([
+        # Fix arrows
+        (r'\b(\w+)\s*->\s*(\w+)\s*:\s*(.+)', r'\1 -> \2 : \3'),
+        (r'\b(\w+)\s*-->\s*(\w+)\s*:\s*(.+)', r'\1 --> \2 : \3'),
+        (r'\b(\w+)\s*->>\s*(\w+)\s*:\s*(.+)', r'\1 ->> \2 : \3'),
+    ]),
+    NOTE: _compile_fixes([
+        # Fix notes
+        (r'note\s+(left|right|over)\s+(of\s+)?(\w+)\s*:\s*(.+)', r'note \1 of \3 : \4'),
+    ]),
+}
+
+ACTIVITY_FIXES = {
+    STATEMENT: _compile_fixes([
+        # Fix activities
+        (r':([^;]+);', lambda m: f':{m.group(1).strip()};'),
+        # Fix conditions
+        (r'if\s*\(([^)]+)\)\s*then\s*\(([^)]*)\)', r'if (\1) then (\2)'),
+        (r'else\s*\(([^)]*)\)', r'else (\1)'),
+    ]),
+}
+
+COMPONENT_FIXES = {
+    DECLARATION: _compile_fixes([
+        # Fix component declarations
+        (r'\[([^\]]+)\]', r'[\1]'),
+        (r'component\s+"([^"]+)"\s+as\s+(\w+)', r'component "\1" as \2'),
+        # Fix interfaces
+        (r'interface\s+"([^"]+)"\s+as\s+(\w+)', r'interface "\1" as \2'),
+    ]),
+    RELATIONSHIP: _compile_fixes([
+        # Fix connections
+        (r'(\[[\w\s]+\]|\b\w+)\s*-->\s*(\[[\w\s]+\]|\b\w+)\s*:\s*(.+)', r'\1 --> \2 : \3'),
+        (r'(\[[\w\s]+\]|\b\w+)\s*-->\s*(\[[\w\s]+\]|\b\w+)', r'\1 --> \2'),
+    ]),
+}
+
+USECASE_ASSOCIATION_FIXES = _compile_fixes([
+    # Fix associations
+    (r'\b(\w+)\s*-->\s*\(([^)]+)\)', r'\1 --> (\2)'),
+    (r'\b(\w+)\s*--\|>\s*(\w+)', r'\1 --|> \2'),
+])
+USECASE_FIXES = {
+    DECLARATION: _compile_fixes([
+        # Fix actor declarations
+        (r'actor\s+"([^"]+)"\s+as\s+(\w+)', r'actor "\1" as \2'),
+        (r'actor\s+(\w+)', r'actor \1'),
+        # Fix use case declarations
+        (r'usecase\s+"([^"]+)"\s+as\s+(\w+)', r'usecase "\1" as \2'),
+    ]),
+    RELATIONSHIP: USECASE_ASSOCIATION_FIXES,
+    STATEMENT: USECASE_ASSOCIATION_FIXES,
+}
+
+# Chen ERD fixes; only applied to @startchen diagrams
+ERD_RELATIONSHIP_FIXES = _compile_fixes([
+    # Fix relationship connections
+    (r'\b(\w+)\s+"1"\s*--\s*"\*"\s*(\w+)', r'\1 -1- \2'),
+    (r'\b(\w+)\s*-->\s*(\w+)', r'\1 -N- \2'),
+    (r'\b(\w+)\s*--\|>\s*(\w+)', r'\1 -1- \2'),
+    (r'\b(\w+)\s*<\|--\s*(\w+)', r'\1 -1- \2'),
+])
+ERD_FIXES = {
+    DECLARATION: _compile_fixes([
+        # Replace class with entity
+        (r'\bclass\s+(\w+)', r'entity \1'),
+    ], re.IGNORECASE) + _compile_fixes([
+        # Fix entity declarations
+        (r'entity\s+(\w+)\s*{\s*{', r'entity \1 {'),
+    ]),
+    MEMBER: _compile_fixes([
+        # Fix attribute syntax
+        (r'\b(\w+)\s*:\s*([A-Z][a-z]+)', r'\1 : \2'),
+        (r'\b(\w+)\s*:\s*([a-z][a-z]*)', lambda m: f'{m.group(1)} : {m.group(2).upper()}'),
+        # Remove method definitions with ()
+        (r'^\s*\w+\s*\([^)]*\)\s*:.*', ''),
+    ]),
+    RELATIONSHIP: ERD_RELATIONSHIP_FIXES,
+    STATEMENT: ERD_RELATIONSHIP_FIXES,
+}
+
+START_PATTERN = re.compile(r'@startuml', re.IGNORECASE)
+END_PATTERN = re.compile(r'@enduml', re.IGNORECASE)
+START_CHEN_PATTERN = re.compile(r'@startchen', re.IGNORECASE)
+END_CHEN_PATTERN = re.compile(r'@endchen', re.IGNORECASE)
+ARROW_CHAIN_PATTERN = re.compile(r'-->\s*-->')
+COMPONENT_SHORTHAND_PATTERN = re.compile(r'\[[\w\s]+\]')
+USECASE_SHORTHAND_PATTERN = re.compile(r'\([^)]+\)')
+BRACKETS = {'(': ')', '[': ']', '{': '}'}
+
+# Diagram type (matched as a substring) -> fix
+# tables. Types not listed run every table.
+DIAGRAM_FIXERS = [
+    ('Class Diagram', (CLASS_FIXES,)),
+    ('Sequence Diagram', (SEQUENCE_FIXES,)),
+    ('Flowchart', (ACTIVITY_FIXES,)),
+    ('Activity', (ACTIVITY_FIXES,)),
+    ('Component Diagram', (COMPONENT_FIXES,)),
+    ('Use Case Diagram', (USECASE_FIXES,)),
+    ('Usecase Diagram', (USECASE_FIXES,)),
+    ('ER Diagram', (ERD_FIXES,)),
+]
+ALL_FIXERS = (CLASS_FIXES, SEQUENCE_FIXES, ACTIVITY_FIXES, COMPONENT_FIXES, USECASE_FIXES, ERD_FIXES)
+
+# Participant keywords of sequence diagrams
+SEQUENCE_PARTICIPANTS = frozenset({
+    'participant', 'actor', 'boundary', 'control', 'entity', 'database', 'collections', 'queue'
+})
+
+
+def _merge_fix_tables(tables) -> Dict[str, list]:
+    """Concatenate per-kind fix lists of several tables, keeping table order."""
+    merged = {}
+    for table in tables:
+        for kind, fixes in table.items():
+            merged.setdefault(kind, []).extend(fixes)
+    return merged
+
+
+def _sub_outside_strings(pattern, replacement, text: str) -> str:
+    """Apply a substitution to the parts of a line outside double-quoted strings."""
+    if '"' not in text:
+        return pattern.sub(replacement, text)
+    parts = []
+    position = 0
+    for match in STRING_LITERAL.finditer(text):
+        parts.append(pattern.sub(replacement, text[position:match.start()]))
+        parts.append(match.group(0))
+        position = match.end()
+    parts.append(pattern.sub(replacement, text[position:]))
+    return ''.join(parts)
+
 
 class PlantUMLProcessor:
     """Simplified PlantUML processor with cleaning, validation, and AI revision."""
     
-    def __init__(self):
-        self.common_fixes = {
-            # Type fixes
-            r':\w+\+': ': String',
-            r':\s*(\w+)\s*-->': ': String',
-            r'\bstring\b': 'String',
-            r'\bint\b': 'Integer',
-            r'\bbool\b': 'Boolean',
-            r'\bfloat\b': 'Double',
-            
-            # Arrow fixes
-            r'-->\s*\w+\s*-->': '-->',
-            r'<<include>>': '-->',
-            r'<<extend>>': '-->',
-            r'<--': '--',
-            
-            # Syntax fixes
-            r'{\s*{': '{',
-            r'}\s*}': '}',
-            r'\(\s*\(': '(',
-            r'\)\s*\)': ')',
-            r'\[\s*\[': '[',
-            r'\]\s*\]': ']',
-        }
+    def __init__(self, syntax_checker: Optional[Callable[[str], Dict]] = None):
+        """
+        Args:
+            syntax_checker: Optional renderer-backed checker, e.g.
+                SVGConverter.check_syntax, returning checked, is_valid and
+                "Line N: message" errors. When it runs, its errors replace the
+                heuristic syntax checks.
+        """
+        self.syntax_checker = syntax_checker
+        self._fix_rules = {}
+        self._last_tokens = (None, [])
     
-    def clean_plantuml_output(self, output: str) -> str:
-        """Clean and format PlantUML output with comprehensive fixes."""
+    def clean_plantuml_output(self, output: str, diagram_type: Optional[str] = None) -> str:
+        """
+        Clean and format PlantUML output with comprehensive fixes.
+        
+        The code is tokenized once and every fix rule runs only on lines of the
+        kind it targets, so quoted labels, notes and comments are left alone.
+        Only the fixers for ``diagram_type`` run; without a (known) type every
+        fixer runs.
+        """
         if not output:
             return ""
         
         # Remove text before @startuml and after @enduml
         output = self._extract_plantuml_block(output)
         
-        # Apply common fixes
-        for pattern, replacement in self.common_fixes.items():
-            output = re.sub(pattern, replacement, output, flags=re.IGNORECASE)
+        tokens = tokenize(output)
+        is_chen = any(token.keyword == '@startchen' for token in tokens)
+        rules = self._rules_for(diagram_type, is_chen)
         
-        # Fix specific diagram issues
-        output = self._fix_class_diagram_issues(output)
-        output = self._fix_sequence_diagram_issues(output)
-        output = self._fix_activity_diagram_issues(output)
-        output = self._fix_component_diagram_issues(output)
-        output = self._fix_usecase_diagram_issues(output)
-        output = self._fix_erd_diagram_issues(output)
+        # Rules are line-local, so each runs once over all lines of its kind
+        lines = [token.text for token in tokens]
+        lines_by_kind = {}
+        for index, token in enumerate(tokens):
+            lines_by_kind.setdefault(token.kind, []).append(index)
+        for kind, indexes in lines_by_kind.items():
+            fixes = rules.get(kind)
+            if not fixes:
+                continue
+            text = '\n'.join([lines[i] for i in indexes])
+            if kind in CODE_LINE_KINDS:
+                for pattern, replacement in COMMON_TYPE_FIXES:
+                    text = _sub_outside_strings(pattern, replacement, text)
+            for pattern, replacement in fixes:
+                text = pattern.sub(replacement, text)
+            for index, line in zip(indexes, text.split('\n')):
+                lines[index] = line
+        
+        if ACTIVITY_FIXES in self._fixers_for(diagram_type):
+            lines = self._ensure_start_stop(tokens, lines)
+        output = '\n'.join(lines)
         
         # Add styling if not present
         output = self._add_styling(output)
@@ -62,6 +353,42 @@ class PlantUMLProcessor:
         
         return output.strip()
     
+    @staticmethod
+    def _fixers_for(diagram_type: Optional[str]) -> Tuple[Dict, ...]:
+        """Fix tables relevant to a diagram type."""
+        if diagram_type:
+            for name, fixers in DIAGRAM_FIXERS:
+                if name in diagram_type:
+                    return fixers
+        return ALL_FIXERS
+    
+    def _rules_for(self, diagram_type: Optional[str], is_chen: bool) -> Dict[str, list]:
+        """Per-kind fix rules for a diagram type, merged once and memoized."""
+        fixers = self._fixers_for(diagram_type)
+        key = (tuple(id(table) for table in fixers), is_chen)
+        rules = self._fix_rules.get(key)
+        if rules is None:
+            tables = [COMMON_FIXES] + [table for table in fixers if is_chen or table is not ERD_FIXES]
+            rules = self._fix_rules[key] = _merge_fix_tables(tables)
+        return rules
+    
+    def _ensure_start_stop(self, tokens: List[LineToken], lines: List[str]) -> List[str]:
+        """Add start/stop around activity diagrams that have activities but no start or end."""
+        has_activity = any(token.kind == STATEMENT and token.code.startswith(':') for token in tokens)
+        if not has_activity:
+            return lines
+        keywords = {token.keyword for token in tokens if token.kind in (DIRECTIVE, STATEMENT)}
+        lines = list(lines)
+        if 'start' not in keywords:
+            index = next((i for i, token in enumerate(tokens) if token.keyword == '@startuml'), None)
+            if index is not None:
+                lines[index] = lines[index] + '\nstart'
+        if not keywords & {'stop', 'end', 'kill', 'detach'}:
+            index = next((i for i, token in enumerate(tokens) if token.keyword == '@enduml'), None)
+            if index is not None:
+                lines[index] = 'stop\n' + lines[index]
+        return lines
+    
     def _extract_plantuml_block(self, output: str) -> str:
         """Extract the PlantUML block from potentially messy output."""
         # Check if it's a Chen ERD diagram
@@ -69,12 +396,12 @@ class PlantUMLProcessor:
             return self._extract_chen_block(output)
         
         # Find @startuml
-        start_match = re.search(r'@startuml', output, re.IGNORECASE)
+        start_match = START_PATTERN.search(output)
         if start_match:
             output = output[start_match.start():]
         
         # Find @enduml
-        end_match = re.search(r'@enduml', output, re.IGNORECASE)
+        end_match = END_PATTERN.search(output)
         if end_match:
             output = output[:end_match.end()]
         elif '@startuml' in output.lower() and '@enduml' not in output.lower():
@@ -85,12 +412,12 @@ class PlantUMLProcessor:
     def _extract_chen_block(self, output: str) -> str:
         """Extract the Chen ERD block from potentially messy output."""
         # Find @startchen
-        start_match = re.search(r'@startchen', output, re.IGNORECASE)
+        start_match = START_CHEN_PATTERN.search(output)
         if start_match:
             output = output[start_match.start():]
         
         # Find @endchen
-        end_match = re.search(r'@endchen', output, re.IGNORECASE)
+        end_match = END_CHEN_PATTERN.search(output)
         if end_match:
             output = output[:end_match.end()]
         elif '@startchen' in output.lower() and '@endchen' not in output.lower():
@@ -98,166 +425,136 @@ class PlantUMLProcessor:
         
         return output
     
-    def _fix_class_diagram_issues(self, output: str) -> str:
-        """Fix common class diagram syntax issues."""
-        # Fix class declarations
-        output = re.sub(r'class\s+(\w+)\s*{\s*{', r'class \1 {', output)
-        output = re.sub(r'}\s*}', '}', output)
-        
-        # Fix attribute declarations
-        output = re.sub(r'([+\-#])\s*(\w+)\s*:\s*(\w+)', r'\1\2: \3', output)
-        
-        # Fix method declarations
-        output = re.sub(r'([+\-#])\s*(\w+)\s*\(\s*\)\s*:\s*(\w+)', r'\1\2(): \3', output)
-        
-        # Fix relationships - convert old syntax to correct PlantUML syntax
-        output = re.sub(r'(\w+)\s*--\|>\s*(\w+)', r'\1 <|-- \2', output)
-        output = re.sub(r'(\w+)\s*-\|>\s*(\w+)', r'\1 <|-- \2', output)
-        output = re.sub(r'(\w+)\s*<\|\.\s*(\w+)', r'\1 <|.. \2', output)
-        output = re.sub(r'(\w+)\s*--\*\s*(\w+)', r'\1 *-- \2', output)
-        output = re.sub(r'(\w+)\s*o-\s*(\w+)', r'\1 o-- \2', output)
-        output = re.sub(r'(\w+)\s*-->\s*(\w+)', r'\1 --> \2', output)
-        
-        # Fix cardinality with double quotes and proper spacing
-        output = re.sub(r'(\w+)\s+"(\d+|\*|many)"\s*(\*--|o--|-->)\s*"(\d+|\*|many)"\s*(\w+)', 
-                       r'\1 "\2" \3 "\4" \5', output)
-        output = re.sub(r'(\w+)\s+"(\d+|\*|many)"\s*(\*--|o--|-->)\s*(\w+)', 
-                       r'\1 "\2" \3 \4', output)
-        output = re.sub(r'(\w+)\s*(\*--|o--|-->)\s*"(\d+|\*|many)"\s*(\w+)', 
-                       r'\1 \2 "\3" \4', output)
-        
-        return output
-    
-    def _fix_sequence_diagram_issues(self, output: str) -> str:
-        """Fix common sequence diagram syntax issues."""
-        # Fix participant declarations
-        output = re.sub(r'participant\s+"([^"]+)"\s+as\s+(\w+)', r'participant "\1" as \2', output)
-        output = re.sub(r'participant\s+(\w+)', r'participant \1', output)
-        
-        # Fix arrows
-        output = re.sub(r'(\w+)\s*->\s*(\w+)\s*:\s*(.+)', r'\1 -> \2 : \3', output)
-        output = re.sub(r'(\w+)\s*-->\s*(\w+)\s*:\s*(.+)', r'\1 --> \2 : \3', output)
-        output = re.sub(r'(\w+)\s*->>\s*(\w+)\s*:\s*(.+)', r'\1 ->> \2 : \3', output)
-        
-        # Fix notes
-        output = re.sub(r'note\s+(left|right|over)\s+(of\s+)?(\w+)\s*:\s*(.+)', r'note \1 of \3 : \4', output)
-        
-        return output
-    
-    def _fix_activity_diagram_issues(self, output: str) -> str:
-        """Fix common activity diagram syntax issues."""
-        # Fix activities
-        output = re.sub(r':([^;]+);', lambda m: f':{m.group(1).strip()};', output)
+    def _add_styling(self, output: str) -> str:
+        """Add consistent styling to the diagram."""
+        # Skip styling for Chen ERD diagrams
+        if '@startchen' in output.lower():
+            return output
         
-        # Fix conditions
-        output = re.sub(r'if\s*\(([^)]+)\)\s*then\s*\(([^)]*)\)', r'if (\1) then (\2)', output)
-        output = re.sub(r'else\s*\(([^)]*)\)', r'else (\1)', output)
+        styling = """skinparam monochrome true
+skinparam shadowing false
+skinparam classAttributeIconSize 0
+skinparam style strictuml"""
         
-        # Ensure start/stop
-        if 'start' not in output.lower() and ':' in output:
-            output = output.replace('@startuml', '@startuml\nstart')
-        if 'stop' not in output.lower() and 'end' not in output.lower() and ':' in output:
-            output = output.replace('@enduml', 'stop\n@enduml')
+        if 'skinparam' not in output:
+            output = output.replace('@startuml', f'@startuml\n{styling}')
         
         return output
     
-    def _fix_component_diagram_issues(self, output: str) -> str:
-        """Fix common component diagram syntax issues."""
-        # Fix component declarations
-        output = re.sub(r'\[([^\]]+)\]', r'[\1]', output)
-        output = re.sub(r'component\s+"([^"]+)"\s+as\s+(\w+)', r'component "\1" as \2', output)
-        
-        # Fix interfaces
-        output = re.sub(r'interface\s+"([^"]+)"\s+as\s+(\w+)', r'interface "\1" as \2', output)
-        
-        # Fix connections
-        output = re.sub(r'(\[[\w\s]+\]|\w+)\s*-->\s*(\[[\w\s]+\]|\w+)\s*:\s*(.+)', r'\1 --> \2 : \3', output)
-        output = re.sub(r'(\[[\w\s]+\]|\w+)\s*-->\s*(\[[\w\s]+\]|\w+)', r'\1 --> \2', output)
-        
-        return output
+    def _final_cleanup(self, output: str) -> str:
+        """Final cleanup of the PlantUML code: drop blank lines and trailing whitespace."""
+        return '\n'.join(line.rstrip() for line in output.split('\n') if line.strip())
     
-    def _fix_usecase_diagram_issues(self, output: str) -> str:
-        """Fix common use case diagram syntax issues."""
-        # Fix actor declarations
-        output = re.sub(r'actor\s+"([^"]+)"\s+as\s+(\w+)', r'actor "\1" as \2', output)
-        output = re.sub(r'actor\s+(\w+)', r'actor \1', output)
+    def locate_error_lines(self, code: str, errors: List[str]) -> Tuple[List[int], List[str]]:
+        """
+        Map validation errors to the 1-based line numbers they refer to.
         
-        # Fix use case declarations
-        output = re.sub(r'\(([^)]+)\)', r'(\1)', output)
-        output = re.sub(r'usecase\s+"([^"]+)"\s+as\s+(\w+)', r'usecase "\1" as \2', output)
+        Returns:
+            Tuple of (sorted failing line numbers, errors that could not be located)
+        """
+        lines = code.split('\n')
+        failing_lines = set()
+        unlocated = []
         
-        # Fix associations
-        output = re.sub(r'(\w+)\s*-->\s*\(([^)]+)\)', r'\1 --> (\2)', output)
-        output = re.sub(r'(\w+)\s*--\|>\s*(\w+)', r'\1 --|> \2', output)
+        for error in errors:
+            located = set()
+            
+            line_match = LINE_NUMBER_PREFIX.match(error)
+            bracket_match = UNMATCHED_BRACKETS_PREFIX.match(error)
+            if line_match:
+                line_no = int(line_match.group(1))
+                if 1 <= line_no <= len(lines):
+                    located.add(line_no)
+            elif bracket_match:
+                open_br, close_br = bracket_match.groups()
+                located.update(
+                    n for n, line in enumerate(lines, 1)
+                    if line.count(open_br) != line.count(close_br)
+                )
+            else:
+                for prefix, pattern in ERROR_LINE_PATTERNS:
+                    if error.startswith(prefix):
+                        located.update(n for n, line in enumerate(lines, 1) if pattern.search(line))
+                        break
+            
+            if located:
+                failing_lines.update(located)
+            else:
+                unlocated.append(error)
         
-        return output
+        return sorted(failing_lines), unlocated
     
-    def _fix_erd_diagram_issues(self, output: str) -> str:
-        """Fix common ERD (Chen's notation) syntax issues."""
-        # Skip if not an ERD
-        if '@startchen' not in output.lower():
-            return output
+    def apply_revision_blocks(self, code: str, response: str) -> Optional[str]:
+        """
+        Apply ``<<<< START-END ... >>>>`` replacement blocks to the code.
         
-        # Replace class with entity
-        output = re.sub(r'\bclass\s+(\w+)', r'entity \1', output, flags=re.IGNORECASE)
+        Returns:
+            The patched code, or None if the response has no usable blocks
+        """
+        response = re.sub(r'```\w*', '', response)
+        lines = code.split('\n')
         
-        # Fix entity declarations
-        output = re.sub(r'entity\s+(\w+)\s*{\s*{', r'entity \1 {', output)
+        blocks = []
+        for match in REVISION_BLOCK_PATTERN.finditer(response):
+            start, end = int(match.group(1)), int(match.group(2))
+            if start < 1 or end < start or end > len(lines):
+                return None
+            replacement = match.group(3).rstrip('\n')
+            blocks.append((start, end, replacement.split('\n') if replacement else []))
         
-        # Fix attribute syntax
-        output = re.sub(r'(\w+)\s*:\s*([A-Z][a-z]+)', r'\1 : \2', output)
-        output = re.sub(r'(\w+)\s*:\s*([a-z][a-z]*)', lambda m: f'{m.group(1)} : {m.group(2).upper()}', output)
-       
-        # Fix relationship connections
-        output = re.sub(r'(\w+)\s+"1"\s*--\s*"\*"\s*(\w+)', r'\1 -1- \2', output)
-        output = re.sub(r'(\w+)\s*-->\s*(\w+)', r'\1 -N- \2', output)
-        output = re.sub(r'(\w+)\s*--\|>\s*(\w+)', r'\1 -1- \2', output)
-        output = re.sub(r'(\w+)\s*<\|--\s*(\w+)', r'\1 -1- \2', output)
+        if not blocks:
+            return None
         
-        # Remove method definitions with ()
-        output = re.sub(r'\s*\w+\s*\([^)]*\)\s*:[^}]*', '', output)
+        # Apply bottom-up so earlier line numbers stay valid; reject overlaps
+        blocks.sort(key=lambda block: block[0], reverse=True)
+        previous_start = len(lines) + 1
+        for start, end, replacement in blocks:
+            if end >= previous_start:
+                return None
+            lines[start - 1:end] = replacement
+            previous_start = start
         
-        return output
+        return '\n'.join(lines)
     
-    def _add_styling(self, output: str) -> str:
-        """Add consistent styling to the diagram."""
-        # Skip styling for Chen ERD diagrams
-        if '@startchen' in output.lower():
-            return output
+    def _revise_compact(self, code: str, diagram_type: str, errors: List[str],
+                        ai_generate_func: Callable[[str], str]) -> Optional[str]:
+        """
+        Run one compact revision: send only the failing lines and apply the
+        returned replacement blocks locally.
         
-        styling = """skinparam monochrome true
-skinparam shadowing false
-skinparam classAttributeIconSize 0
-skinparam style strictuml"""
+        Returns:
+            The revised (cleaned) code, or None if compact mode cannot be used
+        """
+        failing_lines, unlocated = self.locate_error_lines(code, errors)
+        if unlocated or not failing_lines:
+            return None
         
-        if 'skinparam' not in output:
-            output = output.replace('@startuml', f'@startuml\n{styling}')
+        from prompt_templates import get_compact_revision_prompt
+        revision_prompt = get_compact_revision_prompt(
+            initial_code=code,
+            diagram_type=diagram_type,
+            errors=errors,
+            failing_lines=failing_lines
+        )
+        response = ai_generate_func(revision_prompt)
         
-        return output
-    
-    def _final_cleanup(self, output: str) -> str:
-        """Final cleanup of the PlantUML code."""
-        # Remove excessive whitespace
-        output = re.sub(r'\n\s*\n\s*\n', '\n\n', output)
-        output = re.sub(r'^\s*\n', '', output, flags=re.MULTILINE)
+        patched_code = self.apply_revision_blocks(code, response)
+        if patched_code is None:
+            # The model ignored the block format; accept a full diagram if it sent one
+            if re.search(r'@start(uml|chen)', response, re.IGNORECASE):
+                return self.clean_plantuml_output(response, diagram_type)
+            return code
         
-        # Ensure proper line endings
-        lines = output.split('\n')
-        cleaned_lines = []
-        for line in lines:
-            cleaned_line = line.rstrip()
-            if cleaned_line:
-                cleaned_lines.append(cleaned_line)
-        
-        return '\n'.join(cleaned_lines)
+        return self.clean_plantuml_output(patched_code, diagram_type)
     
     def fix_plantuml_with_ai(self, code: str, diagram_type: str, transcript: str, 
                            summary: str = "", keywords: List[str] = None, 
                            ai_generate_func: Callable[[str], str] = None,
-                           max_attempts: int = 2) -> Dict[str, any]:
+                           max_attempts: int = 2, compact: bool = False) -> Dict[str, any]:
         """
         Use AI to fix PlantUML code when validation fails or improve it when valid.
-        Always runs at least one revision attempt for code improvement.
+        Always runs at least one revision attempt for code improvement, unless
+        the PlantUML engine (see ``syntax_checker``) confirms the code is valid.
         
         Args:
             code: The initial PlantUML code with errors
@@ -267,6 +564,9 @@ skinparam style strictuml"""
             keywords: List of keywords
             ai_generate_func: Function to call AI model
             max_attempts: Maximum number of revision attempts
+            compact: Send only failing lines and apply the returned replacement
+                blocks, falling back to a full revision when errors cannot be
+                located to specific lines
             
         Returns:
             Dictionary with fixed code and metadata
@@ -288,7 +588,20 @@ skinparam style strictuml"""
             
         current_code = code
         attempts = 0
-        initial_is_valid, initial_errors = self.validate_plantuml(current_code, diagram_type)
+        initial_is_valid, initial_errors, renderer_checked = self.validate_with_renderer(current_code, diagram_type)
+        
+        if initial_is_valid and renderer_checked:
+            return {
+                'plantuml_code': current_code,
+                'success': True,
+                'is_valid': True,
+                'status_message': "Validated by the PlantUML engine; no revision needed",
+                'validation_errors': [],
+                'validation_findings': self.validation_findings(current_code, diagram_type),
+                'diagram_type': diagram_type,
+                'used_fallback': False,
+                'revision_attempts': 0
+            }
         
         # Always attempt at least one revision for improvement
         for attempt in range(max_attempts):
@@ -305,17 +618,40 @@ skinparam style strictuml"""
                     'is_valid': True,
                     'status_message': f"Improved after {attempts} revision attempt(s)",
                     'validation_errors': [],
+                    'validation_findings': self.validation_findings(current_code, diagram_type),
                     'diagram_type': diagram_type,
                     'used_fallback': False,
                     'revision_attempts': attempts
                 }
             
+            if compact and not is_valid:
+                try:
+                    revised_code = self._revise_compact(current_code, diagram_type, errors, ai_generate_func)
+                except Exception as e:
+                    return {
+                        'plantuml_code': code,
+                        'success': initial_is_valid,
+                        'is_valid': initial_is_valid,
+                        'status_message': f"AI revision failed: {str(e)[:100]}",
+                        'validation_errors': initial_errors,
+                        'diagram_type': diagram_type,
+                        'used_fallback': True,
+                        'revision_attempts': attempts
+                    }
+                if revised_code is not None:
+                    current_code = revised_code
+                    continue
+            
             # Generate revision prompt (use different messages based on validity)
             from prompt_templates import get_revision_prompt
             
             if is_valid:
-                # Code is valid but we want to improve it
+                # Code is valid but we want to improve it; pattern-table
+                # warnings (e.g. no relationships) say where to start
                 improvement_errors = [
+                    finding['message'] for finding in self.validation_findings(current_code, diagram_type)
+                    if finding['severity'] == WARNING
+                ] + [
                     "Code is syntactically correct but could be improved",
                     "Consider adding more descriptive labels and relationships",
                     "Ensure all important entities and interactions are represented",
@@ -345,7 +681,7 @@ skinparam style strictuml"""
                 revised_code = ai_generate_func(revision_prompt)
                 
                 # Clean the revised code
-                revised_code = self.clean_plantuml_output(revised_code)
+                revised_code = self.clean_plantuml_output(revised_code, diagram_type)
                 
                 # Update current code for next iteration
                 current_code = revised_code
@@ -371,97 +707,292 @@ skinparam style strictuml"""
             'is_valid': final_is_valid,
             'status_message': f"Completed {max_attempts} revision attempts - {'success' if final_is_valid else 'still has errors'}",
             'validation_errors': final_errors,
+            'validation_findings': self.validation_findings(current_code, diagram_type),
             'diagram_type': diagram_type,
             'used_fallback': not final_is_valid,
             'revision_attempts': attempts
         }
     
+    def edit_plantuml_with_ai(self, code: str, diagram_type: str,
+                              change_request: Optional[str] = None,
+                              edited_code: Optional[str] = None,
+                              ai_generate_func: Callable[[str], str] = None) -> Dict[str, any]:
+        """
+        Apply a small change to existing PlantUML code instead of regenerating it.
+        
+        Either ``change_request`` (natural language) or ``edited_code`` (the
+        user's manual edit) must be given. The AI is only asked for the changed
+        lines, which are applied locally and revalidated. Manual edits that
+        already validate are returned without any AI call.
+        
+        Args:
+            code: The current PlantUML code
+            diagram_type: Type of diagram being edited
+            change_request: Short description of the desired change
+            edited_code: Manually edited version of ``code``
+            ai_generate_func: Function to call AI model
+            
+        Returns:
+            Dictionary with edited code and metadata
+        """
+        ai_calls = 0
+        
+        if edited_code is not None:
+            current_code = edited_code.strip()
+            changed_lines = self._changed_lines(code, current_code)
+        elif change_request:
+            if ai_generate_func is None:
+                return self._edit_result(code, diagram_type, False, "No AI function provided for edit", 0)
+            
+            from prompt_templates import get_edit_prompt
+            response = ai_generate_func(get_edit_prompt(code, diagram_type, change_request))
+            ai_calls += 1
+            
+            patched_code = self.apply_revision_blocks(code, response)
+            if patched_code is None:
+                if not re.search(r'@start(uml|chen)', response, re.IGNORECASE):
+                    return self._edit_result(code, diagram_type, False,
+                                             "AI response contained no applicable changes", ai_calls)
+                patched_code = response
+            current_code = self.clean_plantuml_output(patched_code, diagram_type)
+            changed_lines = self._changed_lines(code, current_code)
+        else:
+            return self._edit_result(code, diagram_type, False,
+                                     "Either a change request or edited code is required", 0)
+        
+        is_valid, errors = self.validate_plantuml(current_code, diagram_type)
+        
+        if not is_valid and ai_generate_func is not None:
+            # One targeted fix of the failing (or, if unlocatable, the changed) lines
+            failing_lines, unlocated = self.locate_error_lines(current_code, errors)
+            if unlocated:
+                failing_lines = sorted(set(failing_lines) | set(changed_lines))
+            if failing_lines:
+                from prompt_templates import get_compact_revision_prompt
+                response = ai_generate_func(get_compact_revision_prompt(
+                    initial_code=current_code,
+                    diagram_type=diagram_type,
+                    errors=errors,
+                    failing_lines=failing_lines
+                ))
+                ai_calls += 1
+                patched_code = self.apply_revision_blocks(current_code, response)
+                if patched_code is not None:
+                    current_code = self.clean_plantuml_output(patched_code, diagram_type)
+                    is_valid, errors = self.validate_plantuml(current_code, diagram_type)
+        
+        result = self._edit_result(
+            current_code, diagram_type, is_valid,
+            "Edit applied" if is_valid else "Edit applied but validation still fails",
+            ai_calls, errors
+        )
+        result['changed_lines'] = self._changed_lines(code, current_code)
+        return result
+    
+    def _changed_lines(self, old_code: str, new_code: str) -> List[int]:
+        """Return 1-based line numbers in ``new_code`` that differ from ``old_code``."""
+        matcher = difflib.SequenceMatcher(a=old_code.split('\n'), b=new_code.split('\n'), autojunk=False)
+        changed = []
+        for tag, _, _, j1, j2 in matcher.get_opcodes():
+            if tag in ('replace', 'insert'):
+                changed.extend(range(j1 + 1, j2 + 1))
+        return changed
+    
+    def _edit_result(self, code: str, diagram_type: str, is_valid: bool, message: str,
+                     ai_calls: int, errors: List[str] = None) -> Dict[str, any]:
+        """Build the result dictionary for edit_plantuml_with_ai."""
+        return {
+            'plantuml_code': code,
+            'success': is_valid,
+            'is_valid': is_valid,
+            'status_message': message,
+            'validation_errors': errors or [],
+            'validation_findings': self.validation_findings(code, diagram_type),
+            'diagram_type': diagram_type,
+            'used_fallback': False,
+            'ai_calls': ai_calls,
+            'changed_lines': []
+        }
+    
     def validate_plantuml(self, code: str, diagram_type: Optional[str] = None) -> Tuple[bool, List[str]]:
         """Enhanced validation for PlantUML code with detailed error reporting."""
+        is_valid, errors, _ = self.validate_with_renderer(code, diagram_type)
+        return is_valid, errors
+    
+    def validate_with_renderer(self, code: str, diagram_type: Optional[str] = None) -> Tuple[bool, List[str], bool]:
+        """
+        Validate PlantUML code, asking the local PlantUML engine when a
+        syntax checker is configured.
+        
+        Returns:
+            Tuple of (is_valid, errors, renderer_checked); renderer_checked is
+            True when PlantUML itself parsed the code
+        """
         errors = []
         
         if not code:
             errors.append("Empty code provided")
-            return False, errors
+            return False, errors, False
         
-        # Basic structure validation
-        is_chen_diagram = '@startchen' in code.lower()
+        tokens = self._tokenize(code)
+        directives = {token.keyword for token in tokens if token.kind == DIRECTIVE}
         
-        if is_chen_diagram:
-            if '@startchen' not in code.lower():
-                errors.append("Missing @startchen directive")
-            if '@endchen' not in code.lower():
+        # Basic structure validation
+        if '@startchen' in directives:
+            if '@endchen' not in directives:
                 errors.append("Missing @endchen directive")
         else:
-            if '@startuml' not in code.lower():
+            if '@startuml' not in directives:
                 errors.append("Missing @startuml directive")
-            if '@enduml' not in code.lower():
+            if '@enduml' not in directives:
                 errors.append("Missing @enduml directive")
         
         # Diagram-specific validation
         if diagram_type:
-            diagram_errors = self._validate_diagram_type(code, diagram_type)
+            diagram_errors = self._validate_diagram_type(code, diagram_type, tokens)
             errors.extend(diagram_errors)
+            errors.extend(finding['message'] for finding in check_patterns(tokens, diagram_type)
+                          if finding['severity'] == ERROR)
         
-        # Syntax validation
-        syntax_errors = self._validate_syntax(code)
-        errors.extend(syntax_errors)
+        # Syntax validation: PlantUML's own parser when available, heuristics otherwise
+        renderer_errors = self._check_with_renderer(code)
+        if renderer_errors is not None:
+            errors.extend(renderer_errors)
+        else:
+            syntax_errors = self._validate_syntax(code, tokens)
+            errors.extend(syntax_errors)
+        
+        return len(errors) == 0, errors, renderer_errors is not None
+    
+    def validation_findings(self, code: str, diagram_type: Optional[str]) -> List[Dict]:
+        """
+        Structured results of the diagram type's pattern table (see validation_engine).
         
-        return len(errors) == 0, errors
+        Returns:
+            Dicts with line (None for diagram-wide findings), severity
+            ('error' or 'warning'), rule, pattern, description and message
+        """
+        if not code or not diagram_type:
+            return []
+        return check_patterns(self._tokenize(code), diagram_type)
+    
+    def _check_with_renderer(self, code: str) -> Optional[List[str]]:
+        """Run the renderer-backed syntax check; None if it is not configured or unavailable."""
+        if self.syntax_checker is None:
+            return None
+        try:
+            result = self.syntax_checker(code)
+        except Exception as e:
+            print(f"⚠️ Renderer syntax check failed: {e}")
+            return None
+        if not result.get('checked'):
+            return None
+        return list(result.get('errors', []))
+    
+    def _tokenize(self, code: str) -> List[LineToken]:
+        """Tokenize code, reusing the previous result when the same code is validated again."""
+        last_code, last_tokens = self._last_tokens
+        if code != last_code:
+            last_tokens = tokenize(code)
+            self._last_tokens = (code, last_tokens)
+        return last_tokens
     
-    def _validate_diagram_type(self, code: str, diagram_type: str) -> List[str]:
-        """Validate diagram-specific syntax."""
+    def _validate_diagram_type(self, code: str, diagram_type: str,
+                               tokens: Optional[List[LineToken]] = None) -> List[str]:
+        """Validate diagram-specific syntax; diagram_type may be any name canonical_diagram_type accepts."""
         errors = []
+        if tokens is None:
+            tokens = self._tokenize(code)
+        keywords = {token.keyword for token in tokens if token.kind == DECLARATION}
+        code_lines = [token.code for token in tokens if token.kind in CODE_KINDS]
+        kind = canonical_diagram_type(diagram_type)
         
-        if 'Class Diagram' in diagram_type:
-            if not re.search(r'class\s+\w+', code, re.IGNORECASE):
+        if kind == 'Class Diagram':
+            if 'class' not in keywords:
                 errors.append("No class definitions found in class diagram")
-            
-            # Check for incorrect relationship symbols
-            if re.search(r'--\|>', code):
-                errors.append("Use <|-- for inheritance, not --|>")
-            if re.search(r'--\*', code):
-                errors.append("Use *-- for composition, not --*")
-
-        elif 'Sequence Diagram' in diagram_type:
-            if not re.search(r'participant\s+\w+', code, re.IGNORECASE):
+
+        elif kind == 'Sequence Diagram':
+            if not keywords & SEQUENCE_PARTICIPANTS:
                 errors.append("No participants found in sequence diagram")
         
-        elif 'Flowchart' in diagram_type or 'Activity' in diagram_type:
-            if not re.search(r':[^;]+;', code):
+        elif kind == 'Flowchart Diagram':
+            if not any(token.kind == STATEMENT and token.code.startswith(':') for token in tokens):
                 errors.append("No activities found in flowchart/activity diagram")
         
-        elif 'Component Diagram' in diagram_type:
-            if not re.search(r'\[[\w\s]+\]|component\s+', code, re.IGNORECASE):
+        elif kind == 'Component Diagram':
+            if 'component' not in keywords and not any(COMPONENT_SHORTHAND_PATTERN.search(line) for line in code_lines):
                 errors.append("No components found in component diagram")
         
-        elif 'Use Case Diagram' in diagram_type:
-            if not re.search(r'actor\s+\w+|\([^)]+\)', code, re.IGNORECASE):
+        elif kind == 'Usecase Diagram':
+            if not keywords & {'actor', 'usecase'} and not any(USECASE_SHORTHAND_PATTERN.search(line) for line in code_lines):
                 errors.append("No actors or use cases found in use case diagram")
         
-        elif 'ER Diagram' in diagram_type:
-            if '@startchen' not in code.lower():
+        elif kind == 'ER Diagram':
+            if not any(token.keyword == '@startchen' for token in tokens):
                 errors.append("ER Diagrams must use @startchen/@endchen format")
-            if not re.search(r'entity\s+\w+', code, re.IGNORECASE):
+            if 'entity' not in keywords:
                 errors.append("No entities found in ER diagram")
             
         return errors
     
-    def _validate_syntax(self, code: str) -> List[str]:
-        """Validate general PlantUML syntax."""
+    def _validate_syntax(self, code: str, tokens: Optional[List[LineToken]] = None) -> List[str]:
+        """
+        Validate general PlantUML syntax.
+        
+        Brackets are counted on the tokenized code only, so brackets inside
+        quoted labels, notes and comments are ignored; errors name the line of
+        the first unmatched bracket.
+        """
         errors = []
+        if tokens is None:
+            tokens = self._tokenize(code)
         
         # Check for unmatched brackets
-        brackets = {'(': ')', '[': ']', '{': '}'}
-        for open_br, close_br in brackets.items():
-            open_count = code.count(open_br)
-            close_count = code.count(close_br)
+        for open_br, close_br in BRACKETS.items():
+            open_lines = []  # [line number, brackets still open on it]
+            first_unmatched_close = None
+            open_count = close_count = 0
+            for token in tokens:
+                line = token.code
+                if token.kind not in CODE_KINDS or (open_br not in line and close_br not in line):
+                    continue
+                opens, closes = line.count(open_br), line.count(close_br)
+                open_count += opens
+                close_count += closes
+                if opens > closes:
+                    open_lines.append([token.number, opens - closes])
+                unmatched = closes - opens
+                while unmatched > 0 and open_lines:
+                    used = min(unmatched, open_lines[-1][1])
+                    open_lines[-1][1] -= used
+                    unmatched -= used
+                    if not open_lines[-1][1]:
+                        open_lines.pop()
+                if unmatched > 0 and first_unmatched_close is None:
+                    first_unmatched_close = token.number
             if open_count != close_count:
-                errors.append(f"Unmatched {open_br}{close_br} brackets: {open_count} opening, {close_count} closing")
+                line_no = first_unmatched_close or (open_lines[-1][0] if open_lines else None)
+                message = f"Unmatched {open_br}{close_br} brackets: {open_count} opening, {close_count} closing"
+                errors.append(f"Line {line_no}: {message}" if line_no else message)
         
         # Check for common syntax errors
-        if re.search(r'-->\s*-->', code):
-            errors.append("Invalid arrow syntax: --> -->")
+        for token in tokens:
+            if token.kind in (RELATIONSHIP, STATEMENT) and ARROW_CHAIN_PATTERN.search(token.code):
+                errors.append(f"Line {token.number}: Invalid arrow syntax: --> -->")
+
+        # A multi-line activity label must end with ';' before the next code line
+        label_start = None
+        for token in tokens:
+            if token.kind == STATEMENT and token.code == ':':
+                label_start = token.number
+            elif label_start is not None and token.kind == STRING:
+                if token.text.rstrip().endswith(';'):
+                    label_start = None
+            elif label_start is not None and token.kind in CODE_KINDS:
+                errors.append(f"Line {label_start}: Activity label is not closed with ';'")
+                label_start = None
+        if label_start is not None:
+            errors.append(f"Line {label_start}: Activity label is not closed with ';'")
 
         return errors
     
@@ -496,7 +1027,9 @@ def create_plantuml_processor() -> PlantUMLProcessor:
 # Enhanced generation function with AI revision capability
 def generate_plantuml_simple(diagram_type: str, transcript: str, 
                            summary: str = "", keywords: List[str] = None,
-                           ai_generate_func=None, enable_ai_revision: bool = True) -> Dict[str, any]:
+                           ai_generate_func=None, enable_ai_revision: bool = True,
+                           compact_revision: bool = False,
+                           syntax_checker: Optional[Callable[[str], Dict]] = None) -> Dict[str, any]:
     """
     Generate PlantUML with cleaning, validation, and optional AI revision.
     
@@ -507,6 +1040,8 @@ def generate_plantuml_simple(diagram_type: str, transcript: str,
         keywords: List of keywords
         ai_generate_func: Function to call AI model
         enable_ai_revision: Whether to use AI revision for fixing errors
+        compact_revision: Whether revisions send only the failing lines
+        syntax_checker: Optional renderer-backed checker (see PlantUMLProcessor)
         
     Returns:
         Dictionary with results and metadata
@@ -514,7 +1049,7 @@ def generate_plantuml_simple(diagram_type: str, transcript: str,
     if keywords is None:
         keywords = []
     
-    processor = PlantUMLProcessor()
+    processor = PlantUMLProcessor(syntax_checker=syntax_checker)
     
     # Step 1: Generate initial code
     from prompt_templates import get_enhanced_prompt
@@ -523,12 +1058,12 @@ def generate_plantuml_simple(diagram_type: str, transcript: str,
     raw_output = ai_generate_func(initial_prompt)
         
     # Step 2: Clean the output
-    cleaned_code = processor.clean_plantuml_output(raw_output)
+    cleaned_code = processor.clean_plantuml_output(raw_output, diagram_type)
     
     # Step 3: Validate the cleaned code
     is_valid, validation_errors = processor.validate_plantuml(cleaned_code, diagram_type)
     
-    # Step 4: Always run AI revision as improvement step
+    # Step 4: Run AI revision (skipped inside when PlantUML confirms the code is valid)
     print(f"🔄 Running AI revision for {diagram_type}...")
     if validation_errors:
         print(f"   Found {len(validation_errors)} validation errors to fix")
@@ -542,18 +1077,183 @@ def generate_plantuml_simple(diagram_type: str, transcript: str,
         summary=summary,
         keywords=keywords,
         ai_generate_func=ai_generate_func,
-        max_attempts=2
+        max_attempts=2,
+        compact=compact_revision
     )
     
     # Step 5: Return the revision result (always)
     return revision_result
 
 
+def generate_plantuml_speculative(diagram_type: str, transcript: str,
+                                  summary: str = "", keywords: List[str] = None,
+                                  ai_generate_func=None, num_candidates: int = 3,
+                                  enable_ai_revision: bool = True,
+                                  compact_revision: bool = False,
+                                  syntax_checker: Optional[Callable[[str], Dict]] = None,
+                                  max_concurrent: Optional[int] = None) -> Dict[str, any]:
+    """
+    Generate PlantUML by racing several candidate generations concurrently.
+    
+    Each candidate uses a different sampling temperature and prompt variant.
+    At most max_concurrent candidates are in flight; the next one is only
+    started when a finished one fails validation. The first candidate that
+    passes validation wins and no further candidates start, so the calls
+    saved are the candidates that never started (calls already in flight
+    still run to completion and are billed). If no candidate is valid, the
+    one with the fewest errors goes through the usual AI revision loop.
+    
+    Args:
+        diagram_type: Type of UML diagram
+        transcript: Original transcript text
+        summary: Summary of transcript
+        keywords: List of keywords
+        ai_generate_func: Function to call AI model, called as
+            ``ai_generate_func(prompt, temperature=...)``
+        num_candidates: Number of concurrent candidate generations
+        enable_ai_revision: Whether to revise the best candidate if none is valid
+        compact_revision: Whether revisions send only the failing lines
+        syntax_checker: Optional renderer-backed checker (see PlantUMLProcessor)
+        max_concurrent: Candidates in flight at once (default num_candidates - 1,
+            so a first valid result saves at least one call; 1 runs them one
+            after another)
+        
+    Returns:
+        Dictionary with results and metadata (same shape as generate_plantuml_simple)
+    """
+    if keywords is None:
+        keywords = []
+    num_candidates = max(1, num_candidates)
+    if max_concurrent is None:
+        max_concurrent = num_candidates - 1
+    max_concurrent = max(1, min(max_concurrent, num_candidates))
+    
+    processor = PlantUMLProcessor(syntax_checker=syntax_checker)
+    
+    from prompt_templates import get_enhanced_prompt
+    base_prompt = get_enhanced_prompt(diagram_type, transcript, summary, keywords)
+    
+    def run_candidate(index: int) -> Tuple[int, str]:
+        temperature = SPECULATIVE_TEMPERATURES[index % len(SPECULATIVE_TEMPERATURES)]
+        variant = SPECULATIVE_PROMPT_VARIANTS[index % len(SPECULATIVE_PROMPT_VARIANTS)]
+        raw_output = ai_generate_func(base_prompt + variant, temperature=temperature)
+        return index, processor.clean_plantuml_output(raw_output, diagram_type)
+    
+    print(f"🏁 Racing {num_candidates} candidate generations for {diagram_type} ({max_concurrent} at a time)...")
+    executor = ThreadPoolExecutor(max_workers=max_concurrent)
+    pending = set()
+    started = 0
+    
+    def start_next():
+        nonlocal started
+        pending.add(executor.submit(run_candidate, started))
+        started += 1
+    
+    while started < max_concurrent:
+        start_next()
+    
+    winner = None
+    best_invalid = None  # (error_count, index, code, errors)
+    completed = 0
+    candidate_errors = []
+    try:
+        while pending and winner is None:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                completed += 1
+                try:
+                    index, code = future.result()
+                except Exception as e:
+                    candidate_errors.append(str(e)[:100])
+                    continue
+                
+                is_valid, errors = processor.validate_plantuml(code, diagram_type)
+                if is_valid:
+                    winner = (index, code)
+                    break
+                if best_invalid is None or len(errors) < best_invalid[0]:
+                    best_invalid = (len(errors), index, code, errors)
+            
+            # Every failed candidate frees a slot for the next one
+            while winner is None and started < num_candidates and len(pending) < max_concurrent:
+                start_next()
+    finally:
+        # Candidates still in flight finish in the background; their results are ignored
+        executor.shutdown(wait=False)
+    
+    speculation_details = {
+        'candidates_requested': num_candidates,
+        'candidates_started': started,
+        'candidates_completed': completed,
+    }
+    
+    if winner is not None:
+        index, code = winner
+        print(f"   Candidate {index + 1}/{num_candidates} passed validation first")
+        return {
+            'plantuml_code': code,
+            'success': True,
+            'is_valid': True,
+            'status_message': f"Candidate {index + 1} of {num_candidates} passed validation",
+            'validation_errors': [],
+            'diagram_type': diagram_type,
+            'used_fallback': False,
+            'revision_attempts': 0,
+            'winning_candidate': index,
+            **speculation_details
+        }
+    
+    if best_invalid is None:
+        return {
+            'plantuml_code': "",
+            'success': False,
+            'is_valid': False,
+            'status_message': f"All {num_candidates} candidate generations failed",
+            'validation_errors': candidate_errors,
+            'diagram_type': diagram_type,
+            'used_fallback': True,
+            'revision_attempts': 0,
+            'winning_candidate': None,
+            **speculation_details
+        }
+    
+    _, index, code, errors = best_invalid
+    print(f"   No candidate passed validation, revising candidate {index + 1} ({len(errors)} errors)")
+    if not enable_ai_revision:
+        return {
+            'plantuml_code': code,
+            'success': False,
+            'is_valid': False,
+            'status_message': f"No candidate passed validation ({len(errors)} errors in best candidate)",
+            'validation_errors': errors,
+            'diagram_type': diagram_type,
+            'used_fallback': True,
+            'revision_attempts': 0,
+            'winning_candidate': index,
+            **speculation_details
+        }
+    
+    revision_result = processor.fix_plantuml_with_ai(
+        code=code,
+        diagram_type=diagram_type,
+        transcript=transcript,
+        summary=summary,
+        keywords=keywords,
+        ai_generate_func=ai_generate_func,
+        max_attempts=2,
+        compact=compact_revision
+    )
+    revision_result['winning_candidate'] = index
+    revision_result.update(speculation_details)
+    return revision_result
+
+
 # Legacy function compatibility
-def clean_plantuml_output(output: str) -> str:
+def clean_plantuml_output(output: str, diagram_type: Optional[str] = None) -> str:
     """Legacy wrapper for backward compatibility."""
     processor = PlantUMLProcessor()
-    return processor.clean_plantuml_output(output)
+    return processor.clean_plantuml_output(output, diagram_type)
 
 def validate_plantuml(code: str, diagram_type: Optional[str] = None) -> bool:
     """Legacy wrapper for backward compatibility."""
@@ -0,0 +1,220 @@
+"""
+Debounced live-preview channel for the PlantUML editor.
+The editor posts every source revision; each session keeps only the latest
+one, waits until edits pause for the debounce interval, renders that revision
+and pushes the result to the session's event stream (Server-Sent Events).
+Revisions that are overwritten before they render are dropped, a session has
+at most one render in flight, and a shared pool bounds total render work.
+"""
+import itertools
+import json
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, Optional
+
+
+class _PreviewSession:
+    """Latest revision, render state and outgoing events of one editor."""
+
+    __slots__ = ('session_id', 'pending', 'rendering', 'timer', 'events',
+                 'last_activity', 'closed', 'latest_seq')
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.pending = None  # (seq, source, received_at) of the newest unrendered revision
+        self.rendering = False
+        self.timer = None
+        self.events = queue.Queue(maxsize=32)
+        self.last_activity = time.monotonic()
+        self.closed = False
+        self.latest_seq = 0
+
+
+class PreviewChannel:
+    """Manages live-preview sessions and their debounced renders."""
+
+    def __init__(self, render_func: Callable[[str], Dict], debounce_seconds: float = 0.3,
+                 max_workers: int = 2, idle_ttl_seconds: float = 600,
+                 heartbeat_seconds: float = 15):
+        """
+        Args:
+            render_func: Called with PlantUML code; returns a render result dict
+            debounce_seconds: Quiet period after the last revision before rendering
+            max_workers: Maximum concurrent renders across all sessions
+            idle_ttl_seconds: Seconds without revisions or listeners before a session is closed
+            heartbeat_seconds: Interval of keep-alive comments on idle event streams
+        """
+        self.render_func = render_func
+        self.debounce_seconds = debounce_seconds
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="preview")
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self._stats = {
+            'revisions': 0,
+            'renders': 0,
+            'dropped': 0,
+            'render_ms_total': 0.0,
+        }
+
+    def open_session(self) -> str:
+        """Create a session and return its ID."""
+        self.sweep()
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._sessions[session_id] = _PreviewSession(session_id)
+        return session_id
+
+    def close_session(self, session_id: str) -> bool:
+        """Close a session; its event stream ends."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self._close(session)
+        return True
+
+    def submit(self, session_id: str, source: str, seq: Optional[int] = None) -> Optional[int]:
+        """
+        Record a new source revision and (re)start the debounce timer.
+
+        Args:
+            session_id: Session to update
+            source: Full PlantUML source of the revision
+            seq: Client revision number; revisions older than the newest are ignored
+
+        Returns:
+            The revision number, or None if the session does not exist
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session.closed:
+                return None
+            if seq is None:
+                seq = next(self._seq)
+            if seq <= session.latest_seq:
+                return seq
+            session.latest_seq = seq
+            session.last_activity = time.monotonic()
+            self._stats['revisions'] += 1
+            if session.pending is not None:
+                self._stats['dropped'] += 1
+            session.pending = (seq, source, time.monotonic())
+            if not session.rendering and session.timer is None:
+                self._schedule(session, self.debounce_seconds)
+        return seq
+
+    def _schedule(self, session: _PreviewSession, delay: float) -> None:
+        """Arm the debounce timer. Caller holds the lock."""
+        session.timer = threading.Timer(delay, self._flush, args=(session,))
+        session.timer.daemon = True
+        session.timer.start()
+
+    def _flush(self, session: _PreviewSession) -> None:
+        """Timer callback: render the latest revision once edits have paused."""
+        with self._lock:
+            session.timer = None
+            if session.closed or session.pending is None or session.rendering:
+                return
+            quiet_for = time.monotonic() - session.pending[2]
+            if quiet_for < self.debounce_seconds:
+                # Edited again since the timer was armed: wait out the rest
+                self._schedule(session, self.debounce_seconds - quiet_for)
+                return
+            seq, source, _ = session.pending
+            session.pending = None
+            session.rendering = True
+        self._executor.submit(self._render, session, seq, source)
+
+    def _render(self, session: _PreviewSession, seq: int, source: str) -> None:
+        """Render one revision and push the result unless the session is gone."""
+        start = time.perf_counter()
+        try:
+            result = self.render_func(source)
+        except Exception as e:
+            result = {'success': False, 'errors': [str(e)]}
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        with self._lock:
+            session.rendering = False
+            self._stats['renders'] += 1
+            self._stats['render_ms_total'] += elapsed_ms
+            if session.closed:
+                return
+            if session.pending is not None and session.timer is None:
+                self._schedule(session, max(0.0, self.debounce_seconds - (time.monotonic() - session.pending[2])))
+
+        self._push(session, {'type': 'render', 'seq': seq, 'elapsed_ms': elapsed_ms, **result})
+
+    def _push(self, session: _PreviewSession, event: Dict) -> None:
+        """Queue an event, discarding the oldest one if the listener is slow."""
+        while True:
+            try:
+                session.events.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    session.events.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def _close(self, session: _PreviewSession) -> None:
+        with self._lock:
+            session.closed = True
+            if session.timer is not None:
+                session.timer.cancel()
+                session.timer = None
+        self._push(session, None)
+
+    def stream(self, session_id: str) -> Optional[Iterator[str]]:
+        """
+        Server-Sent Events stream of a session's render results.
+
+        Returns:
+            Iterator of SSE-formatted strings, or None if the session does not exist
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            return None
+
+        def events():
+            yield f"event: ready\ndata: {json.dumps({'session_id': session_id})}\n\n"
+            while True:
+                try:
+                    event = session.events.get(timeout=self.heartbeat_seconds)
+                except queue.Empty:
+                    if session.closed:
+                        return
+                    session.last_activity = time.monotonic()
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    return
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+        return events()
+
+    def sweep(self) -> None:
+        """Close sessions idle for longer than the TTL."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [s for s in self._sessions.values() if now - s.last_activity > self.idle_ttl_seconds]
+            for session in expired:
+                del self._sessions[session.session_id]
+        for session in expired:
+            self._close(session)
+
+    def stats(self) -> Dict:
+        """Return revision, render and drop counters and the average render time."""
+        self.sweep()
+        with self._lock:
+            stats = dict(self._stats)
+            stats['sessions'] = len(self._sessions)
+        stats['avg_render_ms'] = round(stats.pop('render_ms_total') / max(stats['renders'], 1), 1)
+        return stats
@@ -409,102 +409,97 @@ PLACES -N- ORDER
 """
 }
 
-# Additional validation patterns for each diagram type
+# Additional validation patterns for each diagram type, compiled by
+# validation_engine. Entries are (regex, description). Keys are matched to
+# diagram type names loosely ("UML Class Diagram" == "Class Diagram").
+# @startuml/@enduml and @startchen/@endchen are checked for every diagram by
+# PlantUMLProcessor.validate_plantuml, so they are not repeated as required here.
+#   required_patterns:   each must appear somewhere (error)
+#   forbidden_patterns:  reported on every line they appear in, outside labels,
+#                        strings and comments (error)
+#   required_<group>:    at least one of the group should appear (warning)
 DIAGRAM_VALIDATION_PATTERNS = {
     "UML Sequence Diagram": {
         "required_patterns": [
-            r"participant\s+\w+",
-            r"\w+\s*->\s*\w+\s*:",
-            r"@startuml",
-            r"@enduml"
+            (r'\b(?:participant|actor|boundary|control|entity|database|collections|queue)\s+[\w"]', "participant declaration"),
+            (r"\w+\s*->\s*\w+\s*:", "labelled message (A -> B : text)"),
         ],
         "forbidden_patterns": [
-            r"class\s+\w+",
-            r"actor\s+",
-            r"\(.*\)"
+            (r"class\s+\w+", "class declaration"),
+            (r"\(.*\)", "parenthesized text outside message labels"),
         ]
     },
     "UML Class Diagram": {
         "required_patterns": [
-            r"class\s+\w+\s*\{",
-            r"[+-#]\w+:",
-            r"@startuml", 
-            r"@enduml"
+            (r"class\s+\w+\s*\{", "class declaration with a body"),
+            (r"^\s*[-+#~]?\w+\s*:\s*\w", "typed attribute (name : Type)"),
         ],
         "forbidden_patterns": [
-            r"participant\s+",
-            r"actor\s+",
-            r"start\s*$",
-            r"--\|>",  # Old inheritance syntax
-            r"--\*",   # Old composition syntax
+            (r"participant\s+", "participant declaration"),
+            (r"actor\s+", "actor declaration"),
+            (r"^start\s*$", "activity start"),
+            (r"--\|>", "old inheritance syntax --|> (use <|--)"),
+            (r"--\*", "old composition syntax --* (use *--)"),
         ],
         "required_relationships": [
-            r"<\|--",  # Extension/inheritance
-            r"<\|\.\.?", # Implementation
-            r"\*--",   # Composition
-            r"o--",    # Aggregation
-            r"-->"     # Dependency/association
+            (r"<\|--", "extension <|--"),
+            (r"<\|\.\.?", "implementation <|.."),
+            (r"\*--", "composition *--"),
+            (r"o--", "aggregation o--"),
+            (r"-->", "dependency/association -->"),
         ]
     },
     "Flowchart": { 
         "required_patterns": [
-            r"start\s*$",
-            r":[^;]+;",
-            r"@startuml",
-            r"@enduml"
+            (r"^start\s*$", "start"),
+            (r":[^;]+;", "activity (:action;)"),
         ],
         "forbidden_patterns": [
-            r"class\s+\w+",
-            r"participant\s+",
-            r"actor\s+"
+            (r"class\s+\w+", "class declaration"),
+            (r"participant\s+", "participant declaration"),
+            (r"actor\s+", "actor declaration"),
         ]
     },
     "Component Diagram": {
         "required_patterns": [
-            r"\[[\w\s]+\]",
-            r"-->\s*",
-            r"@startuml",
-            r"@enduml"
+            (r"\[[\w\s]+\]|\bcomponent\s+[\w\"]", "component ([Name] or component Name)"),
+            (r"-->\s*", "connection (-->)"),
         ],
         "forbidden_patterns": [
-            r"class\s+\w+",
-            r"participant\s+",
-            r"start\s*$"
+            (r"class\s+\w+", "class declaration"),
+            (r"participant\s+", "participant declaration"),
+            (r"^start\s*$", "activity start"),
         ]
     },
     "Use Case Diagram": {
         "required_patterns": [
-            r"actor\s+",
-            r"\([^)]+\)",
-            r"@startuml",
-            r"@enduml"
+            (r"actor\s+", "actor declaration"),
+            (r"\([^)]+\)|\busecase\s+[\w\"(]", "use case ((Name) or usecase Name)"),
         ],
         "forbidden_patterns": [
-            r"class\s+\w+",
-            r"participant\s+",
-            r"start\s*$"
+            (r"class\s+\w+", "class declaration"),
+            (r"participant\s+", "participant declaration"),
+            (r"^start\s*$", "activity start"),
         ]
     },
     "ER Diagram": {
         "required_patterns": [
-            r"entity\s+\w+\s*\{",
-            r"@startchen",
-            r"@endchen"
+            (r"entity\s+\w+\s*\{", "entity with attributes"),
         ],
         "forbidden_patterns": [
-            r"@startuml",
-            r"@enduml", 
-            r"skinparam",
-            r"class\s+\w+",
-            r"participant\s+",
-            r"actor\s+",
-            r"[+-#]\w+\s*:",
-            r"<\|--",  # UML inheritance syntax
-            r"--\|>",  # Old UML inheritance syntax
-            r"\w+\s*\(\s*\)"  # Method definitions
+            (r"@startuml", "@startuml (use @startchen)"),
+            (r"@enduml", "@enduml (use @endchen)"),
+            (r"skinparam", "skinparam"),
+            (r"class\s+\w+", "class declaration (use entity)"),
+            (r"participant\s+", "participant declaration"),
+            (r"actor\s+", "actor declaration"),
+            (r"[-+#~]\w+\s*:", "UML visibility marker"),
+            (r"<\|--", "UML inheritance syntax <|--"),
+            (r"--\|>", "old UML inheritance syntax --|>"),
+            (r"\w+\s*\(\s*\)", "method definition"),
         ],
         "required_composite_format": [
-            r"\w+\s*\{\s*\n\s*\w+\s*:\s*\w+\s*\n"  # Multi-line composite attributes
+            (r"\w+\s*\{\s*\n\s*\w+\s*:\s*\w+\s*\n", "multi-line composite attribute"),
         ]
     }
 }
@@ -613,4 +608,120 @@ def get_revision_prompt(initial_code: str, diagram_type: str, transcript: str,
         summary=summary[:400],        # Limit summary length
         keywords=keywords_str,
         errors=errors_str
-    )
\ No newline at end of file
+    )
+
+# Compact revision template: only the failing lines are sent, and the model
+# answers with replacement blocks that are applied locally to the previous code.
+COMPACT_REVISION_PROMPT_TEMPLATE = """
+You are a PlantUML expert fixing specific lines of a {diagram_type}.
+
+VALIDATION ISSUES FOUND:
+{errors}
+
+FAILING LINES WITH CONTEXT (line numbers refer to the full diagram):
+{excerpt}
+
+OUTPUT FORMAT - FOLLOW EXACTLY:
+For every range of lines you change, output one block:
+<<<< START-END
+replacement lines
+>>>>
+
+- START-END are the line numbers being replaced (inclusive), e.g. <<<< 7-8
+- An empty block deletes the lines
+- Only change lines shown above; do not repeat unchanged lines
+- No explanations, no code fences
+
+REPLACEMENT BLOCKS:
+"""
+
+def get_compact_revision_prompt(initial_code: str, diagram_type: str, errors: list,
+                                failing_lines: list, context_lines: int = 2) -> str:
+    """
+    Get a compact revision prompt containing only the failing lines.
+    
+    Args:
+        initial_code: The previously generated PlantUML code
+        diagram_type: Type of UML diagram
+        errors: List of validation errors found
+        failing_lines: 1-based line numbers the errors point at
+        context_lines: Number of surrounding lines to include around each failing line
+    
+    Returns:
+        Formatted compact revision prompt string ready for AI model
+    """
+    lines = initial_code.split('\n')
+    
+    # Merge the context windows of all failing lines into sorted, disjoint ranges
+    ranges = []
+    for line_no in sorted(set(failing_lines)):
+        start = max(1, line_no - context_lines)
+        end = min(len(lines), line_no + context_lines)
+        if ranges and start <= ranges[-1][1] + 1:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+    
+    failing = set(failing_lines)
+    excerpt_parts = []
+    for start, end in ranges:
+        excerpt_parts.append("\n".join(
+            f"{'>' if n in failing else ' '} {n:4d} | {lines[n - 1]}" for n in range(start, end + 1)
+        ))
+    
+    errors_str = "\n".join(f"- {error}" for error in errors) if errors else "No specific errors detected"
+    
+    return COMPACT_REVISION_PROMPT_TEMPLATE.format(
+        diagram_type=diagram_type,
+        errors=errors_str,
+        excerpt="\n...\n".join(excerpt_parts)
+    )
+
+
+# Edit template: the model sees the numbered diagram and returns only the
+# replacement blocks for the lines it changes.
+EDIT_PROMPT_TEMPLATE = """
+You are a PlantUML expert applying a small change to an existing {diagram_type}.
+
+CURRENT DIAGRAM (line numbers are not part of the code):
+{numbered_code}
+
+REQUESTED CHANGE:
+{change_request}
+
+OUTPUT FORMAT - FOLLOW EXACTLY:
+For every range of lines you change, output one block:
+<<<< START-END
+replacement lines
+>>>>
+
+- START-END are the line numbers being replaced (inclusive), e.g. <<<< 7-8
+- To add new lines, replace an existing line with itself plus the new lines
+- An empty block deletes the lines
+- Keep the existing syntax style of the diagram
+- Output only the blocks for lines that change; no explanations, no code fences
+
+REPLACEMENT BLOCKS:
+"""
+
+def get_edit_prompt(current_code: str, diagram_type: str, change_request: str) -> str:
+    """
+    Get an edit prompt asking the AI only for the lines affected by a change.
+    
+    Args:
+        current_code: The current PlantUML code
+        diagram_type: Type of UML diagram
+        change_request: Short natural-language description of the change
+    
+    Returns:
+        Formatted edit prompt string ready for AI model
+    """
+    numbered_code = "\n".join(
+        f"{n:4d} | {line}" for n, line in enumerate(current_code.split('\n'), 1)
+    )
+    
+    return EDIT_PROMPT_TEMPLATE.format(
+        diagram_type=diagram_type,
+        numbered_code=numbered_code,
+        change_request=change_request.strip()[:500]
+    )
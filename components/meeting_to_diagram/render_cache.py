@@ -0,0 +1,198 @@
+"""
+Content-addressed cache for rendered diagrams.
+Keys are a hash of the layout-normalized PlantUML source (plantuml_normalize),
+the output format and the PlantUML version, so identical diagrams are rendered
+once no matter which endpoint or user asks for them or how the source is
+formatted. The key starts with the format ("svg-<sha256>") so a key can be
+checked against the format it is served as, and doubles as the HTTP ETag.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from plantuml_normalize import normalize, LAYOUT
+
+KEY_PATTERN = re.compile(r'([a-z]+)-[0-9a-f]{64}')
+LEGACY_KEY_PATTERN = re.compile(r'[0-9a-f]{64}')
+
+
+class RenderCache:
+    """Two-tier render cache: in-memory LRU plus an optional size-bounded disk tier."""
+
+    def __init__(self, max_memory_bytes: int = 64 * 1024 * 1024, max_memory_entries: int = 512,
+                 disk_dir: Optional[str] = None, max_disk_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            max_memory_bytes: Total size of rendered output kept in memory
+            max_memory_entries: Maximum number of in-memory entries
+            disk_dir: Directory for the disk tier, or None to disable it
+            max_disk_bytes: Total size of the disk tier before oldest files are evicted
+        """
+        self.max_memory_bytes = max_memory_bytes
+        self.max_memory_entries = max_memory_entries
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory = OrderedDict()  # key -> bytes
+        self._memory_bytes = 0
+        self._disk_sizes = {}  # key -> size in bytes
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    @staticmethod
+    def normalize_source(plantuml_code: str) -> str:
+        """Drop formatting that never affects rendering (comments, indentation, spacing, quoting)."""
+        return normalize(plantuml_code, LAYOUT)
+
+    @classmethod
+    def make_key(cls, plantuml_code: str, output_format: str, plantuml_version: str) -> str:
+        """
+        Build the content address for a rendered diagram.
+
+        Args:
+            plantuml_code: PlantUML source
+            output_format: Output format, e.g. "svg"
+            plantuml_version: Version of the PlantUML engine doing the rendering
+
+        Returns:
+            "<format>-<hex SHA-256 digest>", also usable as an ETag
+        """
+        output_format = output_format.lower()
+        digest = hashlib.sha256()
+        digest.update(f"{plantuml_version}\0{output_format}\0".encode('utf-8'))
+        digest.update(cls.normalize_source(plantuml_code).encode('utf-8'))
+        return f"{output_format}-{digest.hexdigest()}"
+
+    @staticmethod
+    def key_format(key: str) -> Optional[str]:
+        """Output format a key was made for, or None if it is not a render cache key."""
+        match = KEY_PATTERN.fullmatch(key)
+        return match.group(1) if match else None
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached bytes from memory or disk, or None on a miss."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return data
+
+            data = self._read_disk(key)
+            if data is not None:
+                self._stats['disk_hits'] += 1
+                self._store_memory(key, data)
+                return data
+
+            self._stats['misses'] += 1
+            return None
+
+    def set(self, key: str, data: bytes) -> None:
+        """Store rendered bytes in memory and, if enabled, on disk."""
+        with self._lock:
+            self._store_memory(key, data)
+            if self.disk_dir and key not in self._disk_sizes:
+                self._write_disk(key, data)
+
+    def contains(self, key: str) -> bool:
+        """Check for a key without touching LRU order or counters."""
+        with self._lock:
+            return key in self._memory or key in self._disk_sizes
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and tier sizes."""
+        with self._lock:
+            return {
+                **self._stats,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': len(self._disk_sizes),
+                'disk_bytes': self._disk_bytes,
+            }
+
+    def _store_memory(self, key: str, data: bytes) -> None:
+        """Insert into the memory tier and evict LRU entries. Caller holds the lock."""
+        if len(data) > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+
+        while self._memory and (self._memory_bytes > self.max_memory_bytes
+                                or len(self._memory) > self.max_memory_entries):
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._stats['evictions'] += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key)
+
+    def _load_disk_index(self) -> None:
+        """Index files left by a previous process."""
+        for name in os.listdir(self.disk_dir):
+            if LEGACY_KEY_PATTERN.fullmatch(name):
+                # Keys without a format prefix are never asked for again
+                try:
+                    os.remove(self._disk_path(name))
+                except OSError:
+                    pass
+            elif KEY_PATTERN.fullmatch(name):
+                size = os.path.getsize(self._disk_path(name))
+                self._disk_sizes[name] = size
+                self._disk_bytes += size
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        """Read from the disk tier. Caller holds the lock."""
+        if not self.disk_dir or key not in self._disk_sizes:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # mtime doubles as last-access time for eviction
+            return data
+        except OSError:
+            self._disk_bytes -= self._disk_sizes.pop(key, 0)
+            return None
+
+    def _write_disk(self, key: str, data: bytes) -> None:
+        """Write atomically to the disk tier and evict the oldest files. Caller holds the lock."""
+        if len(data) > self.max_disk_bytes:
+            return
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, self._disk_path(key))
+        except OSError as e:
+            print(f"⚠️ Render cache disk write failed: {e}")
+            return
+        self._disk_sizes[key] = len(data)
+        self._disk_bytes += len(data)
+
+        if self._disk_bytes > self.max_disk_bytes:
+            def mtime(k):
+                try:
+                    return os.path.getmtime(self._disk_path(k))
+                except OSError:
+                    return 0
+            for old_key in sorted(self._disk_sizes, key=mtime):
+                if self._disk_bytes <= self.max_disk_bytes:
+                    break
+                try:
+                    os.remove(self._disk_path(old_key))
+                except OSError:
+                    pass
+                self._disk_bytes -= self._disk_sizes.pop(old_key)
+                self._stats['evictions'] += 1
@@ -0,0 +1,325 @@
+"""
+Multi-process PlantUML render pool.
+JPype pins one JVM per Python process, so in-process rendering runs on a single
+core. The pool keeps N worker processes, each with a warm JVM and PlantUML
+loaded, behind a queue of idle workers with per-job timeouts. Queue wait and
+render time are reported separately.
+"""
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+def _worker_main(conn, jar_path: Optional[str]) -> None:
+    """Worker process: start a JVM once, then render jobs received over the pipe."""
+    from svg_converter import SVGConverter
+
+    try:
+        converter = SVGConverter(plantuml_jar_path=jar_path)
+        conn.send({"ready": converter.jvm_started or converter.jar_available})
+    except Exception as e:
+        conn.send({"ready": False, "error": str(e)})
+        return
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+
+        if "export" in job:
+            try:
+                conn.send(converter.export(job["export"], job["format"]))
+            except Exception as e:
+                conn.send({"success": False, "data": b"", "content_type": None,
+                           "errors": [f"Worker export failed: {str(e)}"]})
+            continue
+
+        if "check" in job:
+            try:
+                conn.send(converter.check_syntax(job["check"]))
+            except Exception as e:
+                conn.send({"checked": False, "is_valid": False, "errors": [f"Syntax check failed: {str(e)}"]})
+            continue
+
+        if "sources" in job:
+            try:
+                results = converter.convert_batch(job["sources"])
+            except Exception as e:
+                results = [{"index": i, "success": False, "svg_content": "", "render_ms": None,
+                            "errors": [f"Worker render failed: {str(e)}"]} for i in range(len(job["sources"]))]
+            conn.send(results)
+            continue
+
+        start = time.perf_counter()
+        try:
+            result = converter.convert_to_svg(job["source"])
+        except Exception as e:
+            result = {"success": False, "svg_content": "", "errors": [f"Worker render failed: {str(e)}"]}
+        result["render_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        conn.send(result)
+
+
+class _Worker:
+    """Parent-side handle of one worker process."""
+
+    __slots__ = ('process', 'conn', 'jobs')
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.jobs = 0
+
+
+class RenderWorkerPool:
+    """Pool of render worker processes, each holding a warm JVM."""
+
+    def __init__(self, num_workers: Optional[int] = None, jar_path: Optional[str] = None,
+                 job_timeout: float = 30, max_queue_wait: float = 60, startup_timeout: float = 120):
+        """
+        Args:
+            num_workers: Number of worker processes (defaults to the CPU count)
+            jar_path: PlantUML JAR path passed to each worker's SVGConverter
+            job_timeout: Seconds a single render may take before its worker is replaced
+            max_queue_wait: Seconds to wait for an idle worker before giving up
+            startup_timeout: Seconds a new worker may take to start its JVM
+        """
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.jar_path = jar_path
+        self.job_timeout = job_timeout
+        self.max_queue_wait = max_queue_wait
+        self.startup_timeout = startup_timeout
+
+        self._context = multiprocessing.get_context("spawn")  # never fork a process that may hold a JVM
+        self._idle = queue.Queue()
+        self._workers = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {
+            'jobs': 0,
+            'failures': 0,
+            'timeouts': 0,
+            'restarts': 0,
+            'queue_wait_ms_total': 0.0,
+            'render_ms_total': 0.0,
+        }
+
+    def start(self) -> None:
+        """Spawn all workers; each joins the idle queue once its JVM is ready."""
+        for _ in range(self.num_workers):
+            self._spawn_worker()
+
+    def _spawn_worker(self) -> None:
+        """Start one worker process and wait for it to report ready in the background."""
+        if self._closed:
+            return
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main, args=(child_conn, self.jar_path), daemon=True
+        )
+        process.start()
+        child_conn.close()
+        worker = _Worker(process, parent_conn)
+        with self._lock:
+            self._workers.add(worker)
+
+        def wait_ready():
+            try:
+                if parent_conn.poll(self.startup_timeout):
+                    message = parent_conn.recv()
+                    if message.get("ready"):
+                        self._idle.put(worker)
+                        return
+                    print(f"⚠️ Render worker failed to start: {message.get('error', 'renderer unavailable')}")
+                else:
+                    print("⚠️ Render worker did not start in time")
+            except (EOFError, OSError) as e:
+                print(f"⚠️ Render worker exited during startup: {e}")
+            self._discard_worker(worker)
+
+        threading.Thread(target=wait_ready, daemon=True).start()
+
+    def _discard_worker(self, worker: _Worker) -> None:
+        """Kill a worker and forget it."""
+        with self._lock:
+            self._workers.discard(worker)
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join(timeout=5)
+        worker.conn.close()
+        # Wake a job waiting for an idle worker, so it notices if none are left
+        self._idle.put(None)
+
+    def _replace_worker(self, worker: _Worker) -> None:
+        """Kill a broken or stuck worker and spawn a fresh one."""
+        self._spawn_worker()  # first, so the pool never looks empty in between
+        self._discard_worker(worker)
+        with self._lock:
+            self._stats['restarts'] += 1
+
+    def available(self) -> bool:
+        """Whether any worker is running or still starting; False once every worker failed."""
+        with self._lock:
+            return bool(self._workers)
+
+    def _dispatch(self, job: Dict, timeout: float):
+        """
+        Send one job to the next idle worker and wait for its reply. Fails at
+        once when no worker is running or starting (e.g. none could load
+        PlantUML), instead of waiting max_queue_wait for one.
+
+        Returns:
+            (reply or None, queue_wait_ms, error message or None)
+        """
+        queued_at = time.perf_counter()
+        deadline = queued_at + self.max_queue_wait
+        worker = None
+        while worker is None:
+            if not self.available():
+                # Pass the wake-up on to the next waiting job
+                self._idle.put(None)
+                queue_wait_ms = round((time.perf_counter() - queued_at) * 1000, 1)
+                return None, queue_wait_ms, "No render worker is running"
+            try:
+                # None: a worker was discarded, check whether any are left
+                worker = self._idle.get(timeout=max(deadline - time.perf_counter(), 0))
+            except queue.Empty:
+                queue_wait_ms = round((time.perf_counter() - queued_at) * 1000, 1)
+                return None, queue_wait_ms, f"No render worker available after {self.max_queue_wait}s"
+        queue_wait_ms = round((time.perf_counter() - queued_at) * 1000, 1)
+
+        try:
+            worker.conn.send(job)
+            if not worker.conn.poll(timeout):
+                self._replace_worker(worker)
+                with self._lock:
+                    self._stats['timeouts'] += 1
+                return None, queue_wait_ms, f"Render timed out after {timeout}s"
+            reply = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            self._replace_worker(worker)
+            return None, queue_wait_ms, f"Render worker crashed: {str(e) or type(e).__name__}"
+
+        worker.jobs += 1
+        self._idle.put(worker)
+        return reply, queue_wait_ms, None
+
+    def render(self, plantuml_code: str) -> Dict:
+        """
+        Render PlantUML to SVG on the next idle worker.
+
+        Returns:
+            Dict with success, svg_content, errors, queue_wait_ms and render_ms
+        """
+        result, queue_wait_ms, error = self._dispatch({"source": plantuml_code}, self.job_timeout)
+        if error:
+            return self._failure(queue_wait_ms, error)
+
+        result["queue_wait_ms"] = queue_wait_ms
+        self._record([result], queue_wait_ms)
+        return result
+
+    def render_batch(self, sources: List[str]) -> List[Dict]:
+        """
+        Render several PlantUML sources in a single worker round trip.
+
+        The whole batch goes to one worker, which renders it on its warm JVM;
+        the timeout scales with the number of sources.
+
+        Returns:
+            One dict per source, in order, with index, success, svg_content,
+            errors, queue_wait_ms and render_ms
+        """
+        if not sources:
+            return []
+        results, queue_wait_ms, error = self._dispatch(
+            {"sources": list(sources)}, self.job_timeout * len(sources)
+        )
+        if error:
+            failure = self._failure(queue_wait_ms, error, count=len(sources))
+            return [dict(failure, index=i, errors=list(failure["errors"])) for i in range(len(sources))]
+
+        for result in results:
+            result["queue_wait_ms"] = queue_wait_ms
+        self._record(results, queue_wait_ms)
+        return results
+
+    def export(self, plantuml_code: str, output_format: str) -> Dict:
+        """
+        Render PlantUML to SVG, PNG or PDF bytes on the next idle worker.
+
+        Returns:
+            Dict with success, data, content_type and errors (see SVGConverter.export)
+        """
+        result, queue_wait_ms, error = self._dispatch(
+            {"export": plantuml_code, "format": output_format}, self.job_timeout
+        )
+        if error:
+            return {"success": False, "data": b"", "content_type": None, "errors": [error]}
+        result["queue_wait_ms"] = queue_wait_ms
+        return result
+
+    def check_syntax(self, plantuml_code: str) -> Dict:
+        """
+        Parse PlantUML on the next idle worker without rendering it.
+
+        Returns:
+            Dict with checked, is_valid and "Line N: message" errors
+            (see SVGConverter.check_syntax)
+        """
+        result, _, error = self._dispatch({"check": plantuml_code}, self.job_timeout)
+        if error:
+            return {"checked": False, "is_valid": False, "errors": [error]}
+        return result
+
+    def _record(self, results: List[Dict], queue_wait_ms: float) -> None:
+        """Count completed renders."""
+        with self._lock:
+            self._stats['jobs'] += len(results)
+            self._stats['queue_wait_ms_total'] += queue_wait_ms * len(results)
+            for result in results:
+                self._stats['render_ms_total'] += result.get("render_ms") or 0
+                if not result.get("success"):
+                    self._stats['failures'] += 1
+
+    def _failure(self, queue_wait_ms: float, message: str, count: int = 1) -> Dict:
+        """Build a failed render result and count it (``count`` times for a batch)."""
+        with self._lock:
+            self._stats['jobs'] += count
+            self._stats['failures'] += count
+        return {
+            "success": False,
+            "svg_content": "",
+            "errors": [message],
+            "queue_wait_ms": queue_wait_ms,
+            "render_ms": None,
+        }
+
+    def stats(self) -> Dict:
+        """Return job counters, worker counts and average queue wait / render time."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['workers'] = len(self._workers)
+        stats['idle_workers'] = sum(1 for worker in list(self._idle.queue) if worker is not None)
+        completed = max(stats['jobs'], 1)
+        stats['avg_queue_wait_ms'] = round(stats.pop('queue_wait_ms_total') / completed, 1)
+        stats['avg_render_ms'] = round(stats.pop('render_ms_total') / completed, 1)
+        return stats
+
+    def shutdown(self) -> None:
+        """Stop all workers."""
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.process.join(timeout=5)
+            self._discard_worker(worker)
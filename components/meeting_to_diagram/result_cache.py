@@ -0,0 +1,112 @@
+"""
+In-memory cache for generated diagram results.
+Keyed by a normalized hash of the meeting content and diagram type, so repeated
+/generate calls for the same meeting (e.g. after a page reload) skip every LLM stage.
+"""
+import copy
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+class DiagramResultCache:
+    """Thread-safe LRU cache with per-entry TTL for generated diagram results."""
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: float = 3600):
+        """
+        Args:
+            max_entries: Maximum number of cached results before LRU eviction
+            ttl_seconds: Seconds after which an entry expires
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _normalize_text(text: str) -> str:
+        """Collapse whitespace and case so cosmetic differences share a key."""
+        return re.sub(r'\s+', ' ', text or '').strip().lower()
+
+    @classmethod
+    def make_key(cls, transcript: str, summary: str, keywords: List[str],
+                 diagram_type: str, generator_version: str) -> str:
+        """
+        Build the cache key for one diagram of a meeting.
+
+        Args:
+            transcript: Meeting transcript
+            summary: Meeting summary
+            keywords: Meeting keywords (order and duplicates are ignored)
+            diagram_type: Diagram type being generated
+            generator_version: Version of the generation pipeline
+
+        Returns:
+            Hex SHA-256 digest identifying the result
+        """
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        normalized = {
+            'transcript': cls._normalize_text(transcript),
+            'summary': cls._normalize_text(summary),
+            'keywords': sorted({cls._normalize_text(k) for k in keywords or [] if k}),
+            'diagram_type': cls._normalize_text(diagram_type),
+            'generator_version': generator_version,
+        }
+        payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return a copy of the cached result, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(value)
+
+    def set(self, key: str, value: Dict) -> None:
+        """Store a copy of a result, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        """Remove a single entry if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and the current size."""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
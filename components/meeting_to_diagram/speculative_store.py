@@ -0,0 +1,128 @@
+"""
+Server-side store for diagrams generated speculatively right after /upload.
+Jobs run in a background thread pool keyed by meeting ID and diagram type, so a
+later /generate call can attach to in-progress or completed work. Jobs that are
+never claimed are counted as waste when they expire.
+"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+
+class _SpeculativeJob:
+    """A single background generation for one meeting and diagram type."""
+
+    __slots__ = ('future', 'content_key', 'created_at', 'started_at', 'finished_at', 'claimed')
+
+    def __init__(self, content_key: str):
+        self.future = None
+        self.content_key = content_key
+        self.created_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.claimed = False
+
+
+class SpeculativeGenerationStore:
+    """Runs and tracks speculative diagram generations per meeting."""
+
+    def __init__(self, max_workers: int = 3, ttl_seconds: float = 1800):
+        """
+        Args:
+            max_workers: Maximum number of concurrent background generations
+            ttl_seconds: Seconds an unclaimed job is kept before it counts as wasted
+        """
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative")
+        self._jobs = {}  # (meeting_id, diagram_type) -> _SpeculativeJob
+        self._lock = threading.Lock()
+        self._stats = {
+            'started': 0,
+            'claimed': 0,
+            'wasted': 0,
+            'wasted_seconds': 0.0,
+            'failed': 0,
+        }
+
+    def start(self, meeting_id: str, diagram_types: List[str], content_keys: Dict[str, str],
+              generate_func: Callable[[str], Dict]) -> None:
+        """
+        Start background generation for each diagram type of a meeting.
+
+        Args:
+            meeting_id: ID of the analyzed meeting
+            diagram_types: Suggested diagram types
+            content_keys: Diagram type -> key of the meeting content used, so a
+                claim with different content does not attach to stale work
+            generate_func: Called with a diagram type; returns the diagram result
+        """
+        self.sweep()
+        with self._lock:
+            for diagram_type in diagram_types:
+                if (meeting_id, diagram_type) in self._jobs:
+                    continue
+                job = _SpeculativeJob(content_keys.get(diagram_type))
+                job.future = self._executor.submit(self._run, job, generate_func, diagram_type)
+                self._jobs[(meeting_id, diagram_type)] = job
+                self._stats['started'] += 1
+        print(f"🔮 Started speculative generation for {meeting_id}: {', '.join(diagram_types)}")
+
+    def _run(self, job: _SpeculativeJob, generate_func: Callable[[str], Dict], diagram_type: str) -> Dict:
+        """Run one job, recording its timing."""
+        job.started_at = time.monotonic()
+        try:
+            return generate_func(diagram_type)
+        except Exception:
+            with self._lock:
+                self._stats['failed'] += 1
+            raise
+        finally:
+            job.finished_at = time.monotonic()
+
+    def claim(self, meeting_id: str, diagram_type: str, content_key: str) -> Optional[Future]:
+        """
+        Attach to a speculative job.
+
+        Returns:
+            The job's future (possibly still running), or None if there is no
+            job for this meeting and diagram type or its content differs
+        """
+        if not meeting_id:
+            return None
+        with self._lock:
+            job = self._jobs.pop((meeting_id, diagram_type), None)
+            if job is None:
+                return None
+            if job.content_key != content_key:
+                self._record_waste(job)
+                return None
+            job.claimed = True
+            self._stats['claimed'] += 1
+            return job.future
+
+    def sweep(self) -> None:
+        """Expire unclaimed jobs older than the TTL and count them as wasted."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, job in self._jobs.items() if now - job.created_at > self.ttl_seconds]
+            for key in expired:
+                job = self._jobs.pop(key)
+                job.future.cancel()
+                self._record_waste(job)
+
+    def _record_waste(self, job: _SpeculativeJob) -> None:
+        """Add an abandoned job to the waste counters. Caller holds the lock."""
+        self._stats['wasted'] += 1
+        if job.started_at is not None:
+            finished_at = job.finished_at if job.finished_at is not None else time.monotonic()
+            self._stats['wasted_seconds'] += finished_at - job.started_at
+
+    def stats(self) -> Dict:
+        """Return counters for started, claimed, wasted and pending jobs."""
+        self.sweep()
+        with self._lock:
+            stats = dict(self._stats)
+            stats['wasted_seconds'] = round(stats['wasted_seconds'], 2)
+            stats['pending'] = len(self._jobs)
+            return stats
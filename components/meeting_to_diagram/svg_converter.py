@@ -2,26 +2,47 @@ import jpype
 import jpype.imports
 from jpype.types import *
 import os
-from pathlib import Path
-from typing import Dict, List
+from typing import List, Optional
 import urllib.request
-import tempfile
-import subprocess
+import threading
+import time
+from plantuml_daemon import PlantUMLRenderDaemon
+
+# Version of the bundled PlantUML engine; part of every render cache key
+PLANTUML_VERSION = "1.2025.3"
+PLANTUML_JAR_NAME = f"plantuml-{PLANTUML_VERSION}.jar"
+
+# Formats served by export(), with their HTTP content types
+EXPORT_FORMATS = {
+    "svg": "image/svg+xml",
+    "png": "image/png",
+    "pdf": "application/pdf",
+}
 
 class SVGConverter:
     def __init__(self, plantuml_jar_path: str = None, output_dir: str = "./output"):
-        """Initialize the SVGConverter with PlantUML JAR path and output directory."""
+        """
+        Initialize the SVGConverter with PlantUML JAR path and output directory.
+        
+        ``output_dir`` is only used by callers that want a file; rendering
+        itself happens in memory.
+        """
 
-        abs_path = os.path.abspath("../lib/plantuml-1.2025.3.jar")
+        abs_path = os.path.abspath(os.path.join("..", "lib", PLANTUML_JAR_NAME))
         if os.path.exists(abs_path):
             plantuml_jar_path = abs_path
             
         if plantuml_jar_path is None:
-            plantuml_jar_path = os.path.join(os.path.dirname(__file__), "..", "lib", "plantuml-1.2025.3.jar")
+            plantuml_jar_path = os.path.join(os.path.dirname(__file__), "..", "lib", PLANTUML_JAR_NAME)
     
         self.plantuml_jar_path = plantuml_jar_path
+        self.plantuml_version = PLANTUML_VERSION
         self.output_dir = output_dir
         self.jvm_started = False
+        self.owns_jvm = False
+        self.render_timeout = float(os.getenv("PLANTUML_RENDER_TIMEOUT", "30"))
+        self._daemons = {}  # output format -> PlantUMLRenderDaemon
+        self._daemon_lock = threading.Lock()
         self.jar_available = self._check_jar_availability()
         
         # Try to download JAR if not available
@@ -48,7 +69,7 @@ class SVGConverter:
             os.makedirs(lib_dir, exist_ok=True)
             
             # Download PlantUML JAR
-            plantuml_url = "https://github.com/plantuml/plantuml/releases/download/v1.2025.3/plantuml-1.2025.3.jar"
+            plantuml_url = f"https://github.com/plantuml/plantuml/releases/download/v{PLANTUML_VERSION}/{PLANTUML_JAR_NAME}"
             print(f"Downloading PlantUML JAR from {plantuml_url}...")
             urllib.request.urlretrieve(plantuml_url, self.plantuml_jar_path)
             
@@ -67,6 +88,10 @@ class SVGConverter:
     def start_jvm(self):
         """Start the JVM with PlantUML classpath."""
         if not self.jvm_started and self.jar_available:
+            if jpype.isJVMStarted():
+                # JPype allows one JVM per process; reuse it instead of failing
+                self.jvm_started = True
+                return
             try:
                 print(f"Starting JVM with PlantUML JAR: {self.plantuml_jar_path}")
                 jpype.startJVM(
@@ -75,103 +100,239 @@ class SVGConverter:
                     convertStrings=True
                 )
                 self.jvm_started = True
+                self.owns_jvm = True
                 print("JVM started successfully")
             except Exception as e:
                 print(f"Warning: Failed to start JVM: {str(e)}")
                 self.jvm_started = False
 
-    def convert_to_svg(self, plantuml_code: str) -> dict:
-        """Convert PlantUML code to SVG format using multiple fallback methods."""
-        output_file = os.path.join(self.output_dir, "diagram.svg")
-        os.makedirs(self.output_dir, exist_ok=True)  # Ensure output directory exists
-
+    def convert_to_svg(self, plantuml_code: str, output_file: Optional[str] = None) -> dict:
+        """
+        Convert PlantUML code to SVG format using multiple fallback methods.
+        
+        Rendering happens in memory; nothing touches the disk unless
+        ``output_file`` is given, in which case the SVG is also written there.
+        """
         # Method 1: Try JPype with PlantUML JAR (if available)
-        result = self._convert_with_jpype(plantuml_code, output_file)
-        if result["success"]:
-            return result
+        result = self._convert_with_jpype(plantuml_code)
 
         # Method 2: Try command-line Java with JAR
-        result = self._convert_with_java_command(plantuml_code, output_file)
-        if result["success"]:
-            return result
+        if not result["success"]:
+            result = self._convert_with_java_command(plantuml_code)
         
-        return {
-            "success": False,
-            "output_file": "",
-            "svg_content": "",
-            "errors": ["All conversion methods failed. Please ensure PlantUML is installed or JAR is available."]
-        }
+        if not result["success"]:
+            return {
+                "success": False,
+                "output_file": "",
+                "svg_content": "",
+                "errors": ["All conversion methods failed. Please ensure PlantUML is installed or JAR is available."]
+            }
+        
+        result["output_file"] = ""
+        if output_file:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+                with open(output_file, "w", encoding="utf-8") as f:
+                    f.write(result["svg_content"])
+                result["output_file"] = output_file
+            except OSError as e:
+                result["errors"].append(f"Could not write {output_file}: {str(e)}")
+        
+        return result
+
+    def convert_batch(self, sources: List[str]) -> List[dict]:
+        """
+        Convert several PlantUML sources (any mix of @startuml/@startchen/...)
+        to SVG in one call on the warm JVM.
+
+        Sources that JPype cannot render are sent to the persistent Java
+        process together, in a single round trip.
 
-    def _convert_with_jpype(self, plantuml_code: str, output_file: str) -> dict:
-        """Convert using JPype and PlantUML JAR."""
+        Args:
+            sources: PlantUML sources to render
+
+        Returns:
+            One result per source, in order, each with index, success,
+            svg_content, render_ms and its own errors
+        """
+        results = []
+        for index, plantuml_code in enumerate(sources):
+            start = time.perf_counter()
+            try:
+                result = self._convert_with_jpype(plantuml_code)
+            except Exception as e:
+                result = {"success": False, "errors": [f"JPype conversion failed: {str(e)}"]}
+            result["index"] = index
+            result["render_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            results.append(result)
+
+        retry = [result["index"] for result in results if not result["success"]]
+        if retry and self.jar_available:
+            try:
+                daemon_results = self._get_daemon().render_batch([sources[i] for i in retry])
+            except Exception as e:
+                daemon_results = [{"success": False, "errors": [f"Java command conversion failed: {str(e)}"]}
+                                  for _ in retry]
+            for index, daemon_result in zip(retry, daemon_results):
+                if daemon_result["success"]:
+                    results[index] = {
+                        "index": index,
+                        "success": True,
+                        "svg_content": daemon_result["data"].decode("utf-8"),
+                        "render_ms": daemon_result.get("render_ms"),
+                        "errors": []
+                    }
+                else:
+                    results[index]["errors"].append(f"Java command failed: {'; '.join(daemon_result['errors'])}")
+
+        for result in results:
+            result.setdefault("svg_content", "")
+        return results
+
+    def export(self, plantuml_code: str, output_format: str = "svg") -> dict:
+        """
+        Render PlantUML to any of EXPORT_FORMATS in memory.
+
+        Args:
+            plantuml_code: PlantUML source
+            output_format: "svg", "png" or "pdf"
+
+        Returns:
+            Dict with success, data (rendered bytes), content_type and errors
+        """
+        output_format = output_format.lower()
+        if output_format not in EXPORT_FORMATS:
+            return {"success": False, "data": b"", "content_type": None,
+                    "errors": [f"Unsupported export format: {output_format}"]}
+
+        result = self._render_with_jpype(plantuml_code, output_format)
+        if not result["success"] and self.jar_available:
+            try:
+                daemon_result = self._get_daemon(output_format).render(plantuml_code)
+            except Exception as e:
+                daemon_result = {"success": False, "errors": [f"Java command conversion failed: {str(e)}"]}
+            if daemon_result["success"]:
+                result = {"success": True, "data": daemon_result["data"], "errors": []}
+            else:
+                result["errors"].extend(daemon_result["errors"])
+
+        result["content_type"] = EXPORT_FORMATS[output_format]
+        result.setdefault("data", b"")
+        return result
+
+    def _render_with_jpype(self, plantuml_code: str, output_format: str) -> dict:
+        """Render with JPype into an in-memory stream; returns success, data (bytes) and errors."""
         if not self.jvm_started or not self.jar_available:
             return {"success": False, "errors": ["JVM not started or JAR not available"]}
 
         try:
             from net.sourceforge.plantuml import SourceStringReader, FileFormatOption, FileFormat
-            from java.io import FileOutputStream
+            from java.io import ByteArrayOutputStream
             
             reader = SourceStringReader(plantuml_code)
-            output_stream = FileOutputStream(output_file)
-            reader.outputImage(output_stream, FileFormatOption(FileFormat.SVG))
+            output_stream = ByteArrayOutputStream()
+            reader.outputImage(output_stream, FileFormatOption(FileFormat.valueOf(output_format.upper())))
             output_stream.close()
             
-            # Verify the file was created and read its content
-            if os.path.exists(output_file):
-                with open(output_file, "r", encoding="utf-8") as f:
-                    svg_content = f.read()
-                    
-                return {
-                    "success": True,
-                    "output_file": output_file,
-                    "svg_content": svg_content,
-                    "errors": []
-                }
-            else:
-                return {"success": False, "errors": ["SVG file was not created"]}
+            # Copy the Java byte[] once on the Python side
+            data = bytes(output_stream.toByteArray())
+            if not data:
+                return {"success": False, "errors": [f"PlantUML produced no {output_format.upper()} output"]}
+            return {"success": True, "data": data, "errors": []}
                 
         except Exception as e:
             return {"success": False, "errors": [f"JPype conversion failed: {str(e)}"]}
 
-    def _convert_with_java_command(self, plantuml_code: str, output_file: str) -> dict:
-        """Convert using Java command line with PlantUML JAR."""
+    def _convert_with_jpype(self, plantuml_code: str) -> dict:
+        """Convert to SVG using JPype and PlantUML JAR, rendering into an in-memory stream."""
+        result = self._render_with_jpype(plantuml_code, "svg")
+        if not result["success"]:
+            return result
+        return {
+            "success": True,
+            "svg_content": result["data"].decode("utf-8"),
+            "errors": []
+        }
+
+    def check_syntax(self, plantuml_code: str) -> dict:
+        """
+        Parse PlantUML with the local engine (SyntaxChecker) without rendering it.
+
+        Returns:
+            Dict with checked (False when the JVM is unavailable), is_valid and
+            errors formatted as "Line N: message", N being 1-based in plantuml_code
+        """
+        if not self.jvm_started or not self.jar_available:
+            return {"checked": False, "is_valid": False, "errors": ["JVM not started or JAR not available"]}
+
+        try:
+            from net.sourceforge.plantuml.syntax import SyntaxChecker
+            result = SyntaxChecker.checkSyntax(plantuml_code)
+        except Exception as e:
+            return {"checked": False, "is_valid": False, "errors": [f"Syntax check failed: {str(e)}"]}
+
+        if not result.isError():
+            return {"checked": True, "is_valid": True, "errors": []}
+
+        messages = [str(message) for message in result.getErrors()] or ["Syntax error"]
+        location = result.getLineLocation()
+        if location is None:
+            return {"checked": True, "is_valid": False, "errors": messages}
+
+        # Positions count from the @start line, not from the top of the string
+        lines = plantuml_code.split('\n')
+        start_index = next(
+            (i for i, line in enumerate(lines) if line.strip().lower().startswith('@start')), 0
+        )
+        line_no = start_index + int(location.getPosition()) + 1
+        return {"checked": True, "is_valid": False, "errors": [f"Line {line_no}: {message}" for message in messages]}
+
+    def _get_daemon(self, output_format: str = "svg") -> PlantUMLRenderDaemon:
+        """Return the persistent PlantUML process for a format, starting it on first use."""
+        with self._daemon_lock:
+            if output_format not in self._daemons:
+                self._daemons[output_format] = PlantUMLRenderDaemon(
+                    self.plantuml_jar_path,
+                    output_format=output_format,
+                    render_timeout=self.render_timeout
+                )
+            return self._daemons[output_format]
+
+    def _convert_with_java_command(self, plantuml_code: str) -> dict:
+        """Convert using a persistent Java process (PlantUML pipe mode) with the JAR."""
         if not self.jar_available:
             return {"success": False, "errors": ["PlantUML JAR not available"]}
 
         try:
-            # Create temporary file for PlantUML input
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.puml', delete=False) as temp_file:
-                temp_file.write(plantuml_code)
-                temp_input = temp_file.name
-
-            # Run Java command to generate SVG
-            cmd = [
-                'java', '-jar', self.plantuml_jar_path,
-                '-tsvg', '-o', self.output_dir, temp_input
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            result = self._get_daemon().render(plantuml_code)
             
-            # Clean up temporary file
-            os.unlink(temp_input)
-            
-            if result.returncode == 0 and os.path.exists(output_file):
-                with open(output_file, "r", encoding="utf-8") as f:
-                    svg_content = f.read()
-                    
+            if result["success"]:
                 return {
                     "success": True,
-                    "output_file": output_file,
-                    "svg_content": svg_content,
+                    "svg_content": result["data"].decode("utf-8"),
                     "errors": []
                 }
             else:
-                return {"success": False, "errors": [f"Java command failed: {result.stderr}"]}
+                return {"success": False, "errors": [f"Java command failed: {'; '.join(result['errors'])}"]}
                 
         except Exception as e:
             return {"success": False, "errors": [f"Java command conversion failed: {str(e)}"]}
 
+    def health_check(self) -> dict:
+        """Report whether the JPype and persistent-process render paths respond."""
+        health = {"jvm_started": self.jvm_started, "jar_available": self.jar_available, "daemon_alive": False}
+        if self.jar_available:
+            try:
+                daemon = self._get_daemon()
+                health["daemon_alive"] = daemon.health_check()
+                health["daemon_restarts"] = daemon.restarts
+            except Exception as e:
+                health["daemon_error"] = str(e)
+        return health
+
     def __del__(self):
-        """Shutdown JVM when the object is destroyed."""
-        if self.jvm_started and jpype.isJVMStarted():
+        """Stop the render daemon and shut down the JVM if this object started it."""
+        for daemon in self._daemons.values():
+            daemon.stop()
+        if self.owns_jvm and jpype.isJVMStarted():
             jpype.shutdownJVM()
\ No newline at end of file
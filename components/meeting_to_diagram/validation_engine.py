@@ -0,0 +1,188 @@
+"""
+Diagram-type validation driven by prompt_templates.DIAGRAM_VALIDATION_PATTERNS.
+The pattern tables are compiled once at import and keyed by canonical
+diagram type name. A diagram's code lines are joined once and each pattern
+scans that text in one search / finditer call (matches are mapped back to
+lines), instead of a Python loop over lines and patterns. Findings are
+structured dicts with line numbers; messages of line findings start with
+"Line N:" so compact revision can target them.
+
+Only forbidden patterns are errors. Missing required patterns and "at least
+one of" groups are warnings: they describe the style the prompts ask for,
+while the elements a diagram cannot do without are checked by
+PlantUMLProcessor._validate_diagram_type.
+"""
+import re
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from plantuml_tokens import LineToken, CODE_KINDS
+from prompt_templates import DIAGRAM_VALIDATION_PATTERNS
+
+ERROR = 'error'
+WARNING = 'warning'
+
+# Normalized spelling (lowercase letters only, "uml" prefix dropped) -> canonical name
+CANONICAL_DIAGRAM_TYPES = {
+    'sequencediagram': 'Sequence Diagram',
+    'sequence': 'Sequence Diagram',
+    'classdiagram': 'Class Diagram',
+    'class': 'Class Diagram',
+    'flowchartdiagram': 'Flowchart Diagram',
+    'flowchart': 'Flowchart Diagram',
+    'activitydiagram': 'Flowchart Diagram',
+    'activity': 'Flowchart Diagram',
+    'componentdiagram': 'Component Diagram',
+    'usecasediagram': 'Usecase Diagram',
+    'usecase': 'Usecase Diagram',
+    'erdiagram': 'ER Diagram',
+    'entityrelationshipdiagram': 'ER Diagram',
+}
+
+# Descriptions of the "at least one of" groups (required_<group>)
+GROUP_DESCRIPTIONS = {
+    'required_relationships': 'relationships',
+    'required_composite_format': 'composite attributes',
+}
+
+
+def canonical_diagram_type(diagram_type: Optional[str]) -> Optional[str]:
+    """
+    Map a diagram type name to the name used across the app.
+
+    "UML Class Diagram", "class diagram" and "Class Diagram" all give
+    "Class Diagram"; "Use Case Diagram" gives "Usecase Diagram".
+
+    Returns:
+        Canonical name, or None for unknown types
+    """
+    if not diagram_type:
+        return None
+    normalized = re.sub(r'[^a-z]', '', diagram_type.lower())
+    if normalized.startswith('uml'):
+        normalized = normalized[3:]
+    return CANONICAL_DIAGRAM_TYPES.get(normalized)
+
+
+def anchor_word_start(pattern: str) -> str:
+    """
+    Patterns starting with a word must not match inside a longer word
+    ("factor" is not "actor"); the anchor also stops \\w+ from being retried
+    at every position of a word.
+    """
+    return r'\b' + pattern if re.match(r'[A-Za-z]|\\w', pattern) else pattern
+
+
+class _RuleSet:
+    """Compiled patterns of one diagram type."""
+
+    __slots__ = ('diagram_type', 'required', 'forbidden', 'groups')
+
+    def __init__(self, diagram_type: str, table: Dict[str, list]):
+        self.diagram_type = diagram_type
+        self.required = _compile(table.get('required_patterns', []))
+        self.forbidden = _compile(table.get('forbidden_patterns', []))
+        self.groups = [(name, _compile(rules)) for name, rules in table.items()
+                       if name.startswith('required_') and name != 'required_patterns']
+
+    def scan(self, tokens: List[LineToken]) -> List[Dict]:
+        """Evaluate every pattern of the type against the tokenized source."""
+        findings = []
+        code_tokens = [token for token in tokens if token.kind in CODE_KINDS]
+        # Required patterns may occur anywhere in code lines, labels included;
+        # one search per pattern (an alternation of all of them defeats sre's
+        # literal-prefix search and is slower)
+        source = '\n'.join(token.text.strip() for token in code_tokens)
+
+        for regex, description in self.required:
+            if not regex.search(source):
+                findings.append(self._finding(
+                    None, WARNING, 'required', regex.pattern, description,
+                    f"Missing {description} in {self.diagram_type}"
+                ))
+
+        # Forbidden patterns only count outside labels, strings and comments
+        if self.forbidden:
+            masked = '\n'.join(token.code for token in code_tokens)
+            line_starts = [0]
+            for token in code_tokens[:-1]:
+                line_starts.append(line_starts[-1] + len(token.code) + 1)
+            hits = []
+            for order, (regex, description) in enumerate(self.forbidden):
+                reported = set()
+                for match in regex.finditer(masked):
+                    index = bisect_right(line_starts, match.start()) - 1
+                    if index not in reported:
+                        reported.add(index)
+                        hits.append((index, order, regex.pattern, description))
+            for index, _, pattern, description in sorted(hits):
+                number = code_tokens[index].number
+                findings.append(self._finding(
+                    number, ERROR, 'forbidden', pattern, description,
+                    f"Line {number}: {_upper_first(description)} is not allowed in {_article(self.diagram_type)} {self.diagram_type}"
+                ))
+
+        for name, rules in self.groups:
+            if not any(regex.search(source) for regex, _ in rules):
+                description = GROUP_DESCRIPTIONS.get(name, name[len('required_'):].replace('_', ' '))
+                findings.append(self._finding(
+                    None, WARNING, 'required_any', name, description,
+                    f"No {description} found in {self.diagram_type}"
+                ))
+
+        return findings
+
+    @staticmethod
+    def _finding(line: Optional[int], severity: str, rule: str, pattern: str,
+                 description: str, message: str) -> Dict:
+        return {
+            'line': line,
+            'severity': severity,
+            'rule': rule,
+            'pattern': pattern,
+            'description': description,
+            'message': message,
+        }
+
+
+def _compile(rules: List[Tuple[str, str]]) -> List[Tuple[re.Pattern, str]]:
+    return [(re.compile(anchor_word_start(pattern), re.MULTILINE), description) for pattern, description in rules]
+
+
+def _article(noun: str) -> str:
+    return 'an' if noun[:1] in 'AEIO' else 'a'
+
+
+def _upper_first(text: str) -> str:
+    return text[:1].upper() + text[1:]
+
+
+def _compile_rule_sets() -> Dict[str, _RuleSet]:
+    rule_sets = {}
+    for name, table in DIAGRAM_VALIDATION_PATTERNS.items():
+        canonical = canonical_diagram_type(name)
+        if canonical is None:
+            raise ValueError(f"DIAGRAM_VALIDATION_PATTERNS: unknown diagram type {name!r}")
+        rule_sets[canonical] = _RuleSet(canonical, table)
+    return rule_sets
+
+
+RULE_SETS = _compile_rule_sets()
+
+
+def check_patterns(tokens: List[LineToken], diagram_type: Optional[str]) -> List[Dict]:
+    """
+    Check tokenized PlantUML against the pattern table of its diagram type.
+
+    Args:
+        tokens: Output of plantuml_tokens.tokenize
+        diagram_type: Diagram type in any spelling ("UML Class Diagram", "Class Diagram", ...)
+
+    Returns:
+        Findings (dicts with line, severity, rule, pattern, description and
+        message), file-level ones first, then by line; empty for unknown types
+    """
+    rule_set = RULE_SETS.get(canonical_diagram_type(diagram_type))
+    if rule_set is None:
+        return []
+    return rule_set.scan(tokens)
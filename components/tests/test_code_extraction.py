@@ -0,0 +1,69 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'diagram_to_code'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'meeting_to_diagram'))
+
+import pytest
+
+from code_stream import extract_code
+from granite_diagram_to_code import GraniteCodeGenerator
+
+CLASS_DIAGRAM = """@startuml
+class Order {
+  -total : double
+}
+@enduml"""
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    def make(**env):
+        monkeypatch.setenv("REPLICATE_API_TOKEN", "test-token")
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return GraniteCodeGenerator()
+    return make
+
+
+def test_extract_code_without_opening_fence():
+    # The prompts end with an opening fence, so replies usually start with code
+    code, language = extract_code("public class Order {\n}\n```\nNotes ```java x```", "java")
+    assert code == "public class Order {\n}"
+    assert language == "java"
+
+
+def test_extract_code_with_repeated_opening_fence():
+    code, language = extract_code("```sql\nCREATE TABLE orders (id INT);\n```\n")
+    assert code == "CREATE TABLE orders (id INT);"
+    assert language == "sql"
+
+
+def test_extract_code_without_closing_fence():
+    code, _ = extract_code("CREATE TABLE orders (id INT);\n``", "sql")
+    assert code == "CREATE TABLE orders (id INT);"
+
+
+def test_enrichment_accepts_fenceless_reply(generator, monkeypatch):
+    code_generator = generator(CODE_GEN_MODE="template", CODE_GEN_LLM_ENRICH="true", CODE_GEN_CHUNKING="off")
+    enriched = "public class Order {\n    /** Order total. */\n    private double total;\n}"
+    monkeypatch.setattr(code_generator, "_try_alternative_generation", lambda prompt: enriched + "\n```\n")
+
+    result = code_generator.generate_real_code_from_plantuml(CLASS_DIAGRAM, "Class Diagram")
+
+    assert result["success"]
+    assert result["generator"] == "template+llm"
+    assert result["code"] == enriched
+
+
+def test_generate_unit_accepts_fenceless_reply(generator, monkeypatch):
+    code_generator = generator(CODE_GEN_MODE="llm")
+    unit_code = "public class Order {\n    private double total;\n}"
+    monkeypatch.setattr(code_generator, "_try_alternative_generation",
+                        lambda prompt: "import java.util.List;\n\n" + unit_code + "\n```")
+
+    update = code_generator._generate_unit("class Order", {"code": unit_code, "imports": []}, "java", [])
+
+    assert update["generator"] == "llm"
+    assert update["code"] == unit_code
+    assert update["imports"] == ["import java.util.List;"]
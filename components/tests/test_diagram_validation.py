@@ -0,0 +1,31 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'meeting_to_diagram'))
+
+from plantuml_utils import PlantUMLProcessor
+
+
+def test_usecase_diagram_without_actors_or_use_cases_is_invalid():
+    code = "@startuml\nnote \"Nothing here\" as N1\n@enduml"
+
+    is_valid, errors = PlantUMLProcessor().validate_plantuml(code, "Usecase Diagram")
+
+    assert not is_valid
+    assert "No actors or use cases found in use case diagram" in errors
+
+
+def test_usecase_diagram_with_actor_and_use_case_is_valid():
+    code = "@startuml\nactor Customer\nCustomer --> (Place Order)\n@enduml"
+
+    is_valid, errors = PlantUMLProcessor().validate_plantuml(code, "Usecase Diagram")
+
+    assert is_valid, errors
+
+
+def test_diagram_type_names_are_canonicalized():
+    code = "@startuml\nnote \"Nothing here\" as N1\n@enduml"
+
+    _, errors = PlantUMLProcessor().validate_plantuml(code, "UML Class Diagram")
+
+    assert "No class definitions found in class diagram" in errors
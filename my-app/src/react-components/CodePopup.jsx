@@ -1,9 +1,80 @@
 import React from 'react';
 import './CodePopup.css';
 
-const CodePopup = ({ isOpen, onClose, language , code}) => {
+const STREAMED_DIAGRAM_TYPES = ["Class Diagram", "ER Diagram"];
+
+// Read Server-Sent Events from a fetch response (EventSource cannot POST)
+const readEvents = async (response, onEvent) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const messages = buffer.split('\n\n');
+    buffer = messages.pop();
+    for (const message of messages) {
+      const data = message.split('\n').find(line => line.startsWith('data: '));
+      if (data) onEvent(JSON.parse(data.slice('data: '.length)));
+    }
+  }
+};
+
+const CodePopup = ({ isOpen, onClose, language , code, plantumlCode, diagramType, meetingData, onCodeGenerated }) => {
   const [copied, setCopied] = React.useState(false);
-  const placeholderJavaCode = code
+  const [streamed, setStreamed] = React.useState({ code: '', language: null, status: 'idle', error: null });
+  const placeholderJavaCode = code || streamed.code
+
+  // Without generated code, stream it while the popup is open so it shows up as it is written
+  React.useEffect(() => {
+    if (!isOpen || code || !plantumlCode || !STREAMED_DIAGRAM_TYPES.includes(diagramType)) return;
+
+    const controller = new AbortController();
+    setStreamed({ code: '', language: null, status: 'streaming', error: null });
+
+    const stream = async () => {
+      const response = await fetch("http://127.0.0.1:5000/generate-code/stream", {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+        },
+        body: JSON.stringify({
+          plantuml_code: plantumlCode,
+          diagram_type: diagramType,
+          meeting_data: meetingData
+        }),
+        signal: controller.signal,
+      });
+      if (!response.ok) {
+        const data = await response.json().catch(() => ({}));
+        throw new Error(data.error || `HTTP ${response.status}`);
+      }
+
+      await readEvents(response, (event) => {
+        if (event.type === 'language') {
+          setStreamed(prev => ({ ...prev, language: event.language }));
+        } else if (event.type === 'chunk') {
+          setStreamed(prev => ({ ...prev, code: prev.code + event.text }));
+        } else if (event.type === 'replace') {
+          setStreamed(prev => ({ ...prev, code: event.code }));
+        } else if (event.type === 'done') {
+          setStreamed({ code: event.code, language: event.language, status: 'done', error: null });
+          if (onCodeGenerated) onCodeGenerated(event.code, event.language);
+        } else if (event.type === 'error') {
+          setStreamed(prev => ({ ...prev, status: 'error', error: event.error }));
+        }
+      });
+    };
+
+    stream().catch((error) => {
+      if (error.name === 'AbortError') return;
+      console.error('Error streaming generated code:', error);
+      setStreamed(prev => ({ ...prev, status: 'error', error: error.message }));
+    });
+
+    return () => controller.abort();
+  }, [isOpen, code, plantumlCode, diagramType]);
 
   const copyToClipboard = async () => {
     try {
@@ -50,7 +121,11 @@ const CodePopup = ({ isOpen, onClose, language , code}) => {
                 <path d="M8 6L2 12L8 18" stroke="currentColor" strokeWidth="2" strokeLinecap="round" strokeLinejoin="round"/>
               </svg>
             </div>
-            <span className="language-name">{language}</span>
+            <span className="language-name">
+              {language || streamed.language}
+              {!code && streamed.status === 'streaming' && ' · generating…'}
+              {!code && streamed.status === 'error' && ` · ${streamed.error}`}
+            </span>
           </div>
           <div className="popup-actions">
             <button className={`copy-button ${copied ? 'copied' : ''}`} onClick={copyToClipboard}>
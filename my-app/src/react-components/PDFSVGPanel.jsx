@@ -1,11 +1,73 @@
-import React from 'react';
+import React, { useState } from 'react';
 
-const PDFSVGPanel = ({ diagramType, link, isLoading, isRetrying }) => {
-  console.log(link);
+const EXPORT_FORMATS = ['svg', 'png', 'pdf'];
+
+const PDFSVGPanel = ({ diagramType, link, svgContent, plantumlCode, isLoading, isRetrying }) => {
+  const [exportingFormat, setExportingFormat] = useState(null);
+
+  // Render the diagram server-side in the requested format and download it
+  const handleExport = async (format) => {
+    if (!plantumlCode) return;
+    setExportingFormat(format);
+    try {
+      const response = await fetch("http://127.0.0.1:5000/export", {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+        },
+        body: JSON.stringify({
+          plantuml_code: plantumlCode,
+          diagram_type: diagramType,
+          format: format
+        }),
+      });
+
+      if (!response.ok) {
+        const data = await response.json().catch(() => ({}));
+        alert(`Export failed: ${data.error || response.statusText}`);
+        return;
+      }
+
+      const blob = await response.blob();
+      const url = URL.createObjectURL(blob);
+      const anchor = document.createElement('a');
+      anchor.href = url;
+      anchor.download = `${(diagramType || 'diagram').toLowerCase().replace(/\s+/g, '_')}.${format}`;
+      document.body.appendChild(anchor);
+      anchor.click();
+      anchor.remove();
+      URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error(`Error exporting ${format}:`, error);
+      alert('Network error while exporting diagram');
+    } finally {
+      setExportingFormat(null);
+    }
+  };
+
+  // Prefer the inline SVG rendered by the backend; fall back to the image URL
+  const imageSrc = svgContent
+    ? `data:image/svg+xml;charset=utf-8,${encodeURIComponent(svgContent)}`
+    : link;
   return (
     <div className="pdf-svg-container">
       <div className="panel-header">
         <h3>{diagramType || 'PDF/SVG'}</h3>
+        {plantumlCode && (
+          <div className="code-actions">
+            {EXPORT_FORMATS.map((format) => (
+              <button
+                key={format}
+                className="edit-button"
+                onClick={() => handleExport(format)}
+                disabled={isLoading || exportingFormat !== null}
+                title={`Download as ${format.toUpperCase()}`}
+              >
+                {exportingFormat === format ? '...' : format.toUpperCase()}
+              </button>
+            ))}
+          </div>
+        )}
       </div>
       <div className="pdf-svg-content">
         <div className="svg-placeholder">
@@ -14,9 +76,9 @@ const PDFSVGPanel = ({ diagramType, link, isLoading, isRetrying }) => {
               <div className="spinner"></div>
               <p>{isRetrying ? 'Regenerating diagram & code...' : 'Updating diagram...'}</p>
             </div>
-          ) : link ? (
+          ) : imageSrc ? (
             <img 
-              src={link}
+              src={imageSrc}
               alt={`${diagramType} diagram`} 
               className="diagram-preview"
               height={600}
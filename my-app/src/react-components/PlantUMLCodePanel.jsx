@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 
-const PlantUMLCodePanel = ({ code, diagramType, onCodeUpdate, isUpdating }) => {
+const PlantUMLCodePanel = ({ code, diagramType, onCodeUpdate, isUpdating, onLiveChange, onEditingChange }) => {
   const [isEditing, setIsEditing] = useState(false);
   const [editedCode, setEditedCode] = useState(code || '');
   const [hasChanges, setHasChanges] = useState(false);
@@ -28,10 +28,12 @@ ClassName --> AnotherClass : association
 
   const handleEdit = () => {
     setIsEditing(true);
+    if (onEditingChange) onEditingChange(true);
   };
 
   const handleCancel = () => {
     setIsEditing(false);
+    if (onEditingChange) onEditingChange(false);
     setEditedCode(code || placeholderCode);
     setHasChanges(false);
   };
@@ -41,12 +43,15 @@ ClassName --> AnotherClass : association
       onCodeUpdate(editedCode);
     }
     setIsEditing(false);
+    if (onEditingChange) onEditingChange(false);
   };
 
   const handleCodeChange = (e) => {
     const newCode = e.target.value;
     setEditedCode(newCode);
     setHasChanges(newCode !== (code || placeholderCode));
+    // Stream the revision to the live preview
+    if (onLiveChange) onLiveChange(newCode);
   };
 
   return (
@@ -118,7 +123,7 @@ ClassName --> AnotherClass : association
       
       {isEditing && hasChanges && (
         <div className="changes-indicator">
-          <span>⚠️ Unsaved changes - click Save to regenerate diagram</span>
+          <span>⚠️ Unsaved changes - previewing live, click Save to keep them</span>
         </div>
       )}
     </div>
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useState, useRef, useEffect } from 'react';
 import { useLocation, useNavigate } from 'react-router-dom';
 import './PlantUMLDisplay.css';
 import SummaryButton from './SummaryButton';
@@ -33,6 +33,9 @@ const PlantUMLDisplay = () => {
   const [isRegeneratingSvg, setIsRegeneratingSvg] = useState(false);
   const [isRetrying, setIsRetrying] = useState(false);
   const [isUpdatingCode, setIsUpdatingCode] = useState(false);
+  const [isExportingZip, setIsExportingZip] = useState(false);
+  const [livePreview, setLivePreview] = useState(null);
+  const previewRef = useRef({ sessionId: null, source: null, seq: 0 });
   const [diagramsState, setDiagramsState] = useState(diagrams || []);
 
   // Get data from navigation state
@@ -71,17 +74,81 @@ const PlantUMLDisplay = () => {
     setShowCodePopup(false);
   };
 
+  // Keep code streamed by the popup so reopening it does not generate again
+  const handleCodeGenerated = (code, language) => {
+    const tabIndex = activeTab;
+    setDiagramsState(prevDiagrams => 
+      prevDiagrams.map((diagram, index) => 
+        index === tabIndex 
+          ? { ...diagram, real_code: code, real_code_language: language }
+          : diagram
+      )
+    );
+  };
+
   const handleGoBack = () => {
     navigate('/');
   };
 
+  // Live preview: while editing, revisions stream to the server, which renders
+  // only the latest one after a pause and pushes it back over Server-Sent Events
+  const closeLivePreview = () => {
+    const { sessionId, source } = previewRef.current;
+    if (source) source.close();
+    if (sessionId) {
+      fetch(`http://127.0.0.1:5000/preview/${sessionId}`, { method: "DELETE" }).catch(() => {});
+    }
+    previewRef.current = { sessionId: null, source: null, seq: 0 };
+    setLivePreview(null);
+  };
+
+  useEffect(() => closeLivePreview, []);
+
+  const handleEditingChange = async (editing) => {
+    closeLivePreview();
+    if (!editing) return;
+
+    try {
+      const response = await fetch("http://127.0.0.1:5000/preview/session", { method: "POST" });
+      const data = await response.json();
+      if (!data.success) return;
+
+      const source = new EventSource(`http://127.0.0.1:5000/preview/${data.session_id}/events`);
+      source.addEventListener('render', (event) => {
+        const result = JSON.parse(event.data);
+        if (!result.success) return;
+        setLivePreview(prev => (!prev || result.seq > prev.seq)
+          ? { seq: result.seq, svg_content: result.svg_content, svg_file: result.svg_file }
+          : prev
+        );
+      });
+      previewRef.current = { sessionId: data.session_id, source, seq: 0 };
+    } catch (error) {
+      console.error('Error opening live preview:', error);
+    }
+  };
+
+  const handleLiveChange = (newCode) => {
+    const { sessionId } = previewRef.current;
+    if (!sessionId) return;
+    const seq = ++previewRef.current.seq;
+    fetch(`http://127.0.0.1:5000/preview/${sessionId}/revision`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify({ seq: seq, plantuml_code: newCode }),
+    }).catch((error) => console.error('Error sending preview revision:', error));
+  };
+
   const handleTabChange = async (tabIndex) => {
+    closeLivePreview();
     console.log(`🔄 Switching to tab ${tabIndex}, diagram type: ${diagramsState[tabIndex]?.diagram_type}`);
     setActiveTab(tabIndex);
     
     // Check if the new diagram needs SVG regeneration
     const newDiagram = diagramsState[tabIndex];
-    if (newDiagram && newDiagram.plantuml_code && !newDiagram.svg_file) {
+    if (newDiagram && newDiagram.plantuml_code && !newDiagram.svg_file && !newDiagram.svg_content) {
       setIsRegeneratingSvg(true);
       console.log(`🖼️ Generating SVG for ${newDiagram.diagram_type}...`);
       
@@ -104,7 +171,7 @@ const PlantUMLDisplay = () => {
             setDiagramsState(prevDiagrams => 
               prevDiagrams.map((diagram, index) => 
                 index === tabIndex 
-                  ? { ...diagram, svg_file: data.svg_file }
+                  ? { ...diagram, svg_file: data.svg_file, svg_content: data.svg_content }
                   : diagram
               )
             );
@@ -151,6 +218,7 @@ const PlantUMLDisplay = () => {
                     ...diagram, 
                     plantuml_code: data.plantuml_code,
                     svg_file: data.svg_file,
+                    svg_content: data.svg_content,
                     real_code: data.real_code,
                     real_code_language: data.real_code_language
                   }
@@ -168,6 +236,46 @@ const PlantUMLDisplay = () => {
     }
   };
 
+  // Regenerate Java/SQL for an edited diagram; the server only regenerates
+  // the classes or tables whose part of the diagram changed
+  const regenerateRealCode = async (tabIndex, diagramType, plantumlCode) => {
+    if (!["Class Diagram", "ER Diagram"].includes(diagramType)) return;
+
+    try {
+      const response = await fetch("http://127.0.0.1:5000/regenerate-code", {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+        },
+        body: JSON.stringify({
+          plantuml_code: plantumlCode,
+          diagram_type: diagramType,
+          meeting_data: meeting
+        }),
+      });
+
+      if (response.ok) {
+        const data = await response.json();
+        if (data.success) {
+          setDiagramsState(prevDiagrams => 
+            prevDiagrams.map((diagram, index) => 
+              index === tabIndex 
+                ? { 
+                    ...diagram, 
+                    real_code: data.real_code,
+                    real_code_language: data.real_code_language
+                  }
+                : diagram
+            )
+          );
+          console.log(`✅ ${diagramType} code regenerated: ${data.units?.regenerated?.length ?? 0} changed, ${data.units?.reused?.length ?? 0} reused`);
+        }
+      }
+    } catch (error) {
+      console.error(`Error regenerating code for ${diagramType}:`, error);
+    }
+  };
+
   const handleCodeUpdate = async (newPlantUMLCode) => {
     const currentDiagram = diagramsState[activeTab];
     if (!currentDiagram) return;
@@ -197,12 +305,14 @@ const PlantUMLDisplay = () => {
                 ? { 
                     ...diagram, 
                     plantuml_code: data.plantuml_code,
-                    svg_file: data.svg_file
+                    svg_file: data.svg_file,
+                    svg_content: data.svg_content
                   }
                 : diagram
             )
           );
           console.log(`✅ PlantUML code updated for ${currentDiagram.diagram_type}`);
+          regenerateRealCode(activeTab, currentDiagram.diagram_type, data.plantuml_code);
         } else {
           console.error('Error updating PlantUML:', data.error);
           alert(`Error: ${data.error}`);
@@ -216,6 +326,45 @@ const PlantUMLDisplay = () => {
     }
   };
 
+  const handleDownloadAll = async () => {
+    setIsExportingZip(true);
+    console.log('📦 Downloading all meeting artifacts...');
+
+    try {
+      const response = await fetch("http://127.0.0.1:5000/export-zip", {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+        },
+        body: JSON.stringify({
+          meeting: meeting,
+          diagrams: diagramsState
+        }),
+      });
+
+      if (!response.ok) {
+        const data = await response.json().catch(() => ({}));
+        alert(`Export failed: ${data.error || response.statusText}`);
+        return;
+      }
+
+      const blob = await response.blob();
+      const url = URL.createObjectURL(blob);
+      const anchor = document.createElement('a');
+      anchor.href = url;
+      anchor.download = `${(meeting?.title || 'meeting').toLowerCase().replace(/[^a-z0-9]+/g, '_')}.zip`;
+      document.body.appendChild(anchor);
+      anchor.click();
+      anchor.remove();
+      URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error('Error downloading meeting artifacts:', error);
+      alert('Network error while downloading artifacts');
+    } finally {
+      setIsExportingZip(false);
+    }
+  };
+
   // Get current diagram data
   const currentDiagram = diagramsState[activeTab];
 
@@ -239,6 +388,19 @@ const PlantUMLDisplay = () => {
             summaryData={formattedSummaryData}
           />
 
+          {/* Download All Button */}
+          <button 
+            className="retry-button" 
+            onClick={handleDownloadAll}
+            disabled={isExportingZip || isRetrying}
+            title="Download diagrams, sources, code and summary as a ZIP"
+          >
+            <svg width="16" height="16" viewBox="0 0 24 24" fill="none" xmlns="http://www.w3.org/2000/svg">
+              <path d="M12 3V15M12 15L7 10M12 15L17 10M4 21H20" stroke="currentColor" strokeWidth="2" strokeLinecap="round" strokeLinejoin="round"/>
+            </svg>
+            {isExportingZip ? 'Preparing...' : 'Download All'}
+          </button>
+
           {/* Retry Button */}
           <button 
             className="retry-button" 
@@ -287,7 +449,9 @@ const PlantUMLDisplay = () => {
           <div className="pdf-svg-section">
             <PDFSVGPanel 
               diagramType={currentDiagram?.diagram_type} 
-              link={currentDiagram?.svg_file}
+              link={livePreview?.svg_file || currentDiagram?.svg_file}
+              svgContent={livePreview ? livePreview.svg_content : currentDiagram?.svg_content}
+              plantumlCode={currentDiagram?.plantuml_code}
               isLoading={isRegeneratingSvg || isRetrying || isUpdatingCode}
               isRetrying={isRetrying || isUpdatingCode}
             />
@@ -305,6 +469,8 @@ const PlantUMLDisplay = () => {
               diagramType={currentDiagram?.diagram_type}
               onCodeUpdate={handleCodeUpdate}
               isUpdating={isUpdatingCode}
+              onLiveChange={handleLiveChange}
+              onEditingChange={handleEditingChange}
             />
           </div>
         </div>
@@ -316,6 +482,10 @@ const PlantUMLDisplay = () => {
         onClose={handleCloseCodePopup}
         language={currentDiagram?.real_code_language}
         code={currentDiagram?.real_code}
+        plantumlCode={currentDiagram?.plantuml_code}
+        diagramType={currentDiagram?.diagram_type}
+        meetingData={meeting}
+        onCodeGenerated={handleCodeGenerated}
       />
     </div>
   );